@@ -2,85 +2,302 @@
 Point d'entrée principal du dashboard.
 Vérifie l'existence des fichiers de données et les génère si nécessaire.
 """
+import argparse
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 
-def verifier_donnees():
+def preparer_annee(annee: int, parquet: bool = False, fusionne: bool = False,
+                   workers: int = 1):
     """
-    Vérifie la présence des fichiers nécessaires et les génère au besoin.
+    Vérifie les fichiers d'une année et les génère au besoin.
+    
+    Args:
+        annee: Année à préparer
+        parquet: Utilise le jeu Parquet partitionné comme données nettoyées
+        fusionne: Construit la base en un seul passage depuis le flux HTTP,
+            sans CSV brut ni nettoyé intermédiaire
+        workers: Nombre de processus pour le calcul jour/nuit et le
+            rattachement aux départements (0 = un par cœur)
     
     Returns:
-        bool: True si toutes les données sont prêtes, False sinon
+        bool: True si les données de l'année sont prêtes, False sinon
     """
-    db_path = Path("data/database/vitesses.db")
-    agg_path = Path("data/cleaned/vitesses_agg_2023.csv")
-    dept_path = Path("data/cleaned/infractions_par_dept_agg.csv")
-    raw_path = Path("data/raw/vitesse_2023.csv")
-    cleaned_path = Path("data/cleaned/vitesse_2023_cleaned.csv")
+    db_path = Path(f"data/database/vitesses_{annee}.db")
+    agg_path = Path(f"data/cleaned/vitesses_agg_{annee}.csv")
+    dept_path = Path(f"data/cleaned/infractions_par_dept_agg_{annee}.csv")
+    raw_path = Path(f"data/raw/vitesse_{annee}.csv")
+    cleaned_path = Path(f"data/cleaned/vitesse_{annee}_cleaned.csv")
+    if parquet:
+        cleaned_path = Path(f"data/cleaned/vitesse_{annee}_parquet")
+    
+    # Pipeline fusionné : téléchargement, nettoyage et chargement en un passage
+    if fusionne and not db_path.exists():
+        print(f"Création base {annee} en flux (ceci peut prendre quelques minutes)...")
+        try:
+            from src.utils.pipeline_fusionne import main as creer_db_flux
+            creer_db_flux(nb_workers=workers, annees=[annee])
+        except Exception as e:
+            print(f"Erreur pipeline fusionné: {e}")
+            return False
     
     # Téléchargement si nécessaire
-    if not raw_path.exists():
-        print("Téléchargement des données...")
+    if not db_path.exists() and not raw_path.exists():
+        print(f"Téléchargement des données {annee}...")
         try:
             from src.utils.get_data import main as telecharger
-            telecharger()
+            telecharger(annees=[annee])
         except Exception as e:
             print(f"Erreur téléchargement: {e}")
             return False
     
     # Nettoyage
-    if not cleaned_path.exists():
-        print("Nettoyage des données...")
+    if not db_path.exists() and not cleaned_path.exists():
+        print(f"Nettoyage des données {annee}...")
         try:
             from src.utils.clean_data import main as nettoyer
-            nettoyer()
+            nettoyer(parquet=parquet, annees=[annee])
         except Exception as e:
             print(f"Erreur nettoyage: {e}")
             return False
     
     # Base de données
     if not db_path.exists():
-        print("Création base de données (ceci peut prendre quelques minutes)...")
+        print(f"Création base {annee} (ceci peut prendre quelques minutes)...")
         try:
             from src.utils.load_to_sqlite import main as creer_db
-            creer_db()
+            creer_db(nb_workers=workers, annees=[annee])
         except Exception as e:
             print(f"Erreur création BDD: {e}")
             return False
     
     # Agrégations
     if not agg_path.exists():
-        print("Génération des agrégations...")
+        print(f"Génération des agrégations {annee}...")
         try:
             from src.utils.build_dashboard_cache import main as agreger
-            agreger()
+            agreger(annees=[annee], nb_workers=workers)
         except Exception as e:
             print(f"Erreur agrégation: {e}")
             return False
     
+    # Séries temporelles (complétées si la base a changé depuis)
+    try:
+        from src.utils.series_temporelles import main as construire_series
+        construire_series(annees=[annee])
+    except Exception as e:
+        print(f"Attention: séries temporelles non disponibles ({e})")
+    
     # Carte départements
     if not dept_path.exists():
-        print("Calcul des statistiques par département...")
+        print(f"Calcul des statistiques par département {annee}...")
         try:
             from src.utils.build_radars_departements import main as calculer_geo
-            calculer_geo()
+            calculer_geo(annees=[annee], nb_workers=workers)
         except Exception as e:
             print(f"Attention: carte non disponible ({e})")
     
     return True
 
 
+def verifier_donnees(parquet: bool = False, fusionne: bool = False,
+                     workers: int = 1, annees: list = None,
+                     annees_paralleles: int = 1):
+    """
+    Vérifie la présence des fichiers de chaque année et les génère au besoin.
+    
+    Args:
+        parquet: Utilise le jeu Parquet partitionné comme données nettoyées
+        fusionne: Construit les bases en un seul passage depuis le flux HTTP
+        workers: Nombre de processus pour le calcul jour/nuit et le
+            rattachement aux départements (0 = un par cœur)
+        annees: Années à préparer (None = toutes celles de RESSOURCES)
+        annees_paralleles: Nombre d'années préparées en parallèle
+    
+    Returns:
+        bool: True si toutes les données sont prêtes, False sinon
+    """
+    try:
+        from src.utils.get_data import ANNEES
+        from src.utils.partitions import migrer_bases, separer_base_unique
+        separer_base_unique()
+        migrer_bases()
+    except Exception as e:
+        print(f"Erreur répartition par année: {e}")
+        return False
+    
+    annees = annees or ANNEES
+    
+    # Chaque année a ses propres fichiers : les pipelines sont indépendants
+    if annees_paralleles > 1 and len(annees) > 1:
+        with ProcessPoolExecutor(min(annees_paralleles, len(annees))) as pool:
+            resultats = list(pool.map(preparer_annee, annees, repeat(parquet),
+                                      repeat(fusionne), repeat(workers)))
+    else:
+        resultats = [preparer_annee(annee, parquet, fusionne, workers)
+                     for annee in annees]
+    
+    # Contours de la carte : construits ici, une fois, jamais par le dashboard
+    try:
+        from src.utils.geojson_simplifie import main as simplifier_contours
+        simplifier_contours()
+    except Exception as e:
+        print(f"Attention: contours simplifiés non disponibles ({e})")
+    
+    return all(resultats)
+
+
+def mettre_a_jour_donnees(parquet: bool = False, workers: int = 1,
+                          annees: list = None):
+    """
+    Met à jour les bases annuelles existantes avec les seules données nouvelles.
+    
+    Le fichier brut n'est retéléchargé que s'il a changé sur Data.gouv.fr,
+    puis renettoyé s'il est plus récent que les données nettoyées. Seules
+    les mesures nouvelles sont ajoutées à la base et aux agrégations. Les
+    années sans base sont laissées à verifier_donnees.
+    
+    Args:
+        parquet: Utilise le jeu Parquet partitionné comme données nettoyées
+        workers: Nombre de processus pour le calcul jour/nuit et le
+            rattachement aux départements (0 = un par cœur)
+        annees: Années à mettre à jour (None = toutes celles déjà chargées)
+    
+    Returns:
+        bool: True si la mise à jour a réussi, False sinon
+    """
+    print("Mise à jour incrémentale des données...")
+    try:
+        from src.utils.partitions import (
+            annees_chargees, migrer_bases, separer_base_unique,
+        )
+        separer_base_unique()
+        migrer_bases()
+        annees = [a for a in annees_chargees() if annees is None or a in annees]
+    except Exception as e:
+        print(f"Erreur répartition par année: {e}")
+        return False
+    
+    for annee in annees:
+        raw_path = Path(f"data/raw/vitesse_{annee}.csv")
+        cleaned_path = Path(f"data/cleaned/vitesse_{annee}_cleaned.csv")
+        if parquet:
+            cleaned_path = Path(f"data/cleaned/vitesse_{annee}_parquet")
+        
+        try:
+            from src.utils.get_data import main as telecharger
+            telecharger(annees=[annee])
+            
+            if (not cleaned_path.exists()
+                    or raw_path.stat().st_mtime > cleaned_path.stat().st_mtime):
+                from src.utils.clean_data import main as nettoyer
+                nettoyer(parquet=parquet, annees=[annee])
+            
+            from src.utils.load_to_sqlite import charger_incremental
+            if charger_incremental(nb_workers=workers, annees=[annee]) == 0:
+                print(f"{annee}: aucune nouvelle mesure")
+                continue
+            
+            from src.utils.build_dashboard_cache import main as agreger
+            agreger(incremental=True, annees=[annee], nb_workers=workers)
+        except Exception as e:
+            print(f"Erreur mise à jour incrémentale {annee}: {e}")
+            return False
+        
+        # Statistiques par département : histogramme déjà complété par le cube
+        try:
+            from src.utils.build_radars_departements import main as calculer_geo
+            calculer_geo(annees=[annee], nb_workers=workers)
+        except Exception as e:
+            print(f"Attention: carte non disponible ({e})")
+    
+    return True
+
+
+def lire_arguments():
+    """Lit les options de la ligne de commande."""
+    parseur = argparse.ArgumentParser(description="Radar Dashboard")
+    parseur.add_argument(
+        "--parquet", action="store_true",
+        help="nettoie vers un jeu Parquet partitionné par mois au lieu du CSV",
+    )
+    parseur.add_argument(
+        "--fusionne", action="store_true",
+        help="construit la base en un seul passage depuis le téléchargement",
+    )
+    parseur.add_argument(
+        "--workers", type=int, default=1, metavar="N",
+        help="processus pour le calcul jour/nuit et le rattachement aux "
+             "départements (0 = un par cœur, défaut 1)",
+    )
+    parseur.add_argument(
+        "--incremental", action="store_true",
+        help="ajoute aux bases existantes les seules mesures nouvelles",
+    )
+    parseur.add_argument(
+        "--annees", type=int, nargs="+", metavar="AAAA",
+        help="années à préparer (défaut : toutes celles de RESSOURCES)",
+    )
+    parseur.add_argument(
+        "--annees-paralleles", type=int, default=1, metavar="N",
+        help="nombre d'années préparées en parallèle (défaut 1)",
+    )
+    parseur.add_argument(
+        "--filtrage-client", action="store_true",
+        help="recalcule l'histogramme de la page d'analyse dans le navigateur",
+    )
+    parseur.add_argument(
+        "--production", action="store_true",
+        help="sert le dashboard avec gunicorn (plusieurs processus, données "
+             "préchargées, réponses compressées)",
+    )
+    parseur.add_argument(
+        "--bind", default="127.0.0.1:8050", metavar="HOTE:PORT",
+        help="adresse d'écoute du dashboard (défaut 127.0.0.1:8050)",
+    )
+    parseur.add_argument(
+        "--web-workers", type=int, default=None, metavar="N",
+        help="processus gunicorn en mode production (défaut 2 × cœurs + 1)",
+    )
+    parseur.add_argument(
+        "--threads", type=int, default=4, metavar="N",
+        help="threads par processus gunicorn en mode production (défaut 4)",
+    )
+    return parseur.parse_args()
+
+
 if __name__ == "__main__":
+    arguments = lire_arguments()
+    
+    # Mise à jour incrémentale des bases existantes
+    if arguments.incremental:
+        if not mettre_a_jour_donnees(parquet=arguments.parquet,
+                                     workers=arguments.workers,
+                                     annees=arguments.annees):
+            sys.exit(1)
+    
     # Vérification et préparation des données
-    if not verifier_donnees():
+    if not verifier_donnees(parquet=arguments.parquet, fusionne=arguments.fusionne,
+                            workers=arguments.workers, annees=arguments.annees,
+                            annees_paralleles=arguments.annees_paralleles):
         sys.exit(1)
     
     # Lancement du serveur
-    from src.pages.home import create_app
+    from src.pages.serveur import creer_application, lire_adresse, servir
     
-    app = create_app()
-    print("\nDashboard accessible sur http://127.0.0.1:8050/")
+    hote, port = lire_adresse(arguments.bind)
+    if arguments.production:
+        app = creer_application(filtrage_client=arguments.filtrage_client)
+    else:
+        from src.pages.home import create_app
+        app = create_app(filtrage_client=arguments.filtrage_client)
+    print(f"\nDashboard accessible sur http://{hote}:{port}/")
     print("Ctrl+C pour arrêter\n")
     
-    app.run(debug=False, host="127.0.0.1", port=8050)
\ No newline at end of file
+    if arguments.production:
+        servir(app, bind=arguments.bind, workers=arguments.web_workers,
+               threads=arguments.threads)
+    else:
+        app.run(debug=False, host=hote, port=port)
\ No newline at end of file
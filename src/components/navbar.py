@@ -15,6 +15,7 @@ def navbar() -> html.Nav:
         ("Accueil", "/"),
         ("Dashboard", "/simple"),
         ("Géolocalisation", "/complex"),
+        ("Évolution", "/temporel"),
         ("À propos", "/about"),
     ]
     
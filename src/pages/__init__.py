@@ -3,19 +3,36 @@ Package des pages du dashboard.
 Expose les layouts et fonctions nécessaires :
 - Page dashboard
 - Page géolocalisation
+- Page d'évolution temporelle
 - Application principale
+
+Les modules ne sont importés qu'au premier accès à l'un de leurs noms.
 """
+from importlib import import_module
+
+# Nom exposé → (module, attribut)
+_EXPORTS = {
+    "create_app": (".home", "create_app"),
+    "simple_layout": (".simple_page", "layout"),
+    "simple_callbacks": (".simple_page", "register_callbacks"),
+    "geo_layout": (".create_geo_loc", "layout"),
+    "create_choropleth": (".create_geo_loc", "creer_carte"),
+    "serie_layout": (".serie_temporelle", "layout"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(nom: str):
+    """Importe à la demande le module qui définit un nom exposé."""
+    if nom not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    module, attribut = _EXPORTS[nom]
+    valeur = getattr(import_module(module, __name__), attribut)
+    globals()[nom] = valeur
+    return valeur
 
-from .home import create_app
-from .simple_page import layout as simple_layout
-from .simple_page import register_callbacks as simple_callbacks
-from .create_geo_loc import layout as geo_layout
-from .create_geo_loc import creer_carte as create_choropleth
 
-__all__ = [
-    "create_app",
-    "simple_layout",
-    "simple_callbacks",
-    "geo_layout",
-    "create_choropleth",
-]
+def __dir__() -> list:
+    """Liste aussi les noms exposés non encore importés."""
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,396 @@
+"""
+API JSON d'exploration des mesures, servie par le serveur Flask du dashboard.
+
+Deux routes répondent aux questions que les CSV du dashboard ne couvrent
+pas, sans ouvrir les bases à la main :
+
+- /api/agregats : comptages du cube (cf. cube.py) ventilés et filtrés
+  selon ses dimensions (année, période, limitation, classe, mois, jour de
+  la semaine, heure, département), par exemple
+  /api/agregats?dimensions=heure&limitation=50,70&departement=75
+- /api/mesures : comptages sur une plage de dates, lus dans les mesures
+  par l'index idx_date, par exemple
+  /api/mesures?debut=2023-03-01&fin=2023-03-31&par=jour&limitation=50
+
+Les requêtes sont paramétrées ; les colonnes et les regroupements viennent
+de listes fermées. Chaque base annuelle a un pool de connexions en lecture
+seule (URI mode=ro) partagé par les threads du serveur. Une requête est
+interrompue au-delà de DELAI_REQUETE (gestionnaire de progression SQLite)
+et renvoie au plus LIGNES_MAX lignes.
+
+Réponse : {"colonnes": [...], "lignes": [[...], ...], "tronque": bool}.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+import pandas as pd
+from flask import jsonify, request
+
+from src.utils.cube import CLASSE_SQL, TYPES_DIMENSIONS, requete_cube
+from src.utils.partitions import annees_chargees, chemin_base
+
+
+URL_API = "/api/"
+TAILLE_POOL = 4  # Connexions ouvertes au plus par base annuelle
+DELAI_REQUETE = 2.0  # Secondes, pour l'ensemble des années interrogées
+LIGNES_MAX = 10_000
+PAS_PROGRESSION = 10_000  # Instructions SQLite entre deux vérifications du délai
+
+# Regroupements de /api/mesures : nom → expression SQL
+REGROUPEMENTS_MESURES = {
+    "jour": "date(v.date, 'unixepoch')",
+    "heure": "v.date / 3600 % 24",
+    "limitation": "v.limitation",
+    "departement": "COALESCE(p.departement, '')",
+    "periode": "CASE v.est_nuit WHEN 1 THEN 'nuit' WHEN 0 THEN 'jour' ELSE '' END",
+    "classe_depassement": CLASSE_SQL,
+}
+
+# Filtres de /api/mesures : nom → (expression SQL, conversion de la valeur)
+FILTRES_MESURES = {
+    "heure": ("v.date / 3600 % 24", int),
+    "limitation": ("v.limitation", int),
+    "departement": ("p.departement", str),
+    "periode": ("v.est_nuit", lambda periode: {"jour": 0, "nuit": 1}[periode]),
+}
+
+COLONNES_MESURES = ["nb", "nb_infractions", "somme_depassement"]
+
+
+class DelaiDepasse(Exception):
+    """Requête interrompue après DELAI_REQUETE."""
+
+
+class PoolLecture:
+    """
+    Connexions SQLite en lecture seule à une base, réutilisées.
+
+    Au plus taille connexions sont ouvertes ; au-delà, une demande attend
+    qu'une connexion soit rendue. Une connexion SQLite ne doit pas servir
+    de part et d'autre d'un fork : un pool hérité du processus parent
+    (workers gunicorn) repart sans connexion.
+    """
+
+    def __init__(self, chemin: Path, taille: int = TAILLE_POOL):
+        """
+        Args:
+            chemin: Base SQLite
+            taille: Nombre maximal de connexions
+        """
+        self.uri = f"{Path(chemin).resolve().as_uri()}?mode=ro"
+        self.taille = taille
+        self.libres = queue.LifoQueue()
+        self.nb_ouvertes = 0
+        self.verrou = threading.Lock()
+        self.pid = os.getpid()
+
+    def ouvrir(self) -> sqlite3.Connection:
+        """Ouvre une connexion en lecture seule, utilisable par tout thread."""
+        return sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connexion(self, delai: float = DELAI_REQUETE):
+        """
+        Prête une connexion du pool le temps d'un bloc with.
+
+        Args:
+            delai: Attente maximale d'une connexion libre, en secondes
+
+        Yields:
+            Connexion SQLite en lecture seule
+        """
+        if self.pid != os.getpid():
+            with self.verrou:
+                if self.pid != os.getpid():
+                    # Connexions du parent : ni réutilisées, ni fermées ici
+                    self.libres = queue.LifoQueue()
+                    self.nb_ouvertes = 0
+                    self.pid = os.getpid()
+        try:
+            conn = self.libres.get_nowait()
+        except queue.Empty:
+            with self.verrou:
+                nouvelle = self.nb_ouvertes < self.taille
+                if nouvelle:
+                    self.nb_ouvertes += 1
+            if nouvelle:
+                try:
+                    conn = self.ouvrir()
+                except sqlite3.Error:
+                    with self.verrou:
+                        self.nb_ouvertes -= 1
+                    raise
+            else:
+                try:
+                    conn = self.libres.get(timeout=delai)
+                except queue.Empty:
+                    raise DelaiDepasse("aucune connexion libre") from None
+        try:
+            yield conn
+        finally:
+            self.libres.put(conn)
+
+    def fermer(self) -> None:
+        """Ferme les connexions libres (par exemple avant un fork)."""
+        while True:
+            try:
+                conn = self.libres.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self.verrou:
+                self.nb_ouvertes -= 1
+
+
+_POOLS = {}
+_VERROU_POOLS = threading.Lock()
+
+
+def pool_annee(annee: int) -> PoolLecture:
+    """Renvoie le pool de connexions de la base d'une année, créé au besoin."""
+    with _VERROU_POOLS:
+        if annee not in _POOLS:
+            _POOLS[annee] = PoolLecture(chemin_base(annee))
+        return _POOLS[annee]
+
+
+def fermer_pools() -> None:
+    """Ferme les connexions libres de tous les pools."""
+    with _VERROU_POOLS:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.fermer()
+
+
+def executer(conn: sqlite3.Connection, requete: str, parametres: list,
+             limite: float, lignes_max: int = LIGNES_MAX) -> tuple:
+    """
+    Exécute une requête avec une échéance et un nombre de lignes maximal.
+
+    Args:
+        conn: Connexion SQLite
+        requete: Requête SQL paramétrée
+        parametres: Valeurs des paramètres
+        limite: Échéance, en secondes de time.monotonic()
+        lignes_max: Nombre maximal de lignes lues
+
+    Returns:
+        Tuple (colonnes, lignes, tronque)
+
+    Raises:
+        DelaiDepasse: Si l'échéance est atteinte avant la fin
+    """
+    conn.set_progress_handler(lambda: time.monotonic() > limite, PAS_PROGRESSION)
+    try:
+        curseur = conn.execute(requete, parametres)
+        lignes = curseur.fetchmany(lignes_max + 1)
+    except sqlite3.OperationalError as e:
+        if "interrupted" in str(e):
+            raise DelaiDepasse("délai de la requête dépassé") from None
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+    colonnes = [description[0] for description in curseur.description]
+    return colonnes, lignes[:lignes_max], len(lignes) > lignes_max
+
+
+def interroger_annees(annees: list, construire) -> tuple:
+    """
+    Exécute une requête sur chaque base annuelle et réunit les lignes.
+
+    Args:
+        annees: Années à interroger
+        construire: Fonction connexion → (requête, paramètres)
+
+    Returns:
+        Tuple (colonnes, lignes de toutes les années, tronque)
+    """
+    limite = time.monotonic() + DELAI_REQUETE
+    colonnes, lignes, tronque = [], [], False
+    for annee in annees:
+        with pool_annee(annee).connexion(max(limite - time.monotonic(), 0)) as conn:
+            requete, parametres = construire(conn)
+            colonnes, lignes_annee, tronque_annee = executer(
+                conn, requete, parametres, limite, LIGNES_MAX - len(lignes)
+            )
+        lignes.extend(lignes_annee)
+        tronque = tronque or tronque_annee
+        if len(lignes) >= LIGNES_MAX:
+            tronque = tronque or annee != annees[-1]
+            break
+    return colonnes, lignes, tronque
+
+
+def reunir(colonnes: list, lignes: list, cles: list, sommes: list) -> list:
+    """
+    Additionne les lignes de plusieurs années qui ont les mêmes clés.
+
+    Args:
+        colonnes: Noms des colonnes des lignes
+        lignes: Lignes réunies de toutes les années
+        cles: Colonnes de regroupement
+        sommes: Colonnes additionnées
+
+    Returns:
+        Lignes regroupées, triées selon les clés
+    """
+    if not lignes:
+        return []
+    df = pd.DataFrame(lignes, columns=colonnes)
+    if cles:
+        df = df.groupby(cles, sort=True, dropna=False)[sommes].sum().reset_index()
+    else:
+        df = df[sommes].sum().to_frame().T
+    return df[colonnes].astype(object).where(df[colonnes].notna(), None).values.tolist()
+
+
+def lire_liste(nom: str, conversion=str) -> list:
+    """
+    Lit un paramètre de requête à valeurs séparées par des virgules.
+
+    Args:
+        nom: Nom du paramètre
+        conversion: Fonction appliquée à chaque valeur
+
+    Returns:
+        Valeurs converties (liste vide si le paramètre est absent)
+    """
+    texte = request.args.get(nom, "")
+    try:
+        return [conversion(valeur.strip()) for valeur in texte.split(",") if valeur.strip()]
+    except (KeyError, ValueError):
+        raise ValueError(f"Valeur invalide pour {nom}: {texte}") from None
+
+
+def annees_demandees(annees: list) -> list:
+    """Restreint des années aux bases existantes (toutes si la liste est vide)."""
+    chargees = annees_chargees()
+    if not annees:
+        return chargees
+    return [annee for annee in chargees if annee in annees]
+
+
+def agregats() -> dict:
+    """
+    Comptages du cube selon les paramètres de la requête en cours.
+
+    Paramètres : dimensions (liste des dimensions conservées) et un filtre
+    optionnel par dimension du cube (valeurs séparées par des virgules).
+
+    Returns:
+        Réponse (cf. docstring du module)
+    """
+    dimensions = lire_liste("dimensions")
+    conversions = {
+        dimension: int if type_sql == "INTEGER" else str
+        for dimension, type_sql in TYPES_DIMENSIONS.items()
+    }
+    filtres = {}
+    for nom in request.args:
+        if nom == "dimensions":
+            continue
+        if nom not in conversions:
+            raise ValueError(f"Paramètre inconnu: {nom}")
+        filtres[nom] = lire_liste(nom, conversions[nom])
+
+    annees = annees_demandees(filtres.get("annee", []))
+    colonnes, lignes, tronque = interroger_annees(
+        annees, lambda conn: requete_cube(conn, dimensions, filtres)
+    )
+    colonnes = [*dimensions, "nb", "somme_depassement"]
+    lignes = reunir(colonnes, lignes, dimensions, ["nb", "somme_depassement"])
+    return {"colonnes": colonnes, "lignes": lignes, "tronque": tronque}
+
+
+def secondes_locales(jour: date) -> int:
+    """Renvoie le début d'un jour en secondes locales depuis 1970 (cf. schema.py)."""
+    return (jour - date(1970, 1, 1)).days * 86400
+
+
+def mesures() -> dict:
+    """
+    Comptages des mesures d'une plage de dates selon la requête en cours.
+
+    Paramètres : debut et fin (AAAA-MM-JJ, inclus, obligatoires : la
+    plage passe par l'index des dates), par (regroupement parmi
+    REGROUPEMENTS_MESURES) et un filtre optionnel par clé de
+    FILTRES_MESURES.
+
+    Returns:
+        Réponse (cf. docstring du module)
+    """
+    try:
+        debut = date.fromisoformat(request.args["debut"])
+        fin = date.fromisoformat(request.args["fin"])
+    except KeyError:
+        raise ValueError("Paramètres debut et fin obligatoires (AAAA-MM-JJ)") from None
+    par = request.args.get("par")
+    if par is not None and par not in REGROUPEMENTS_MESURES:
+        raise ValueError(f"Regroupement inconnu: {par}")
+    inconnus = set(request.args) - {"debut", "fin", "par", *FILTRES_MESURES}
+    if inconnus:
+        raise ValueError(f"Paramètres inconnus: {sorted(inconnus)}")
+
+    conditions = ["v.date >= ?", "v.date < ?"]
+    parametres = [secondes_locales(debut), secondes_locales(fin + timedelta(days=1))]
+    for nom, (expression, conversion) in FILTRES_MESURES.items():
+        valeurs = lire_liste(nom, conversion)
+        if valeurs:
+            conditions.append(f"{expression} IN ({', '.join('?' * len(valeurs))})")
+            parametres.extend(valeurs)
+
+    groupe = f"{REGROUPEMENTS_MESURES[par]} AS {par}, " if par else ""
+    requete = (
+        f"SELECT {groupe}COUNT(*) AS nb, "
+        "COALESCE(SUM(v.depassement > 0), 0) AS nb_infractions, "
+        "COALESCE(SUM(v.depassement), 0) AS somme_depassement "
+        "FROM vitesses v LEFT JOIN positions p ON p.id = v.position_id "
+        f"WHERE {' AND '.join(conditions)}"
+    )
+    if par:
+        requete += " GROUP BY 1"
+
+    annees = annees_demandees(list(range(debut.year, fin.year + 1)))
+    colonnes, lignes, tronque = interroger_annees(annees, lambda conn: (requete, parametres))
+    colonnes = [par, *COLONNES_MESURES] if par else COLONNES_MESURES
+    lignes = reunir(colonnes, lignes, [par] if par else [], COLONNES_MESURES)
+    return {"colonnes": colonnes, "lignes": lignes, "tronque": tronque}
+
+
+def repondre(calcul):
+    """
+    Exécute un calcul de l'API et le convertit en réponse JSON.
+
+    Args:
+        calcul: Fonction sans argument qui renvoie le dictionnaire de réponse
+
+    Returns:
+        Réponse Flask (400 si la requête est invalide, 503 si une base
+        est illisible, 504 si la requête dépasse le délai)
+    """
+    try:
+        return jsonify(calcul())
+    except ValueError as e:
+        return jsonify({"erreur": str(e)}), 400
+    except DelaiDepasse as e:
+        return jsonify({"erreur": str(e)}), 504
+    except sqlite3.Error as e:
+        return jsonify({"erreur": f"base indisponible ({e})"}), 503
+
+
+def register_routes(app):
+    """
+    Enregistre les routes de l'API sur le serveur Flask.
+
+    Args:
+        app: Application Dash
+    """
+    app.server.add_url_rule(f"{URL_API}agregats", "api_agregats",
+                            lambda: repondre(agregats))
+    app.server.add_url_rule(f"{URL_API}mesures", "api_mesures",
+                            lambda: repondre(mesures))
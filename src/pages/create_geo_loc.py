@@ -1,40 +1,145 @@
 """
 Page de géolocalisation des infractions.
-Affiche une carte choroplèthe interactive par département.
+Affiche une carte choroplèthe interactive par département, pour une année.
+
+Les contours ne sont pas intégrés à la figure : elle référence par URL les
+contours simplifiés du niveau adapté au zoom (cf. geojson_simplifie),
+servis tels quels depuis le disque et gardés en cache par le navigateur.
 """
 from pathlib import Path
-from dash import html, dcc
+from dash import html, dcc, ctx
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from flask import abort, send_from_directory
 import plotly.graph_objects as go
 import pandas as pd
 import json
 
+from src.pages.donnees import annees_fichiers, charger
+from src.utils.geojson_simplifie import chemin_manifeste, lire_manifeste, niveau_pour_zoom
+
 
-CHEMIN_DONNEES = Path("data/cleaned/infractions_par_dept_agg.csv")
+REPERTOIRE_DONNEES = Path("data/cleaned")
 CHEMIN_GEOJSON = Path("data/geo/departements.geojson")
+URL_CONTOURS = "/geo/"
+ZOOM_INITIAL = 4.3
+DUREE_CACHE_CONTOURS = 365 * 24 * 3600  # Secondes ; le nom change avec la source
+
+PREFIXE_DEPARTEMENTS = "infractions_par_dept_agg_"
+CONTOURS_ABSENTS = {"manifeste": None, "geojson": None}
+
+
+def annees_disponibles() -> list:
+    """Liste les années dont les statistiques par département existent."""
+    return annees_fichiers(REPERTOIRE_DONNEES, PREFIXE_DEPARTEMENTS)
+
+
+def lire_statistiques(chemin: Path) -> pd.DataFrame:
+    """Lit un fichier de statistiques par département."""
+    df = pd.read_csv(chemin)
+    df['code_dept'] = df['code_dept'].astype(str).str.zfill(2)
+    return df
+
+
+def charger_departements(annee: int) -> pd.DataFrame:
+    """
+    Renvoie les statistiques à jour par département d'une année.
+    
+    Args:
+        annee: Année demandée (None = aucune donnée)
+        
+    Returns:
+        DataFrame avec code_dept et nb_infractions
+    """
+    vide = pd.DataFrame({"code_dept": [], "nb_infractions": []})
+    if annee is None:
+        return vide
+    return charger(REPERTOIRE_DONNEES / f"{PREFIXE_DEPARTEMENTS}{annee}.csv",
+                   lire_statistiques, defaut=vide)
+
+
+def lire_contours(chemin: Path) -> dict:
+    """
+    Lit le manifeste des contours simplifiés, construit par le pipeline.
+    
+    Args:
+        chemin: Manifeste (cf. geojson_simplifie.chemin_manifeste)
+    
+    Returns:
+        Dictionnaire manifeste / geojson, ou None si le manifeste est périmé
+    """
+    manifeste = lire_manifeste(CHEMIN_GEOJSON)
+    if manifeste is None:
+        print("Attention: contours simplifiés périmés, GeoJSON complet intégré "
+              "à la carte (python -m src.utils.geojson_simplifie)")
+        return None
+    return {"manifeste": manifeste, "geojson": None}
+
+
+def lire_geojson(chemin: Path) -> dict:
+    """Lit le GeoJSON complet, à intégrer à la figure."""
+    with open(chemin, "r", encoding="utf-8") as f:
+        return {"manifeste": None, "geojson": json.load(f)}
+
+
+def contours() -> dict:
+    """
+    Renvoie les contours à jour.
+    
+    Les contours simplifiés sont construits par le pipeline : une requête
+    ne fait que relire leur manifeste quand il change, et à défaut intègre
+    le GeoJSON complet à la figure. Aucun fichier n'est écrit ni supprimé.
+    """
+    simplifies = charger(chemin_manifeste(CHEMIN_GEOJSON), lire_contours)
+    return simplifies or charger(CHEMIN_GEOJSON, lire_geojson, defaut=CONTOURS_ABSENTS)
+
 
-# Chargement des données
-if CHEMIN_DONNEES.exists():
-    df_departements = pd.read_csv(CHEMIN_DONNEES)
-    df_departements['code_dept'] = df_departements['code_dept'].astype(str).str.zfill(2)
-else:
-    df_departements = pd.DataFrame({"code_dept": [], "nb_infractions": []})
+NIVEAU_INITIAL = niveau_pour_zoom(ZOOM_INITIAL)
 
-# Chargement GeoJSON
-if CHEMIN_GEOJSON.exists():
-    with open(CHEMIN_GEOJSON, "r", encoding="utf-8") as f:
-        geojson_departements = json.load(f)
-else:
-    geojson_departements = None
 
+def contours_carte(niveau: str):
+    """
+    Renvoie les contours à donner à la figure.
+    
+    Args:
+        niveau: Niveau de simplification (cf. NIVEAUX_CARTE)
+    
+    Returns:
+        URL des contours simplifiés, GeoJSON complet, ou None si absent
+    """
+    actuels = contours()
+    if actuels["manifeste"] is not None:
+        return URL_CONTOURS + actuels["manifeste"]["niveaux"][niveau]
+    return actuels["geojson"]
+
+
+def codes_departements() -> list:
+    """Liste les codes de tous les départements de la carte."""
+    actuels = contours()
+    if actuels["manifeste"] is not None:
+        return actuels["manifeste"]["codes"]
+    if actuels["geojson"] is not None:
+        return [f['properties']['code'] for f in actuels["geojson"]['features']]
+    return []
 
-def creer_carte():
+
+def creer_carte(annee: int = None, niveau: str = NIVEAU_INITIAL):
     """
     Crée la carte choroplèthe des infractions par département.
     
+    Args:
+        annee: Année affichée (None = la plus récente disponible)
+        niveau: Niveau de simplification des contours
+    
     Returns:
         Figure Plotly de la carte
     """
-    if geojson_departements is None or df_departements.empty:
+    if annee is None:
+        annees = annees_disponibles()
+        annee = annees[-1] if annees else None
+    df_departements = charger_departements(annee)
+    contours = contours_carte(niveau)
+    if contours is None or df_departements.empty:
         return go.Figure().add_annotation(
             text="Données manquantes",
             xref="paper", yref="paper", x=0.5, y=0.5, 
@@ -42,13 +147,12 @@ def creer_carte():
         )
     
     # Complétion avec tous les départements du GeoJSON
-    codes_tous = [f['properties']['code'] for f in geojson_departements['features']]
-    df_complet = pd.DataFrame({'code_dept': codes_tous})
+    df_complet = pd.DataFrame({'code_dept': codes_departements()})
     df_complet = df_complet.merge(df_departements, on='code_dept', how='left').fillna(0)
     
     # Création de la carte
-    fig = go.Figure(go.Choroplethmapbox(
-        geojson=geojson_departements,
+    fig = go.Figure(go.Choroplethmap(
+        geojson=contours,
         locations=df_complet["code_dept"],
         z=df_complet["nb_infractions"],
         featureidkey="properties.code",
@@ -69,47 +173,132 @@ def creer_carte():
     ))
     
     fig.update_layout(
-        mapbox_style="white-bg",
-        mapbox_zoom=4.3,
-        mapbox_center={"lat": 46.5, "lon": 2.3},
+        map_style="white-bg",
+        map_zoom=ZOOM_INITIAL,
+        map_center={"lat": 46.5, "lon": 2.3},
         margin={"r": 80, "t": 20, "l": 20, "b": 20},
         paper_bgcolor='white',
+        # Garde le zoom et le cadrage de l'utilisateur quand la figure change
+        uirevision="carte",
     )
     
     return fig
 
 
-layout = html.Div([
-    html.H2(
-        "Géolocalisation des infractions",
-        style={
-            "textAlign": "center",
-            "marginBottom": "0.5rem",
-            "marginTop": "0",
-            "fontWeight": "600",
-            "fontSize": "2rem"
-        }
-    ),
-    html.H3(
-        "Répartition géographique des infractions par département",
-        style={
-            "textAlign": "center",
-            "color": "#444",
-            "fontSize": "1.3rem",
-            "marginBottom": "1.5rem",
-            "fontWeight": "500",
-            "letterSpacing": "0.3px"
-        }
-    ),
-    dcc.Graph(
-        id="carte-departements",
-        figure=creer_carte(),
-        style={"height": "82vh", "width": "100%"},
-        config={
-            'displayModeBar': True,
-            'displaylogo': False,
-            'scrollZoom': False,
-            'modeBarButtonsToRemove': ['select2d', 'lasso2d'],
-        }
-    ),
-], style={"padding": "0.5rem 1rem", "maxWidth": "100%", "margin": "0 auto"})
\ No newline at end of file
+def layout() -> html.Div:
+    """
+    Construit la page pour les années disponibles au moment de l'affichage.
+    
+    La figure n'est pas construite ici : le callback de la carte la
+    dessine au premier affichage.
+    
+    Returns:
+        Layout de la page
+    """
+    annees = annees_disponibles()
+    return html.Div([
+        html.H2(
+            "Géolocalisation des infractions",
+            style={
+                "textAlign": "center",
+                "marginBottom": "0.5rem",
+                "marginTop": "0",
+                "fontWeight": "600",
+                "fontSize": "2rem"
+            }
+        ),
+        html.H3(
+            "Répartition géographique des infractions par département",
+            style={
+                "textAlign": "center",
+                "color": "#444",
+                "fontSize": "1.3rem",
+                "marginBottom": "1.5rem",
+                "fontWeight": "500",
+                "letterSpacing": "0.3px"
+            }
+        ),
+        html.Div([
+            html.Label("Année", style={"fontWeight": "600", "marginRight": "0.75rem"}),
+            dcc.Dropdown(
+                id="carte-annee",
+                options=[{"label": str(annee), "value": annee}
+                         for annee in annees],
+                value=annees[-1] if annees else None,
+                clearable=False,
+                style={"width": "120px", "fontSize": "0.9rem"},
+            ),
+        ], style={"display": "flex", "justifyContent": "center",
+                  "alignItems": "center", "marginBottom": "1rem"}),
+        dcc.Store(id="carte-niveau", data=NIVEAU_INITIAL),
+        dcc.Graph(
+            id="carte-departements",
+            style={"height": "82vh", "width": "100%"},
+            config={
+                'displayModeBar': True,
+                'displaylogo': False,
+                'scrollZoom': False,
+                'modeBarButtonsToRemove': ['select2d', 'lasso2d'],
+            }
+        ),
+    ], style={"padding": "0.5rem 1rem", "maxWidth": "100%", "margin": "0 auto"})
+
+
+def servir_contours(nom: str):
+    """
+    Sert un fichier de contours simplifiés, avec un cache navigateur long.
+    
+    Args:
+        nom: Nom du fichier, tel que listé dans le manifeste
+    
+    Returns:
+        Réponse Flask du fichier (404 si inconnu)
+    """
+    manifeste = contours()["manifeste"]
+    if manifeste is None or nom not in manifeste["niveaux"].values():
+        abort(404)
+    reponse = send_from_directory(CHEMIN_GEOJSON.parent.resolve(), nom,
+                                  mimetype="application/json",
+                                  max_age=DUREE_CACHE_CONTOURS)
+    reponse.cache_control.public = True
+    reponse.cache_control.immutable = True
+    return reponse
+
+
+def register_callbacks(app):
+    """
+    Enregistre les callbacks de la page et la route des contours.
+    
+    Args:
+        app: Application Dash
+    """
+    app.server.add_url_rule(f"{URL_CONTOURS}<nom>", "contours_departements",
+                            servir_contours)
+    
+    @app.callback(
+        Output("carte-departements", "figure"),
+        Output("carte-niveau", "data"),
+        Input("carte-annee", "value"),
+        Input("carte-departements", "relayoutData"),
+        State("carte-niveau", "data"),
+    )
+    def mettre_a_jour_carte(annee, relayout, niveau_actuel):
+        """
+        Redessine la carte pour l'année sélectionnée, ou avec des contours
+        plus ou moins détaillés quand le zoom change de niveau.
+        
+        Args:
+            annee: Année sélectionnée
+            relayout: Dernier changement de cadrage de la carte
+            niveau_actuel: Niveau des contours affichés
+            
+        Returns:
+            Figure Plotly de la carte et niveau de ses contours
+        """
+        niveau = niveau_actuel or NIVEAU_INITIAL
+        zoom = (relayout or {}).get("map.zoom")
+        if zoom is not None:
+            niveau = niveau_pour_zoom(zoom)
+        if ctx.triggered_id == "carte-departements" and niveau == niveau_actuel:
+            raise PreventUpdate
+        return creer_carte(annee, niveau), niveau
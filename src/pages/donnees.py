@@ -0,0 +1,180 @@
+"""
+Accès aux données des pages du dashboard.
+
+Chaque fichier de données (agrégation d'une année, statistiques par
+département, contours de la carte) est lu à sa première demande puis gardé
+en mémoire. Au plus une fois par DELAI_VERIFICATION, la date de
+modification et la taille du fichier sont comparées à celles de la
+lecture : si elles ont changé et que l'empreinte du contenu aussi, le
+fichier est relu et la nouvelle valeur remplace l'ancienne d'un seul coup.
+Une reconstruction des données par le pipeline est ainsi prise en compte
+par un dashboard en cours d'exécution, sans redémarrage.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+DELAI_VERIFICATION = 1.0  # Secondes entre deux vérifications d'un même fichier
+
+
+def empreinte_contenu(chemin: Path) -> str:
+    """Renvoie l'empreinte SHA-256 du contenu d'un fichier."""
+    return hashlib.sha256(chemin.read_bytes()).hexdigest()
+
+
+class JeuDonnees:
+    """
+    Fichier lu à la première demande et relu quand il change.
+
+    L'état (signature du fichier, empreinte, valeur lue) est un seul tuple
+    remplacé d'un bloc : un lecteur concurrent voit l'ancienne ou la
+    nouvelle valeur, jamais un mélange. Une seule relecture a lieu à la
+    fois.
+    """
+
+    def __init__(self, chemin: Path, lecteur, defaut=None):
+        """
+        Args:
+            chemin: Fichier surveillé
+            lecteur: Fonction chemin → valeur (DataFrame, dictionnaire...)
+            defaut: Valeur renvoyée tant que le fichier est absent
+        """
+        self.chemin = Path(chemin)
+        self.lecteur = lecteur
+        self.defaut = defaut
+        self.etat = (None, None, defaut)
+        self.prochaine_verification = 0.0
+        self.verrou = threading.Lock()
+
+    def signature(self):
+        """Renvoie (date de modification, taille) du fichier, ou None."""
+        try:
+            stat = self.chemin.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def actualiser(self) -> None:
+        """Relit le fichier si sa signature et son contenu ont changé."""
+        with self.verrou:
+            signature_lue, empreinte_lue, valeur = self.etat
+            signature = self.signature()
+            if signature == signature_lue:
+                return
+            if signature is None:
+                self.etat = (None, None, self.defaut)
+                return
+            empreinte = empreinte_contenu(self.chemin)
+            if empreinte != empreinte_lue:
+                valeur = self.lecteur(self.chemin)
+            self.etat = (signature, empreinte, valeur)
+
+    def lire_versionne(self) -> tuple:
+        """
+        Renvoie la valeur à jour du fichier avec sa version.
+
+        Returns:
+            Tuple (empreinte du contenu lu ou None si le fichier est
+            absent, valeur), tirés du même état
+        """
+        maintenant = time.monotonic()
+        if maintenant >= self.prochaine_verification:
+            self.actualiser()
+            self.prochaine_verification = maintenant + DELAI_VERIFICATION
+        _, empreinte, valeur = self.etat
+        return empreinte, valeur
+
+    def lire(self):
+        """Renvoie la valeur à jour du fichier."""
+        return self.lire_versionne()[1]
+
+    @property
+    def version(self):
+        """Empreinte du contenu lu (None si le fichier est absent)."""
+        return self.lire_versionne()[0]
+
+
+class CacheLRU:
+    """
+    Cache borné : au-delà de taille_max entrées, la moins récemment
+    utilisée est évincée.
+    """
+
+    def __init__(self, taille_max: int):
+        self.taille_max = taille_max
+        self.valeurs = OrderedDict()
+        self.verrou = threading.Lock()
+        self.stats = {"succes": 0, "echecs": 0}
+
+    def obtenir(self, cle, construire):
+        """
+        Renvoie la valeur d'une clé, construite au premier appel.
+
+        Args:
+            cle: Clé hachable (entrées et version des données)
+            construire: Fonction sans argument qui calcule la valeur
+
+        Returns:
+            Valeur en cache ou nouvellement construite
+        """
+        with self.verrou:
+            if cle in self.valeurs:
+                self.valeurs.move_to_end(cle)
+                self.stats["succes"] += 1
+                return self.valeurs[cle]
+        # Construction hors verrou : deux appels simultanés peuvent
+        # calculer la même valeur, sans bloquer les autres clés
+        valeur = construire()
+        with self.verrou:
+            self.stats["echecs"] += 1
+            self.valeurs[cle] = valeur
+            self.valeurs.move_to_end(cle)
+            while len(self.valeurs) > self.taille_max:
+                self.valeurs.popitem(last=False)
+        return valeur
+
+
+_JEUX = {}
+_VERROU_JEUX = threading.Lock()
+
+
+def jeu_donnees(chemin: Path, lecteur, defaut=None) -> JeuDonnees:
+    """
+    Renvoie le jeu de données partagé d'un fichier, créé au besoin.
+
+    Args:
+        chemin: Fichier de données
+        lecteur: Fonction chemin → valeur
+        defaut: Valeur tant que le fichier est absent
+
+    Returns:
+        JeuDonnees unique pour ce fichier et ce lecteur
+    """
+    cle = (str(Path(chemin)), lecteur)
+    with _VERROU_JEUX:
+        if cle not in _JEUX:
+            _JEUX[cle] = JeuDonnees(chemin, lecteur, defaut)
+        return _JEUX[cle]
+
+
+def charger(chemin: Path, lecteur, defaut=None):
+    """Renvoie le contenu à jour d'un fichier (cf. JeuDonnees)."""
+    return jeu_donnees(chemin, lecteur, defaut).lire()
+
+
+def annees_fichiers(repertoire: Path, prefixe: str) -> list:
+    """
+    Liste les années des fichiers <prefixe>AAAA.csv d'un répertoire.
+
+    Relu à chaque appel : une année ajoutée par le pipeline apparaît au
+    prochain affichage de la page.
+    """
+    annees = []
+    for chemin in Path(repertoire).glob(f"{prefixe}*.csv"):
+        suffixe = chemin.stem[len(prefixe):]
+        if suffixe.isdigit():
+            annees.append(int(suffixe))
+    return sorted(annees)
@@ -9,18 +9,29 @@ from src.components.header import header
 from src.components.navbar import navbar
 from src.components.footer import footer
 from src.pages.simple_page import layout as layout_stats, register_callbacks
+from src.pages.serie_temporelle import layout as layout_serie
+from src.pages.serie_temporelle import register_callbacks as register_callbacks_serie
+from src.pages.api_requetes import register_routes as register_routes_api
 
 
 try:
     from src.pages.create_geo_loc import layout as layout_geo
+    from src.pages.create_geo_loc import register_callbacks as register_callbacks_geo
 except ImportError:
-    layout_geo = html.Div("Page en construction", style={"padding": "2rem"})
+    def layout_geo():
+        """Page de remplacement si la carte n'est pas disponible."""
+        return html.Div("Page en construction", style={"padding": "2rem"})
+    register_callbacks_geo = None
 
 
-def create_app() -> Dash:
+def create_app(filtrage_client: bool = False) -> Dash:
     """
     Crée et configure l'application Dash.
     
+    Args:
+        filtrage_client: Recalcule l'histogramme de la page d'analyse dans
+            le navigateur (cf. simple_page)
+    
     Returns:
         Application Dash configurée
     """
@@ -42,20 +53,25 @@ def create_app() -> Dash:
         )
 
     app.layout = creer_layout
-    register_callbacks(app)
+    register_callbacks(app, filtrage_client=filtrage_client)
+    if register_callbacks_geo is not None:
+        register_callbacks_geo(app)
+    register_callbacks_serie(app)
+    register_routes_api(app)
 
-    # Définition des routes
+    # Définition des routes (layouts construits à chaque affichage)
     routes = {
         "/": lambda: html.Div([
             html.H2("Bienvenue", style={"textAlign": "center"}),
             html.P("Utilisez le menu de navigation pour accéder aux analyses.",
                   style={"textAlign": "center", "color": "#666"}),
         ]),
-        "/simple": lambda: layout_stats,
-        "/complex": lambda: layout_geo,
+        "/simple": layout_stats,
+        "/complex": layout_geo,
+        "/temporel": layout_serie,
         "/about": lambda: html.Div([
             html.H2("À propos", style={"textAlign": "center"}),
-            html.P("Analyse des infractions radar en France - Données 2023",
+            html.P("Analyse des infractions radar en France - Données annuelles",
                   style={"textAlign": "center"}),
             html.P("Source: Data.gouv.fr",
                   style={"textAlign": "center", "fontSize": "0.9rem", "color": "#777"}),
@@ -0,0 +1,252 @@
+"""
+Page d'évolution temporelle des mesures.
+Trace le nombre de mesures et le taux d'infraction au fil d'une année.
+
+Les courbes sont lues dans les séries agrégées de la base de l'année
+(cf. series_temporelles), par la connexion en lecture seule de l'API
+(cf. api_requetes). La granularité est choisie selon la plage affichée :
+la plus fine dont le nombre d'intervalles reste sous POINTS_LUS_MAX.
+Chaque courbe est ensuite réduite à POINTS_MAX points par LTTB, qui garde
+les pics. Zoomer relit la seule plage visible, à une granularité plus
+fine : une semaine se lit à 5 minutes, l'année à l'heure.
+"""
+import sqlite3
+import time
+from datetime import date
+import pandas as pd
+import plotly.graph_objects as go
+from dash import html, dcc, ctx
+from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
+
+from src.pages.api_requetes import (
+    DELAI_REQUETE, DelaiDepasse, executer, pool_annee, secondes_locales,
+)
+from src.utils.partitions import annees_chargees
+from src.utils.series_temporelles import GRANULARITES, choisir_granularite, lttb, table_serie
+
+
+POINTS_MAX = 2000  # Points envoyés au navigateur par courbe
+POINTS_LUS_MAX = 10_000  # Intervalles lus au plus dans la base
+
+LIBELLES_GRANULARITES = {"5min": "5 minutes", "heure": "1 heure", "jour": "1 jour"}
+
+
+def plage_annee(annee: int) -> tuple:
+    """Renvoie (début, fin exclue) d'une année en secondes locales."""
+    return secondes_locales(date(annee, 1, 1)), secondes_locales(date(annee + 1, 1, 1))
+
+
+def en_secondes(texte: str) -> int:
+    """Convertit une date de l'axe Plotly ("AAAA-MM-JJ HH:MM:SS") en secondes locales."""
+    return int((pd.Timestamp(texte) - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1))
+
+
+def plage_visible(relayout: dict):
+    """
+    Extrait la plage de l'axe des temps d'un changement de cadrage.
+
+    Args:
+        relayout: relayoutData du graphique
+
+    Returns:
+        Tuple (début, fin) en secondes locales, "complete" si l'axe est
+        revenu à la plage automatique, None si l'axe des temps n'a pas changé
+    """
+    relayout = relayout or {}
+    if relayout.get("xaxis.autorange"):
+        return "complete"
+    bornes = relayout.get("xaxis.range")
+    if bornes is None and "xaxis.range[0]" in relayout:
+        bornes = [relayout["xaxis.range[0]"], relayout.get("xaxis.range[1]")]
+    if not bornes or None in bornes:
+        return None
+    return en_secondes(bornes[0]), en_secondes(bornes[1])
+
+
+def lire_serie(annee: int, debut: int, fin: int) -> tuple:
+    """
+    Lit la série d'une plage à la granularité adaptée à sa durée.
+
+    Args:
+        annee: Année (base interrogée)
+        debut: Début de la plage, en secondes locales
+        fin: Fin de la plage (exclue), en secondes locales
+
+    Returns:
+        Tuple (granularité, DataFrame debut, mesures_par_heure,
+        taux_infraction)
+    """
+    granularite = choisir_granularite(fin - debut, POINTS_LUS_MAX)
+    pas = GRANULARITES[granularite]
+    with pool_annee(annee).connexion() as conn:
+        colonnes, lignes, _ = executer(
+            conn,
+            f"SELECT debut, nb, nb_infractions FROM {table_serie(granularite)} "
+            "WHERE debut >= ? AND debut < ? ORDER BY debut;",
+            # L'intervalle qui contient le début de la plage est inclus
+            [debut // pas * pas, fin],
+            time.monotonic() + DELAI_REQUETE,
+            POINTS_LUS_MAX + 1,
+        )
+    serie = pd.DataFrame(lignes, columns=colonnes)
+    return granularite, pd.DataFrame({
+        "debut": serie["debut"],
+        "mesures_par_heure": serie["nb"] * 3600 / pas,
+        "taux_infraction": (serie["nb_infractions"] / serie["nb"] * 100).round(2),
+    })
+
+
+def figure_vide(texte: str) -> go.Figure:
+    """Renvoie une figure sans courbe avec un message au centre."""
+    return go.Figure().add_annotation(
+        text=texte,
+        xref="paper", yref="paper", x=0.5, y=0.5,
+        showarrow=False, font=dict(size=16)
+    )
+
+
+def creer_graphique(annee: int, plage: tuple = None) -> go.Figure:
+    """
+    Crée le graphique des mesures et du taux d'infraction.
+
+    Args:
+        annee: Année affichée
+        plage: (début, fin) visibles en secondes locales (None = l'année)
+
+    Returns:
+        Figure Plotly
+    """
+    if annee is None:
+        return figure_vide("Données manquantes")
+    debut_annee, fin_annee = plage_annee(annee)
+    debut, fin = plage or (debut_annee, fin_annee)
+    debut, fin = max(debut, debut_annee), min(fin, fin_annee)
+    try:
+        granularite, serie = lire_serie(annee, debut, max(fin, debut + 1))
+    except (sqlite3.Error, DelaiDepasse) as e:
+        print(f"Attention: série temporelle {annee} indisponible ({e})")
+        return figure_vide("Séries temporelles absentes : relancer python main.py")
+
+    fig = go.Figure()
+    for colonne, nom, couleur, axe in [
+        ("mesures_par_heure", "Mesures par heure", "#4361ee", "y"),
+        ("taux_infraction", "Taux d'infraction (%)", "#e63946", "y2"),
+    ]:
+        gardes = lttb(serie["debut"], serie[colonne], POINTS_MAX)
+        fig.add_trace(go.Scattergl(
+            x=pd.to_datetime(serie["debut"].to_numpy()[gardes], unit="s"),
+            y=serie[colonne].to_numpy()[gardes],
+            name=nom,
+            yaxis=axe,
+            mode="lines",
+            line=dict(color=couleur, width=1.5),
+        ))
+
+    fig.update_layout(
+        title=f"Mesures et taux d'infraction - {annee} (intervalles de "
+              f"{LIBELLES_GRANULARITES[granularite]})",
+        title_x=0.5,
+        title_font=dict(size=20),
+        font=dict(size=12),
+        plot_bgcolor="rgba(248, 250, 255, 1)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        hovermode="x unified",
+        legend=dict(orientation="h", x=0.5, xanchor="center", y=-0.15),
+        xaxis=dict(showgrid=False),
+        yaxis=dict(title="Mesures par heure", gridcolor="rgba(200, 210, 230, 0.6)",
+                   rangemode="tozero"),
+        yaxis2=dict(title="Taux d'infraction (%)", overlaying="y", side="right",
+                    showgrid=False, rangemode="tozero"),
+        margin=dict(l=60, r=60, t=80, b=60),
+        # Garde le zoom de l'utilisateur quand les courbes sont relues
+        uirevision=annee,
+    )
+    return fig
+
+
+def layout() -> html.Div:
+    """
+    Construit la page pour les années chargées au moment de l'affichage.
+
+    Returns:
+        Layout de la page
+    """
+    annees = annees_chargees()
+    return html.Div([
+        html.H2(
+            "Évolution des mesures au fil de l'année",
+            style={
+                "textAlign": "center",
+                "marginBottom": "0.5rem",
+                "marginTop": "0",
+                "fontWeight": "600",
+                "fontSize": "2rem"
+            }
+        ),
+        html.H3(
+            "Nombre de mesures et taux d'infraction ; zoomer pour affiner le pas",
+            style={
+                "textAlign": "center",
+                "color": "#444",
+                "fontSize": "1.3rem",
+                "marginBottom": "1.5rem",
+                "fontWeight": "500",
+                "letterSpacing": "0.3px"
+            }
+        ),
+        html.Div([
+            html.Label("Année", style={"fontWeight": "600", "marginRight": "0.75rem"}),
+            dcc.Dropdown(
+                id="serie-annee",
+                options=[{"label": str(annee), "value": annee}
+                         for annee in annees],
+                value=annees[-1] if annees else None,
+                clearable=False,
+                style={"width": "120px", "fontSize": "0.9rem"},
+            ),
+        ], style={"display": "flex", "justifyContent": "center",
+                  "alignItems": "center", "marginBottom": "1rem"}),
+        dcc.Graph(
+            id="serie-graphique",
+            style={"height": "70vh", "width": "100%"},
+            config={
+                'displayModeBar': True,
+                'displaylogo': False,
+                'modeBarButtonsToRemove': ['select2d', 'lasso2d'],
+            }
+        ),
+    ], style={"padding": "0.5rem 1rem", "maxWidth": "100%", "margin": "0 auto"})
+
+
+def register_callbacks(app):
+    """
+    Enregistre les callbacks de la page.
+
+    Args:
+        app: Application Dash
+    """
+    @app.callback(
+        Output("serie-graphique", "figure"),
+        Input("serie-annee", "value"),
+        Input("serie-graphique", "relayoutData"),
+    )
+    def mettre_a_jour_serie(annee, relayout):
+        """
+        Relit les courbes pour l'année sélectionnée ou la plage zoomée.
+
+        Args:
+            annee: Année sélectionnée
+            relayout: Dernier changement de cadrage du graphique
+
+        Returns:
+            Figure Plotly
+        """
+        if ctx.triggered_id != "serie-graphique":
+            # Nouvelle année : toute l'année, quel que soit l'ancien zoom
+            return creer_graphique(annee)
+        plage = plage_visible(relayout)
+        if plage is None:
+            # Changement sans rapport avec l'axe des temps (axe y, légende...)
+            raise PreventUpdate
+        return creer_graphique(annee, None if plage == "complete" else plage)
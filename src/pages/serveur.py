@@ -0,0 +1,254 @@
+"""
+Service du dashboard en production.
+
+Le serveur de développement de Flask (app.run) tourne dans un seul
+processus. En production, l'application est servie par gunicorn :
+plusieurs processus (workers), chacun avec plusieurs threads. Les données
+des pages sont lues dans le processus maître avant la création des
+workers (preload) : ils les partagent en copie sur écriture au lieu de
+les relire chacun.
+
+Si flask-compress est installé, les réponses (callbacks, scripts, contours
+de la carte) sont compressées en brotli ou gzip selon le navigateur. Les
+fichiers statiques versionnés (empreinte ou ?m= dans l'URL) sont gardés en
+cache par le navigateur pendant un an. gunicorn et flask-compress sont
+optionnels : sans eux, le dashboard est servi par le serveur de
+développement, sans compression.
+
+Avec un serveur WSGI externe, utiliser wsgi.py :
+
+    gunicorn --preload --workers 4 --threads 4 --bind 0.0.0.0:8050 wsgi:server
+"""
+import gc
+import os
+from flask import request
+
+from src.pages.home import create_app
+
+
+BIND_DEFAUT = "127.0.0.1:8050"
+THREADS_DEFAUT = 4
+DUREE_CACHE_STATIQUE = 365 * 24 * 3600  # Secondes ; l'URL change avec le fichier
+TYPES_COMPRESSES = [
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+]
+
+
+def workers_defaut() -> int:
+    """Nombre de workers conseillé par gunicorn : 2 × cœurs + 1."""
+    return 2 * (os.cpu_count() or 1) + 1
+
+
+def lire_adresse(bind: str) -> tuple:
+    """
+    Découpe une adresse d'écoute hote:port.
+
+    Args:
+        bind: Adresse, par exemple "0.0.0.0:8050"
+
+    Returns:
+        Tuple (hôte, port)
+    """
+    hote, _, port = bind.rpartition(":")
+    return hote or "127.0.0.1", int(port)
+
+
+def precharger_donnees() -> int:
+    """
+    Lit les données de toutes les pages, pour toutes les années.
+
+    Les séries temporelles de chaque année sont lues une fois par le pool
+    de connexions, dont les connexions sont ensuite fermées : les workers
+    ouvrent les leurs après le fork.
+
+    Returns:
+        Nombre de fichiers de données lus
+    """
+    from src.pages import serie_temporelle, simple_page
+    from src.pages.api_requetes import fermer_pools
+    from src.utils.partitions import annees_chargees
+
+    nb_fichiers = 0
+    for annee in simple_page.annees_disponibles():
+        simple_page.agregation(annee)
+        nb_fichiers += 1
+
+    for annee in annees_chargees():
+        serie_temporelle.creer_graphique(annee)
+        nb_fichiers += 1
+    fermer_pools()
+
+    try:
+        from src.pages import create_geo_loc
+    except ImportError:
+        return nb_fichiers
+    for annee in create_geo_loc.annees_disponibles():
+        create_geo_loc.charger_departements(annee)
+        nb_fichiers += 1
+    # Contours simplifiés (construits par le pipeline) ou GeoJSON complet
+    if create_geo_loc.contours() is not create_geo_loc.CONTOURS_ABSENTS:
+        nb_fichiers += 1
+    return nb_fichiers
+
+
+def activer_compression(app) -> bool:
+    """
+    Compresse les réponses de l'application si flask-compress est installé.
+
+    Args:
+        app: Application Dash
+
+    Returns:
+        True si la compression est active
+    """
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        print("Attention: flask-compress non installé, réponses non compressées")
+        return False
+
+    app.server.config["COMPRESS_MIMETYPES"] = TYPES_COMPRESSES
+    app.server.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    Compress(app.server)
+    return True
+
+
+def activer_cache_statique(app, compression: bool = False) -> None:
+    """
+    Ajoute les en-têtes de cache des fichiers statiques versionnés.
+
+    À enregistrer après activer_compression : Flask exécute les fonctions
+    after_request dans l'ordre inverse, celle-ci passe donc avant la
+    compression.
+
+    Args:
+        app: Application Dash
+        compression: La compression est active (les contours de la carte,
+            servis directement depuis le disque, sont alors compressés aussi)
+    """
+    prefixe = app.config.requests_pathname_prefix
+    composants = f"{prefixe}_dash-component-suites/"
+    assets = f"{prefixe}{app.config.assets_url_path.strip('/')}/"
+    try:
+        from src.pages.create_geo_loc import URL_CONTOURS
+    except ImportError:
+        URL_CONTOURS = None
+
+    @app.server.after_request
+    def en_tetes_cache(reponse):
+        """Cache d'un an pour les fichiers dont l'URL change avec le contenu."""
+        chemin = request.path
+        # Dash ne donne un max-age qu'aux composants dont l'URL a une empreinte
+        versionne = (
+            (chemin.startswith(composants) and reponse.cache_control.max_age)
+            or (chemin.startswith(assets) and "m" in request.args)
+        )
+        if reponse.status_code == 200 and versionne:
+            reponse.cache_control.max_age = DUREE_CACHE_STATIQUE
+            reponse.cache_control.public = True
+            reponse.cache_control.immutable = True
+
+        # flask-compress ignore les fichiers envoyés tels quels
+        if compression and URL_CONTOURS and chemin.startswith(URL_CONTOURS):
+            reponse.direct_passthrough = False
+        return reponse
+
+
+def creer_application(filtrage_client: bool = False):
+    """
+    Crée l'application configurée pour la production, données chargées.
+
+    Args:
+        filtrage_client: Cf. home.create_app
+
+    Returns:
+        Application Dash
+    """
+    app = create_app(filtrage_client=filtrage_client)
+    compression = activer_compression(app)
+    activer_cache_statique(app, compression=compression)
+    print(f"{precharger_donnees()} fichier(s) de données préchargé(s)")
+    return app
+
+
+def options_gunicorn(bind: str = BIND_DEFAUT, workers: int = None,
+                     threads: int = THREADS_DEFAUT) -> dict:
+    """
+    Renvoie la configuration gunicorn du dashboard.
+
+    Args:
+        bind: Adresse d'écoute hote:port
+        workers: Nombre de processus (None = 2 × cœurs + 1)
+        threads: Threads par processus
+
+    Returns:
+        Dictionnaire des réglages gunicorn
+    """
+    return {
+        "bind": bind,
+        "workers": workers or workers_defaut(),
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+    }
+
+
+def creer_application_gunicorn(app, options: dict):
+    """
+    Crée l'application gunicorn qui sert une application Dash déjà créée.
+
+    Args:
+        app: Application Dash
+        options: Réglages gunicorn (cf. options_gunicorn)
+
+    Returns:
+        Application gunicorn (à lancer par run())
+
+    Raises:
+        ImportError: gunicorn n'est pas installé
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class ApplicationGunicorn(BaseApplication):
+        """Application gunicorn qui sert l'application déjà créée."""
+
+        def load_config(self):
+            for nom, valeur in options.items():
+                self.cfg.set(nom, valeur)
+
+        def load(self):
+            return app.server
+
+    return ApplicationGunicorn()
+
+
+def servir(app, bind: str = BIND_DEFAUT, workers: int = None,
+           threads: int = THREADS_DEFAUT) -> None:
+    """
+    Sert l'application avec gunicorn (serveur de développement à défaut).
+
+    Args:
+        app: Application Dash (cf. creer_application)
+        bind: Adresse d'écoute hote:port
+        workers: Nombre de processus (None = 2 × cœurs + 1)
+        threads: Threads par processus
+    """
+    options = options_gunicorn(bind, workers, threads)
+    try:
+        application = creer_application_gunicorn(app, options)
+    except ImportError:
+        hote, port = lire_adresse(bind)
+        print("Attention: gunicorn non installé, serveur de développement "
+              "(un seul processus)")
+        app.run(debug=False, host=hote, port=port, threaded=True)
+        return
+
+    # Les objets déjà chargés ne sont plus parcourus par le ramasse-miettes :
+    # leurs pages mémoire restent partagées avec les workers
+    gc.freeze()
+    print(f"{options['workers']} worker(s) × {threads} thread(s) sur {bind}")
+    application.run()
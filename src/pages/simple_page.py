@@ -1,18 +1,39 @@
 """
 Page d'analyse statistique des excès de vitesse.
-Affiche un histogramme interactif avec filtres par période et limitation.
+Affiche un histogramme interactif avec filtres par année, période et limitation.
+
+Chaque année a son propre fichier d'agrégation : seul celui de l'année
+sélectionnée est lu, à la première demande, puis relu s'il change
+(cf. donnees.py). La liste des années est relue à chaque affichage.
+
+À la lecture d'une année, la distribution de chaque combinaison
+(période, limitation) est précalculée ; les figures déjà sérialisées sont
+gardées dans un cache borné dont la clé contient la version des données.
+Changer de filtre revient alors à une recherche dans un dictionnaire.
+
+En mode filtrage client (register_callbacks(app, filtrage_client=True)),
+l'agrégation de l'année (quelques dizaines de lignes) est envoyée une seule
+fois dans un dcc.Store, avec la figure vide déjà mise en forme ; les
+pourcentages et l'histogramme sont recalculés dans le navigateur par un
+callback clientside, sans aller-retour vers le serveur. Le mode serveur
+reste le mode par défaut.
 """
+import json
+import numpy as np
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc
 from dash.dependencies import Input, Output
 from pathlib import Path
 
+from src.pages.donnees import CacheLRU, annees_fichiers, jeu_donnees
 
-CHEMIN_AGG = Path("data/cleaned/vitesses_agg_2023.csv")
 
-# Chargement données
-donnees = pd.read_csv(CHEMIN_AGG)
+REPERTOIRE_AGG = Path("data/cleaned")
+PREFIXE_AGG = "vitesses_agg_"
+COLONNES_AGG = ["periode", "limitation", "classe_depassement", "count"]
+PERIODES = ["toutes", "jour", "nuit"]
+TAILLE_CACHE_FIGURES = 256  # Figures sérialisées gardées en mémoire
 
 ORDRE_CLASSES = [
     "≤ 0 km/h (respect)",
@@ -22,170 +43,428 @@ ORDRE_CLASSES = [
     "> 30 km/h",
 ]
 
-LIMITATIONS_DISPONIBLES = sorted(donnees["limitation"].dropna().unique())
+cache_figures = CacheLRU(TAILLE_CACHE_FIGURES)
 
+# Équivalent navigateur de figure_histogramme, à partir de donnees_client
+HISTOGRAMME_CLIENT = r"""
+function(donnees, periode, limitation) {
+    if (!donnees) {
+        return window.dash_clientside.no_update;
+    }
+    const lignes = donnees.lignes;
+    const rangs = {};
+    donnees.classes.forEach((classe, rang) => { rangs[classe] = rang; });
+    const comptages = donnees.classes.map(() => 0);
+    const parPeriode = periode === "jour" || periode === "nuit";
+    const parLimitation = limitation !== null && limitation !== undefined;
 
-layout = html.Div([
-    html.Div([
-        html.H2(
-            "Analyse des excès de vitesse selon les limitations",
-            style={
-                "textAlign": "center",
-                "marginBottom": "0.5rem",
-                "fontSize": "2rem",
-                "fontWeight": "600"
-            },
-        ),
-        html.H3(
-            "Distribution des dépassements de vitesse en fonction de la période (jour / nuit) et de la limitation",
-            style={
-                "textAlign": "center",
-                "color": "#444",
-                "fontSize": "1.3rem",
-                "marginBottom": "1.5rem",
-                "fontWeight": "500",
-                "letterSpacing": "0.3px"
-            },
-        ),
+    for (let i = 0; i < lignes.count.length; i++) {
+        if (parPeriode && lignes.periode[i] !== periode) continue;
+        if (parLimitation && lignes.limitation[i] !== limitation) continue;
+        const rang = rangs[lignes.classe_depassement[i]];
+        if (rang !== undefined) comptages[rang] += lignes.count[i];
+    }
+
+    const total = comptages.reduce((somme, n) => somme + n, 0);
+    const figure = JSON.parse(JSON.stringify(donnees.figure));
+    figure.data[0].y = comptages.map(
+        n => total > 0 ? Math.round(n / total * 10000) / 100 : 0
+    );
+    const mesures = String(total).replace(/\B(?=(\d{3})+(?!\d))/g, " ");
+    let titre = `Distribution des dépassements (${mesures} mesures)`;
+    if (donnees.annee !== null) {
+        titre = `${titre} - ${donnees.annee}`;
+    }
+    figure.layout.title.text = titre;
+    return figure;
+}
+"""
+
+
+def annees_disponibles() -> list:
+    """Liste les années dont le fichier d'agrégation existe."""
+    return annees_fichiers(REPERTOIRE_AGG, PREFIXE_AGG)
+
+
+def calculer_distributions(df: pd.DataFrame) -> dict:
+    """
+    Précalcule les comptages par classe de chaque combinaison de filtres.
+    
+    Args:
+        df: Agrégation periode, limitation, classe_depassement, count
+        
+    Returns:
+        Dictionnaire (periode, limitation) → Series des comptages dans
+        l'ordre ORDRE_CLASSES ; limitation None = toutes les limitations
+    """
+    # dropna=False : les mesures sans limitation comptent dans « toutes »
+    comptes = df.groupby(
+        ["periode", "limitation", "classe_depassement"], dropna=False
+    )["count"].sum()
+    periodes = comptes.index.get_level_values("periode")
+    limitations = comptes.index.get_level_values("limitation")
+
+    distributions = {}
+    for periode in PERIODES:
+        if periode == "toutes":
+            masque_periode = np.ones(len(comptes), dtype=bool)
+        else:
+            masque_periode = periodes == periode
+        for limitation in [None, *sorted(limitations.dropna().unique())]:
+            masque = masque_periode
+            if limitation is not None:
+                masque = masque & (limitations == limitation)
+            distributions[(periode, limitation)] = (
+                comptes[masque]
+                .groupby(level="classe_depassement")
+                .sum()
+                .reindex(ORDRE_CLASSES, fill_value=0)
+            )
+    return distributions
+
+
+def lire_agregation(chemin: Path) -> dict:
+    """
+    Lit l'agrégation d'une année et précalcule ses distributions.
+    
+    Args:
+        chemin: Fichier vitesses_agg_AAAA.csv
+        
+    Returns:
+        Dictionnaire {"donnees": DataFrame, "distributions": cf.
+        calculer_distributions}
+    """
+    df = pd.read_csv(chemin)
+    return {"donnees": df, "distributions": calculer_distributions(df)}
+
+
+AGREGATION_VIDE = {
+    "donnees": pd.DataFrame(columns=COLONNES_AGG),
+    "distributions": {},
+}
+
+
+def agregation(annee: int) -> tuple:
+    """
+    Renvoie l'agrégation à jour d'une année avec sa version.
+    
+    Args:
+        annee: Année demandée (None = aucune)
         
+    Returns:
+        Tuple (version des données, cf. lire_agregation) ; agrégation vide
+        si le fichier n'existe pas
+    """
+    if annee is None:
+        return None, AGREGATION_VIDE
+    return jeu_donnees(REPERTOIRE_AGG / f"{PREFIXE_AGG}{annee}.csv", lire_agregation,
+                       defaut=AGREGATION_VIDE).lire_versionne()
+
+
+def charger_donnees(annee: int) -> pd.DataFrame:
+    """
+    Renvoie l'agrégation à jour d'une année (à ne pas modifier).
+    
+    Args:
+        annee: Année demandée
+        
+    Returns:
+        DataFrame periode, limitation, classe_depassement, count (vide si
+        le fichier n'existe pas)
+    """
+    return agregation(annee)[1]["donnees"]
+
+
+def options_limitations(annee: int) -> list:
+    """Options du filtre de limitation pour une année."""
+    if annee is None:
+        return []
+    limitations = sorted(charger_donnees(annee)["limitation"].dropna().unique())
+    return [{"label": f"{int(lim)} km/h", "value": lim} for lim in limitations]
+
+
+def creer_histogramme(comptages: pd.Series, annee: int = None) -> dict:
+    """
+    Construit la figure de la distribution des dépassements.
+    
+    Args:
+        comptages: Comptages par classe, dans l'ordre ORDRE_CLASSES
+        annee: Année affichée dans le titre
+        
+    Returns:
+        Figure sérialisée (dictionnaire JSON), prête à être renvoyée par
+        un callback
+    """
+    total = comptages.sum()
+    pourcentages = (comptages / total * 100).round(2) if total > 0 else [0] * len(ORDRE_CLASSES)
+    
+    df_graphique = pd.DataFrame({
+        "classe": ORDRE_CLASSES, 
+        "taux": pourcentages
+    })
+    
+    # Création du graphique
+    titre = f"Distribution des dépassements ({int(total):,} mesures)".replace(",", " ")
+    if annee is not None:
+        titre = f"{titre} - {annee}"
+    
+    fig = px.bar(
+        df_graphique,
+        x="classe",
+        y="taux",
+        labels={"classe": "Niveau de dépassement", "taux": "Pourcentage (%)"},
+        title=titre,
+    )
+    
+    fig.update_traces(
+        marker_color="#4361ee",
+        marker_line_color="#27408b",
+        marker_line_width=1.5,
+        hovertemplate="Niveau : %{x}<br>Pourcentage : %{y:.1f}%<extra></extra>",
+    )
+    
+    fig.update_layout(
+        title_x=0.5,
+        title_font=dict(size=22),
+        xaxis_title_font=dict(size=16),
+        yaxis_title_font=dict(size=16),
+        font=dict(size=12),
+        bargap=0.25,
+        plot_bgcolor="rgba(248, 250, 255, 1)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(showgrid=False, tickangle=0),
+        yaxis=dict(gridcolor="rgba(200, 210, 230, 0.6)", zeroline=False),
+        margin=dict(l=60, r=40, t=80, b=60),
+    )
+    
+    fig.update_yaxes(ticksuffix=" %")
+    
+    # Sérialisée une fois : le cache renvoie ensuite un JSON prêt à l'envoi
+    return json.loads(fig.to_json())
+
+
+def figure_histogramme(annee: int, periode: str, limitation) -> dict:
+    """
+    Renvoie la figure d'une combinaison de filtres, depuis le cache.
+    
+    Args:
+        annee: Année sélectionnée (None = aucune)
+        periode: Période sélectionnée (toutes/jour/nuit)
+        limitation: Limitation de vitesse sélectionnée (None = toutes)
+        
+    Returns:
+        Figure sérialisée (cf. creer_histogramme)
+    """
+    if periode not in ["jour", "nuit"]:
+        periode = "toutes"
+    version, donnees = agregation(annee)
+    
+    def construire():
+        comptages = donnees["distributions"].get((periode, limitation))
+        if comptages is None:
+            # Limitation absente de l'année : distribution vide
+            comptages = pd.Series(0, index=ORDRE_CLASSES)
+        return creer_histogramme(comptages, annee)
+    
+    return cache_figures.obtenir((annee, periode, limitation, version), construire)
+
+
+def donnees_client(annee: int) -> dict:
+    """
+    Prépare l'agrégation d'une année pour le filtrage dans le navigateur.
+    
+    Args:
+        annee: Année sélectionnée (None = aucune)
+        
+    Returns:
+        Dictionnaire JSON : année, classes dans l'ordre ORDRE_CLASSES,
+        colonnes de l'agrégation (NaN → None) et figure vide mise en forme
+    """
+    version, donnees = agregation(annee)
+    
+    def construire():
+        df = donnees["donnees"]
+        return {
+            "annee": annee,
+            "classes": ORDRE_CLASSES,
+            "lignes": {
+                colonne: df[colonne].astype(object).where(df[colonne].notna(), None).tolist()
+                for colonne in COLONNES_AGG
+            },
+            "figure": creer_histogramme(pd.Series(0, index=ORDRE_CLASSES), annee),
+        }
+    
+    return cache_figures.obtenir(("client", annee, version), construire)
+
+
+def layout() -> html.Div:
+    """
+    Construit la page pour les années disponibles au moment de l'affichage.
+    
+    Returns:
+        Layout de la page
+    """
+    annees = annees_disponibles()
+    annee_defaut = annees[-1] if annees else None
+    return html.Div([
         html.Div([
-            # Filtres
+            html.H2(
+                "Analyse des excès de vitesse selon les limitations",
+                style={
+                    "textAlign": "center",
+                    "marginBottom": "0.5rem",
+                    "fontSize": "2rem",
+                    "fontWeight": "600"
+                },
+            ),
+            html.H3(
+                "Distribution des dépassements de vitesse en fonction de la période (jour / nuit) et de la limitation",
+                style={
+                    "textAlign": "center",
+                    "color": "#444",
+                    "fontSize": "1.3rem",
+                    "marginBottom": "1.5rem",
+                    "fontWeight": "500",
+                    "letterSpacing": "0.3px"
+                },
+            ),
+        
             html.Div([
+                # Filtres
                 html.Div([
-                    html.Label("Période", style={"fontWeight": "600", "marginBottom": "0.25rem"}),
-                    dcc.RadioItems(
-                        id="filtre-periode",
-                        options=[
-                            {"label": "Toutes", "value": "toutes"},
-                            {"label": "Jour", "value": "jour"},
-                            {"label": "Nuit", "value": "nuit"},
-                        ],
-                        value="toutes",
-                        inline=True,
-                        style={"fontSize": "0.9rem"},
-                    ),
-                ], style={"flex": "1", "minWidth": "180px"}),
+                    html.Div([
+                        html.Label("Année", style={"fontWeight": "600", "marginBottom": "0.25rem"}),
+                        dcc.Dropdown(
+                            id="filtre-annee",
+                            options=[{"label": str(annee), "value": annee}
+                                     for annee in annees],
+                            value=annee_defaut,
+                            clearable=False,
+                            style={"width": "120px", "fontSize": "0.9rem"},
+                        ),
+                    ], style={"flex": "0", "minWidth": "120px"}),
                 
-                html.Div([
-                    html.Label("Limitation de vitesse", 
-                             style={"fontWeight": "600", "marginBottom": "0.25rem"}),
-                    dcc.Dropdown(
-                        id="filtre-limitation",
-                        options=[
-                            {"label": f"{int(lim)} km/h", "value": lim}
-                            for lim in LIMITATIONS_DISPONIBLES
-                        ],
-                        value=None,
-                        placeholder="Toutes les limitations",
-                        clearable=True,
-                        style={"width": "220px", "fontSize": "0.9rem"},
-                    ),
-                ], style={"flex": "1", "minWidth": "220px"}),
-            ], style={
-                "display": "flex",
-                "flexWrap": "wrap",
-                "gap": "2rem",
-                "marginBottom": "1.5rem",
-                "alignItems": "flex-end",
-            }),
+                    html.Div([
+                        html.Label("Période", style={"fontWeight": "600", "marginBottom": "0.25rem"}),
+                        dcc.RadioItems(
+                            id="filtre-periode",
+                            options=[
+                                {"label": "Toutes", "value": "toutes"},
+                                {"label": "Jour", "value": "jour"},
+                                {"label": "Nuit", "value": "nuit"},
+                            ],
+                            value="toutes",
+                            inline=True,
+                            style={"fontSize": "0.9rem"},
+                        ),
+                    ], style={"flex": "1", "minWidth": "180px"}),
+                
+                    html.Div([
+                        html.Label("Limitation de vitesse", 
+                                 style={"fontWeight": "600", "marginBottom": "0.25rem"}),
+                        dcc.Dropdown(
+                            id="filtre-limitation",
+                            options=options_limitations(annee_defaut),
+                            value=None,
+                            placeholder="Toutes les limitations",
+                            clearable=True,
+                            style={"width": "220px", "fontSize": "0.9rem"},
+                        ),
+                    ], style={"flex": "1", "minWidth": "220px"}),
+                ], style={
+                    "display": "flex",
+                    "flexWrap": "wrap",
+                    "gap": "2rem",
+                    "marginBottom": "1.5rem",
+                    "alignItems": "flex-end",
+                }),
             
-            # Graphique
-            dcc.Graph(id="hist-taux-depassement", config={"displayModeBar": False}),
+                # Graphique (et agrégation de l'année en mode filtrage client)
+                dcc.Graph(id="hist-taux-depassement", config={"displayModeBar": False}),
+                dcc.Store(id="agregation-annee"),
             
+            ], style={
+                "backgroundColor": "white",
+                "borderRadius": "14px",
+                "padding": "1.75rem",
+                "boxShadow": "0 4px 14px rgba(0, 0, 0, 0.08)",
+                "border": "1px solid #dde3f0",
+            }),
         ], style={
-            "backgroundColor": "white",
-            "borderRadius": "14px",
-            "padding": "1.75rem",
-            "boxShadow": "0 4px 14px rgba(0, 0, 0, 0.08)",
-            "border": "1px solid #dde3f0",
-        }),
-    ], style={
-        "maxWidth": "1100px",
-        "margin": "0 auto",
-        "padding": "1.5rem 1.5rem 3rem 1.5rem",
-    })
-])
+            "maxWidth": "1100px",
+            "margin": "0 auto",
+            "padding": "1.5rem 1.5rem 3rem 1.5rem",
+        })
+    ])
 
 
-def register_callbacks(app):
+def register_callbacks(app, filtrage_client: bool = False):
     """
     Enregistre les callbacks de la page.
     
     Args:
         app: Application Dash
+        filtrage_client: Recalcule l'histogramme dans le navigateur au lieu
+            du serveur
     """
+    @app.callback(
+        Output("filtre-limitation", "options"),
+        Input("filtre-annee", "value"),
+    )
+    def mettre_a_jour_limitations(annee):
+        """
+        Propose les limitations présentes dans l'année sélectionnée.
+        
+        Args:
+            annee: Année sélectionnée
+            
+        Returns:
+            Options du filtre de limitation
+        """
+        return options_limitations(annee)
+    
+    if filtrage_client:
+        @app.callback(
+            Output("agregation-annee", "data"),
+            Input("filtre-annee", "value"),
+        )
+        def envoyer_agregation(annee):
+            """
+            Envoie au navigateur l'agrégation de l'année sélectionnée.
+            
+            Args:
+                annee: Année sélectionnée
+                
+            Returns:
+                Données du Store (cf. donnees_client)
+            """
+            return donnees_client(annee)
+        
+        app.clientside_callback(
+            HISTOGRAMME_CLIENT,
+            Output("hist-taux-depassement", "figure"),
+            Input("agregation-annee", "data"),
+            Input("filtre-periode", "value"),
+            Input("filtre-limitation", "value"),
+        )
+        return
+    
     @app.callback(
         Output("hist-taux-depassement", "figure"),
+        Input("filtre-annee", "value"),
         Input("filtre-periode", "value"),
         Input("filtre-limitation", "value"),
     )
-    def mettre_a_jour_graphique(periode, limitation):
+    def mettre_a_jour_graphique(annee, periode, limitation):
         """
         Met à jour le graphique selon les filtres sélectionnés.
         
         Args:
+            annee: Année sélectionnée
             periode: Période sélectionnée (toutes/jour/nuit)
             limitation: Limitation de vitesse sélectionnée
             
         Returns:
-            Figure Plotly mise à jour
+            Figure sérialisée (dictionnaire JSON)
         """
-        df = donnees.copy()
-        
-        # Application des filtres
-        if periode in ["jour", "nuit"]:
-            df = df[df["periode"] == periode]
-        
-        if limitation is not None:
-            df = df[df["limitation"] == limitation]
-        
-        # Calcul des statistiques
-        comptages = (
-            df.groupby("classe_depassement")["count"]
-            .sum()
-            .reindex(ORDRE_CLASSES, fill_value=0)
-        )
-        
-        total = comptages.sum()
-        pourcentages = (comptages / total * 100).round(2) if total > 0 else [0] * len(ORDRE_CLASSES)
-        
-        df_graphique = pd.DataFrame({
-            "classe": ORDRE_CLASSES, 
-            "taux": pourcentages
-        })
-        
-        # Création du graphique
-        titre = f"Distribution des dépassements ({int(total):,} mesures)".replace(",", " ")
-        
-        fig = px.bar(
-            df_graphique,
-            x="classe",
-            y="taux",
-            labels={"classe": "Niveau de dépassement", "taux": "Pourcentage (%)"},
-            title=titre,
-        )
-        
-        fig.update_traces(
-            marker_color="#4361ee",
-            marker_line_color="#27408b",
-            marker_line_width=1.5,
-            hovertemplate="Niveau : %{x}<br>Pourcentage : %{y:.1f}%<extra></extra>",
-        )
-        
-        fig.update_layout(
-            title_x=0.5,
-            title_font=dict(size=22),
-            xaxis_title_font=dict(size=16),
-            yaxis_title_font=dict(size=16),
-            font=dict(size=12),
-            bargap=0.25,
-            plot_bgcolor="rgba(248, 250, 255, 1)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            xaxis=dict(showgrid=False, tickangle=0),
-            yaxis=dict(gridcolor="rgba(200, 210, 230, 0.6)", zeroline=False),
-            margin=dict(l=60, r=40, t=80, b=60),
-        )
-        
-        fig.update_yaxes(ticksuffix=" %")
-        
-        return fig
\ No newline at end of file
+        return figure_histogramme(annee, periode, limitation)
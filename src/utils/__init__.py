@@ -4,31 +4,42 @@ Package utilitaire pour le pipeline de données.
 Il regroupe :
 - Téléchargement des données brutes
 - Nettoyage des CSV
-- Import dans SQLite + ajout de la colonne 'periode'
+- Import dans SQLite (schéma typé, indicateur jour/nuit 'est_nuit')
 - Génération des tables agrégées pour le dashboard
+
+Les modules ne sont importés qu'au premier accès à l'un de leurs noms :
+importer un seul module du package ne charge pas tout le pipeline.
 """
+from importlib import import_module
+
+# Nom exposé → (module, attribut)
+_EXPORTS = {
+    # --- Téléchargement des données ---
+    "download_raw": (".get_data", "main"),
+    # --- Nettoyage des données ---
+    "clean_raw": (".clean_data", "main"),
+    # --- Construction de la base SQLite + indicateur 'est_nuit' ---
+    "load_database": (".load_to_sqlite", "main"),
+    # --- Pipeline fusionné téléchargement → nettoyage → SQLite ---
+    "stream_database": (".pipeline_fusionne", "main"),
+    # --- Construction des fichiers agrégés pour le dashboard ---
+    "build_cache": (".build_dashboard_cache", "main"),
+    "build_geo": (".build_radars_departements", "main"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(nom: str):
+    """Importe à la demande le module qui définit un nom exposé."""
+    if nom not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    module, attribut = _EXPORTS[nom]
+    valeur = getattr(import_module(module, __name__), attribut)
+    globals()[nom] = valeur
+    return valeur
+
 
-# --- Téléchargement des données ---
-from .get_data import main as download_raw
-
-# --- Nettoyage des données ---
-from .clean_data import main as clean_raw
-
-# --- Construction de la base SQLite + colonne 'periode' ---
-from .load_to_sqlite import main as load_database
-
-# --- Construction des fichiers agrégés pour le dashboard ---
-from .build_dashboard_cache import main as build_cache
-from .build_radars_departements import main as build_geo
-
-__all__ = [
-    # Téléchargement
-    "download_raw",
-    # Nettoyage
-    "clean_raw",
-    # Base SQLite
-    "load_database",
-    # Fichiers agrégés
-    "build_cache",
-    "build_geo",
-]
\ No newline at end of file
+def __dir__() -> list:
+    """Liste aussi les noms exposés non encore importés."""
+    return sorted(set(globals()) | set(_EXPORTS))
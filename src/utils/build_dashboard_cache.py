@@ -1,43 +1,40 @@
 """
 Génération du fichier agrégé pour le dashboard.
-Calcule les statistiques par période, limitation et classe de dépassement.
+Calcule les statistiques par période, limitation et classe de dépassement,
+par agrégation du cube de la base (voir cube.py).
 """
 from pathlib import Path
 import sqlite3
 import pandas as pd
 
+from src.utils.cube import (
+    BORNES_DEPASSEMENT, CLASSES_DEPASSEMENT, actualiser_cube, interroger_cube,
+)
+from src.utils.partitions import annees_chargees, chemin_base
 
-CHEMIN_DB = Path("data/database/vitesses.db")
-CHEMIN_SORTIE = Path("data/cleaned/vitesses_agg_2023.csv")
 
-CLASSES_DEPASSEMENT = [
-    "≤ 0 km/h (respect)",
-    "0–10 km/h",
-    "10–20 km/h",
-    "20–30 km/h",
-    "> 30 km/h",
-]
+REPERTOIRE_SORTIE = Path("data/cleaned")
 
 
-def main():
-    """Génère le fichier d'agrégation pour le dashboard."""
-    conn = sqlite3.connect(CHEMIN_DB)
-    
-    requete = """
-        SELECT date, position, vitesse_mesuree, limitation, periode, annee
-        FROM vitesses
-        WHERE annee = 2023
+def agreger(df: pd.DataFrame) -> pd.DataFrame:
     """
+    Compte les mesures par période, limitation et classe de dépassement.
     
-    df = pd.read_sql_query(requete, conn)
-    conn.close()
+    Version pandas, qui sert de référence à agreger_en_base.
+    
+    Args:
+        df: DataFrame avec colonnes periode, vitesse_mesuree, limitation
+        
+    Returns:
+        DataFrame periode, limitation, classe_depassement, count
+    """
+    df = df.copy()
     
     # Calcul du dépassement
-    df["date"] = pd.to_datetime(df["date"])
     df["depassement"] = df["vitesse_mesuree"] - df["limitation"]
     
     # Classification par tranches
-    bornes = [-float("inf"), 0, 10, 20, 30, float("inf")]
+    bornes = [-float("inf"), *BORNES_DEPASSEMENT, float("inf")]
     df["classe_depassement"] = pd.cut(
         df["depassement"],
         bins=bornes,
@@ -47,17 +44,108 @@ def main():
     )
     
     # Agrégation
-    agregation = (
+    return (
         df.groupby(["periode", "limitation", "classe_depassement"], observed=False)
           .size()
           .reset_index(name="count")
     )
+
+
+def completer_classes(comptes: pd.Series) -> pd.DataFrame:
+    """
+    Met en forme des comptes comme la sortie de agreger.
+    
+    Comme groupby(observed=False) : toutes les classes (comptes nuls
+    compris) pour chaque couple (période, limitation) présent, triés.
+    
+    Args:
+        comptes: Série de comptes indexée par periode, limitation,
+            classe_depassement (libellés)
+        
+    Returns:
+        DataFrame periode, limitation, classe_depassement, count
+    """
+    couples = comptes.index.droplevel("classe_depassement").unique().sort_values()
+    toutes = pd.MultiIndex.from_tuples(
+        [(periode, limitation, classe)
+         for periode, limitation in couples
+         for classe in CLASSES_DEPASSEMENT],
+        names=comptes.index.names,
+    )
+    return (comptes.reindex(toutes, fill_value=0)
+                   .astype("int64")
+                   .reset_index(name="count"))
+
+
+def agreger_en_base(conn: sqlite3.Connection, annee: int) -> pd.DataFrame:
+    """
+    Calcule la même agrégation que agreger, à partir du cube de la base.
+    
+    Args:
+        conn: Connexion à la base de l'année (cube à jour)
+        annee: Année à agréger
+        
+    Returns:
+        DataFrame periode, limitation, classe_depassement, count
+    """
+    comptes = interroger_cube(
+        conn, ["periode", "limitation", "classe_depassement"],
+        filtres={"annee": annee, "periode": ["jour", "nuit"]},
+    )
+    comptes = (comptes.astype({"classe_depassement": "str"})
+                      .set_index(["periode", "limitation", "classe_depassement"])["nb"])
+    return completer_classes(comptes)
+
+
+def chemin_agregation(annee: int) -> Path:
+    """Renvoie le chemin du fichier d'agrégation d'une année."""
+    return REPERTOIRE_SORTIE / f"vitesses_agg_{annee}.csv"
+
+
+def agreger_annee(annee: int, incremental: bool = False, nb_workers: int = 1) -> None:
+    """
+    Génère le fichier d'agrégation d'une année depuis sa base.
+    
+    Args:
+        annee: Année à agréger
+        incremental: Complète le cube avec les seules lignes ajoutées depuis
+            la dernière génération au lieu de le reconstruire
+        nb_workers: Processus pour rattacher les nouvelles positions à leur
+            département (0 = un par cœur)
+    """
+    chemin_sortie = chemin_agregation(annee)
+    conn = sqlite3.connect(chemin_base(annee))
+    nouvelles = actualiser_cube(conn, incremental=incremental and chemin_sortie.exists(),
+                                 nb_workers=nb_workers)
+    if incremental and chemin_sortie.exists():
+        if not nouvelles:
+            conn.close()
+            print(f"Agrégation {annee} déjà à jour")
+            return
+        print(f"Agrégation incrémentale: {nouvelles:,} nouvelles mesures")
+    
+    agregation = agreger_en_base(conn, annee)
+    conn.close()
     
     # Sauvegarde
-    CHEMIN_SORTIE.parent.mkdir(parents=True, exist_ok=True)
-    agregation.to_csv(CHEMIN_SORTIE, index=False)
-    print(f"Agrégation: {len(agregation)} lignes")
+    chemin_sortie.parent.mkdir(parents=True, exist_ok=True)
+    agregation.to_csv(chemin_sortie, index=False)
+    print(f"Agrégation {annee}: {len(agregation)} lignes")
+
+
+def main(incremental: bool = False, annees: list = None, nb_workers: int = 1):
+    """
+    Génère le fichier d'agrégation de chaque année chargée.
+    
+    Args:
+        incremental: Complète le cube sans le reconstruire (cf. agreger_annee)
+        annees: Années à agréger (None = toutes les années chargées)
+        nb_workers: Processus pour le rattachement aux départements
+            (0 = un par cœur)
+    """
+    for annee in annees or annees_chargees():
+        agreger_annee(annee, incremental, nb_workers)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
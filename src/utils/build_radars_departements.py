@@ -1,18 +1,31 @@
 """
 Calcul des statistiques d'infractions par département.
-Utilise une jointure spatiale entre les positions GPS et les départements.
+Chaque position GPS est rattachée à son département par la grille de
+recherche de grille_departements.py.
+
+Les statistiques portent sur toutes les infractions : elles sont lues dans
+l'histogramme des dépassements par département que l'actualisation du cube
+tient à jour (chaque position distincte n'y est rattachée qu'une fois à son
+département), et la médiane est calculée exactement depuis l'histogramme.
 """
 from pathlib import Path
 import sqlite3
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
+
+from src.utils.cube import actualiser_cube
+from src.utils.grille_departements import GrilleDepartements
+from src.utils.partitions import annees_chargees, chemin_base
 
 
-CHEMIN_DB = Path("data/database/vitesses.db")
+REPERTOIRE_NETTOYE = Path("data/cleaned")
 CHEMIN_GEOJSON = Path("data/geo/departements.geojson")
-CHEMIN_SORTIE = Path("data/cleaned/infractions_par_dept_agg.csv")
-LIMITE_ECHANTILLON = 200_000
+
+
+def chemin_sortie(annee: int) -> Path:
+    """Renvoie le fichier des statistiques par département d'une année."""
+    return REPERTOIRE_NETTOYE / f"infractions_par_dept_agg_{annee}.csv"
 
 
 def detecter_colonne_code(gdf: gpd.GeoDataFrame) -> str:
@@ -34,75 +47,103 @@ def detecter_colonne_code(gdf: gpd.GeoDataFrame) -> str:
     raise ValueError(f"Colonne code non trouvée. Colonnes: {list(gdf.columns)}")
 
 
-def extraire_infractions(conn: sqlite3.Connection, limite: int = None) -> pd.DataFrame:
+def lire_departements() -> tuple:
     """
-    Extrait les infractions de la base de données.
+    Charge les contours des départements.
     
-    Args:
-        conn: Connexion SQLite
-        limite: Nombre maximum de lignes (None = tout)
-        
     Returns:
-        DataFrame avec position et dépassement
-    """
-    requete = """
-        SELECT position, (vitesse_mesuree - limitation) as depassement
-        FROM vitesses
-        WHERE annee = 2023 AND (vitesse_mesuree - limitation) > 0
+        Tuple (GeoDataFrame en EPSG:4326, nom de la colonne code)
     """
+    if not CHEMIN_GEOJSON.exists():
+        raise FileNotFoundError(f"GeoJSON manquant: {CHEMIN_GEOJSON}")
     
-    if limite:
-        requete += f" LIMIT {limite}"
+    gdf_dept = gpd.read_file(CHEMIN_GEOJSON)
+    col_code = detecter_colonne_code(gdf_dept)
+    return gdf_dept.to_crs("EPSG:4326"), col_code
+
+
+def lire_grille_departements() -> GrilleDepartements:
+    """
+    Charge la grille de recherche des départements.
     
-    return pd.read_sql_query(requete, conn)
+    Returns:
+        Grille lue en cache, ou construite si le GeoJSON a changé
+    """
+    gdf_dept, col_code = lire_departements()
+    return GrilleDepartements.charger(gdf_dept.geometry.values, gdf_dept[col_code],
+                                      CHEMIN_GEOJSON)
 
 
-def convertir_en_geodataframe(df: pd.DataFrame) -> gpd.GeoDataFrame:
+def lire_histogramme(conn: sqlite3.Connection, annee: int) -> pd.DataFrame:
     """
-    Convertit un DataFrame avec colonne 'position' en GeoDataFrame.
+    Lit le nombre d'infractions par département et valeur de dépassement.
     
     Args:
-        df: DataFrame avec colonne position (format "lat lon")
+        conn: Connexion à la base de l'année (cube à jour)
+        annee: Année des mesures
         
     Returns:
-        GeoDataFrame avec géométries Point
+        DataFrame code_dept, depassement, nb (positions hors départements exclues)
     """
-    coords = df["position"].str.split(expand=True, n=1)
-    coords.columns = ["lat", "lon"]
-    coords = coords.apply(pd.to_numeric, errors="coerce")
-    
-    df = pd.concat([df, coords], axis=1)
-    df = df.dropna(subset=["lat", "lon"])
-    
-    geometries = [Point(lon, lat) for lon, lat in zip(df["lon"], df["lat"])]
+    return pd.read_sql_query(
+        """
+        SELECT departement AS code_dept, depassement, nb
+        FROM histogramme_depassements
+        WHERE annee = ? AND departement != ''
+        ORDER BY departement, depassement
+        """,
+        conn, params=(annee,),
+    )
+
+
+def mediane_histogramme(valeurs: np.ndarray, nombres: np.ndarray) -> float:
+    """
+    Calcule la médiane exacte d'une série donnée par son histogramme.
     
-    return gpd.GeoDataFrame(df, geometry=geometries, crs="EPSG:4326")
+    Args:
+        valeurs: Valeurs distinctes, triées
+        nombres: Nombre d'occurrences de chaque valeur
+        
+    Returns:
+        Médiane (moyenne des deux valeurs centrales pour un effectif pair)
+    """
+    cumul = np.cumsum(nombres)
+    total = cumul[-1]
+    basse = valeurs[np.searchsorted(cumul, (total + 1) // 2)]
+    haute = valeurs[np.searchsorted(cumul, total // 2 + 1)]
+    return (basse + haute) / 2
 
 
-def calculer_statistiques(df_joint: pd.DataFrame, col_code: str) -> pd.DataFrame:
+def calculer_statistiques(histogramme: pd.DataFrame) -> pd.DataFrame:
     """
     Calcule les statistiques d'infractions par département.
     
     Args:
-        df_joint: DataFrame après jointure spatiale
-        col_code: Nom de la colonne contenant le code département
+        histogramme: DataFrame code_dept, depassement, nb, trié par
+            département puis dépassement
         
     Returns:
         DataFrame agrégé par département
     """
-    agg = (
-        df_joint.groupby(col_code)
-        .agg({"depassement": ["count", "mean", "median", "max"]})
-        .reset_index()
-    )
-    
-    agg.columns = [
-        "code_dept", 
-        "nb_infractions", 
+    lignes = []
+    for code, groupe in histogramme.groupby("code_dept", sort=False):
+        valeurs = groupe["depassement"].to_numpy()
+        nombres = groupe["nb"].to_numpy()
+        lignes.append({
+            "code_dept": code,
+            "nb_infractions": nombres.sum(),
+            "depassement_moyen": (valeurs * nombres).sum() / nombres.sum(),
+            "depassement_median": mediane_histogramme(valeurs, nombres),
+            "depassement_max": valeurs.max(),
+        })
+    
+    agg = pd.DataFrame(lignes, columns=[
+        "code_dept",
+        "nb_infractions",
         "depassement_moyen",
         "depassement_median",
         "depassement_max"
-    ]
+    ])
     
     agg["depassement_moyen"] = agg["depassement_moyen"].round(2)
     agg["depassement_median"] = agg["depassement_median"].round(2)
@@ -110,44 +151,36 @@ def calculer_statistiques(df_joint: pd.DataFrame, col_code: str) -> pd.DataFrame
     return agg.sort_values("nb_infractions", ascending=False)
 
 
-def main():
-    """Génère le fichier d'agrégation par département."""
-    # Chargement GeoJSON
+def main(annees: list = None, nb_workers: int = 1):
+    """
+    Génère le fichier d'agrégation par département de chaque année.
+    
+    Args:
+        annees: Années à traiter (None = toutes les années chargées)
+        nb_workers: Processus pour le rattachement aux départements
+            (0 = un par cœur)
+    """
     if not CHEMIN_GEOJSON.exists():
         raise FileNotFoundError(f"GeoJSON manquant: {CHEMIN_GEOJSON}")
     
-    gdf_dept = gpd.read_file(CHEMIN_GEOJSON)
-    col_code = detecter_colonne_code(gdf_dept)
-    gdf_dept = gdf_dept.to_crs("EPSG:4326")
-    
-    # Extraction infractions
-    conn = sqlite3.connect(CHEMIN_DB)
-    df_infractions = extraire_infractions(conn, limite=LIMITE_ECHANTILLON)
-    conn.close()
-    
-    print(f"Traitement de {len(df_infractions):,} infractions")
-    
-    # Conversion en GeoDataFrame
-    gdf_infractions = convertir_en_geodataframe(df_infractions)
-    
-    # Jointure spatiale
-    print("Jointure spatiale en cours...")
-    df_joint = gpd.sjoin(
-        gdf_infractions, 
-        gdf_dept[[col_code, "geometry"]], 
-        how="left", 
-        predicate="within"
-    )
-    
-    # Calcul statistiques
-    resultats = calculer_statistiques(df_joint, col_code)
-    
-    # Sauvegarde
-    CHEMIN_SORTIE.parent.mkdir(parents=True, exist_ok=True)
-    resultats.to_csv(CHEMIN_SORTIE, index=False)
-    
-    print(f"Résultats: {len(resultats)} départements")
+    for annee in annees or annees_chargees():
+        # Histogramme à jour (seules les mesures nouvelles sont lues)
+        conn = sqlite3.connect(chemin_base(annee))
+        actualiser_cube(conn, nb_workers=nb_workers)
+        histogramme = lire_histogramme(conn, annee)
+        conn.close()
+        
+        print(f"{annee}: traitement de {histogramme['nb'].sum():,} infractions")
+        
+        # Calcul statistiques
+        resultats = calculer_statistiques(histogramme)
+        
+        # Sauvegarde
+        chemin_sortie(annee).parent.mkdir(parents=True, exist_ok=True)
+        resultats.to_csv(chemin_sortie(annee), index=False)
+        
+        print(f"Résultats {annee}: {len(resultats)} départements")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
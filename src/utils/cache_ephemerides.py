@@ -0,0 +1,182 @@
+"""
+Cache persistant des éphémérides (lever / coucher du soleil).
+
+Les heures calculées sont conservées dans une base SQLite annexe, séparée
+de vitesses.db pour survivre à une reconstruction de la base. Le cache est
+rempli au fil de l'eau, partagé entre les blocs d'un même chargement, entre
+les exécutions et entre les années.
+"""
+from pathlib import Path
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+CHEMIN_CACHE = Path("data/database/ephemerides.db")
+CLES = ["date_only", "lat_round", "lon_round"]
+DELAI_VERROU = 60  # Secondes d'attente si une autre année écrit dans le cache
+
+
+class CacheEphemerides:
+    """
+    Cache à deux niveaux (mémoire puis disque) des éphémérides.
+
+    La clé est (jour, latitude arrondie, longitude arrondie, précision,
+    moteur) ; les heures sont stockées en microsecondes UTC depuis 1970.
+
+    En lecture seule (processus de calcul parallèles), les nouvelles
+    entrées restent en mémoire et sont mises de côté pour que le processus
+    principal, seul écrivain, les enregistre (cf. extraire_en_attente).
+    """
+
+    def __init__(self, fuseau, precision: int, moteur: str,
+                 chemin: Path = None, lecture_seule: bool = False):
+        self.fuseau = fuseau
+        self.precision = precision
+        self.moteur = moteur
+        self.lecture_seule = lecture_seule
+        self.en_attente = []
+        self.chemin = chemin or CHEMIN_CACHE
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.chemin, timeout=DELAI_VERROU)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ephemerides (
+                jour INTEGER NOT NULL,
+                lat_round REAL NOT NULL,
+                lon_round REAL NOT NULL,
+                precision INTEGER NOT NULL,
+                moteur TEXT NOT NULL,
+                lever_us INTEGER,
+                coucher_us INTEGER,
+                PRIMARY KEY (jour, lat_round, lon_round, precision, moteur)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+        self.memoire = pd.DataFrame(
+            {"jour": pd.Series(dtype="int64"),
+             "lat_round": pd.Series(dtype="float64"),
+             "lon_round": pd.Series(dtype="float64"),
+             "lever_us": pd.Series(dtype="float64"),
+             "coucher_us": pd.Series(dtype="float64")}
+        )
+        self.jours_charges = set()
+        self.stats = {"succes": 0, "echecs": 0}
+
+    def charger_jours(self, jours) -> None:
+        """Charge depuis le disque les entrées des jours pas encore en mémoire."""
+        nouveaux = sorted(set(int(j) for j in jours) - self.jours_charges)
+        if not nouveaux:
+            return
+
+        marqueurs = ",".join("?" * len(nouveaux))
+        lus = pd.read_sql_query(
+            f"""
+            SELECT jour, lat_round, lon_round, lever_us, coucher_us
+            FROM ephemerides
+            WHERE precision = ? AND moteur = ? AND jour IN ({marqueurs})
+            """,
+            self.conn,
+            params=[self.precision, self.moteur, *nouveaux],
+            dtype={"jour": "int64", "lat_round": "float64", "lon_round": "float64",
+                   "lever_us": "float64", "coucher_us": "float64"},
+        )
+        if not lus.empty:
+            self.memoire = pd.concat([self.memoire, lus], ignore_index=True)
+        self.jours_charges.update(nouveaux)
+
+    def obtenir(self, cles: pd.DataFrame, calculer) -> pd.DataFrame:
+        """
+        Renvoie les éphémérides des clés, en ne calculant que les absentes.
+
+        Args:
+            cles: DataFrame avec colonnes date_only, lat_round, lon_round (uniques)
+            calculer: Fonction (DataFrame de clés) -> éphémérides, appelée
+                seulement pour les clés absentes du cache
+
+        Returns:
+            DataFrame avec date_only, lat_round, lon_round, sunrise_local
+            et sunset_local
+        """
+        cles = cles[CLES].reset_index(drop=True)
+        jours = (pd.to_datetime(cles["date_only"]).to_numpy()
+                 .astype("datetime64[D]").astype("int64"))
+        recherche = pd.DataFrame({
+            "jour": jours,
+            "lat_round": cles["lat_round"].to_numpy(dtype=float),
+            "lon_round": cles["lon_round"].to_numpy(dtype=float),
+        })
+
+        self.charger_jours(np.unique(jours))
+        trouves = recherche.merge(self.memoire, on=["jour", "lat_round", "lon_round"],
+                                  how="left", indicator=True)
+        absents = (trouves["_merge"] == "left_only").to_numpy()
+
+        self.stats["succes"] += int((~absents).sum())
+        self.stats["echecs"] += int(absents.sum())
+
+        if absents.any():
+            calcules = calculer(cles[absents])
+            nouveaux = pd.DataFrame({
+                "jour": jours[absents],
+                "lat_round": recherche["lat_round"].to_numpy()[absents],
+                "lon_round": recherche["lon_round"].to_numpy()[absents],
+                "lever_us": self.vers_microsecondes(calcules["sunrise_local"]),
+                "coucher_us": self.vers_microsecondes(calcules["sunset_local"]),
+            })
+            self.enregistrer(nouveaux)
+            trouves.loc[absents, "lever_us"] = nouveaux["lever_us"].to_numpy()
+            trouves.loc[absents, "coucher_us"] = nouveaux["coucher_us"].to_numpy()
+
+        resultat = cles.copy()
+        resultat["sunrise_local"] = self.depuis_microsecondes(trouves["lever_us"])
+        resultat["sunset_local"] = self.depuis_microsecondes(trouves["coucher_us"])
+        return resultat
+
+    def enregistrer(self, nouveaux: pd.DataFrame) -> None:
+        """Ajoute de nouvelles entrées en mémoire et sur disque."""
+        self.memoire = pd.concat([self.memoire, nouveaux], ignore_index=True)
+        if self.lecture_seule:
+            self.en_attente.append(nouveaux)
+            return
+        lignes = [
+            (int(j), float(la), float(lo), self.precision, self.moteur,
+             None if pd.isna(l) else int(l), None if pd.isna(c) else int(c))
+            for j, la, lo, l, c in nouveaux.itertuples(index=False, name=None)
+        ]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO ephemerides VALUES (?, ?, ?, ?, ?, ?, ?);",
+            lignes,
+        )
+        self.conn.commit()
+
+    def extraire_en_attente(self) -> pd.DataFrame:
+        """Renvoie (et oublie) les entrées calculées mais pas encore écrites."""
+        if not self.en_attente:
+            return None
+        nouveaux = pd.concat(self.en_attente, ignore_index=True)
+        self.en_attente = []
+        return nouveaux
+
+    def vers_microsecondes(self, instants: pd.Series) -> np.ndarray:
+        """Convertit des instants avec fuseau en microsecondes UTC (NaN si NaT)."""
+        instants = pd.to_datetime(pd.Series(instants), utc=True)
+        valeurs = instants.dt.tz_localize(None).to_numpy().astype("datetime64[us]")
+        microsecondes = valeurs.astype("int64").astype("float64")
+        microsecondes[np.isnat(valeurs)] = np.nan
+        return microsecondes
+
+    def depuis_microsecondes(self, microsecondes: pd.Series) -> pd.Series:
+        """Convertit des microsecondes UTC en instants dans le fuseau du cache."""
+        instants = pd.to_datetime(microsecondes.to_numpy(), unit="us", utc=True)
+        return pd.Series(instants.tz_convert(self.fuseau))
+
+    def taux_succes(self) -> float:
+        """Part des clés servies par le cache depuis sa création."""
+        total = self.stats["succes"] + self.stats["echecs"]
+        return self.stats["succes"] / total if total else 0.0
+
+    def fermer(self) -> None:
+        """Ferme la connexion à la base du cache."""
+        self.conn.close()
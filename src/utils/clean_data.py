@@ -1,64 +1,400 @@
 """
 Module de nettoyage des données brutes.
 Renomme les colonnes et supprime les valeurs manquantes.
+
+Le fichier brut est lu par blocs de taille fixe avec le parseur C de pandas :
+la mémoire consommée reste constante quelle que soit la taille du fichier.
+
+La sortie peut être un CSV (historique) ou un jeu Parquet partitionné par
+mois, aux colonnes typées, lisible par les étapes suivantes avec sélection
+de colonnes et filtres de partition.
 """
 from pathlib import Path
+import io
+import shutil
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.utils.get_data import ANNEES
+
+
+TAILLE_BLOC = 500_000
+
+COLONNES_BRUTES = ["date", "position", "mesure", "limite"]
+# Colonnes NOT NULL de la table vitesses ; date et position peuvent manquer
+# (leurs valeurs sont alors manquantes, comme une valeur illisible)
+COLONNES_OBLIGATOIRES = ["mesure", "limite"]
+TYPES_BRUTS = {
+    "date": "string",
+    "position": "string",
+    "mesure": "string",
+    "limite": "string",
+}
+RENOMMAGE = {
+    "mesure": "vitesse_mesuree",
+    "limite": "limitation",
+}
+
+SCHEMA_PARQUET = pa.schema([
+    ("date", pa.timestamp("s")),
+    ("position", pa.string()),
+    ("lat", pa.float64()),
+    ("lon", pa.float64()),
+    ("vitesse_mesuree", pa.int16()),
+    ("limitation", pa.int16()),
+    ("mois", pa.string()),
+])
+MOIS_INCONNU = "inconnu"  # Partition des mesures sans date lisible
+
 
+def nouvelles_stats() -> dict:
+    """Renvoie des statistiques de nettoyage à zéro."""
+    return {"lignes_lues": 0, "lignes_conservees": 0, "lignes_supprimees": 0,
+            "vitesses_non_entieres": 0}
 
-def nettoyer_fichier(chemin_entree: Path, chemin_sortie: Path) -> None:
+
+def nettoyer_bloc(df: pd.DataFrame, stats: dict = None) -> pd.DataFrame:
     """
-    Nettoie un fichier CSV de données radar.
-    
+    Nettoie un bloc de données brutes.
+
+    Les vitesses sont des entiers (km/h) : une ligne dont la vitesse ou la
+    limitation a une partie décimale est rejetée plutôt que tronquée.
+
     Args:
-        chemin_entree: Chemin du fichier CSV brut
-        chemin_sortie: Chemin du fichier CSV nettoyé
+        df: DataFrame avec les colonnes brutes (date, position, mesure, limite)
+        stats: Statistiques complétées du nombre de vitesses non entières
+
+    Returns:
+        DataFrame renommé, typé et sans valeurs manquantes
+
+    Raises:
+        ValueError: Colonne obligatoire absente
     """
-    df = pd.read_csv(chemin_entree, sep=";", engine="python")
-    
+    manquantes = [col for col in COLONNES_OBLIGATOIRES if col not in df.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes obligatoires absentes: {manquantes}")
+    absentes = [col for col in COLONNES_BRUTES if col not in df.columns]
+
     # Renommage des colonnes pour cohérence
-    df = df.rename(columns={
-        "mesure": "vitesse_mesuree",
-        "limite": "limitation",
-    })
-    
+    df = df.rename(columns=RENOMMAGE)
+
     # Conversion en numérique
     colonnes_numeriques = ["vitesse_mesuree", "limitation"]
     for col in colonnes_numeriques:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
     # Suppression des valeurs manquantes
-    nb_lignes_avant = len(df)
     df = df.dropna()
-    nb_lignes_apres = len(df)
-    
-    print(f"  Lignes supprimées: {nb_lignes_avant - nb_lignes_apres}")
-    
-    # Sauvegarde
-    df.to_csv(chemin_sortie, index=False, sep=";")
 
+    non_entieres = (df[colonnes_numeriques] % 1 != 0).any(axis=1)
+    if stats is not None:
+        stats["vitesses_non_entieres"] += int(non_entieres.sum())
+    df = df[~non_entieres]
+
+    # Type stable d'un bloc à l'autre
+    for col in colonnes_numeriques:
+        df[col] = df[col].astype("int64")
+
+    for col in absentes:
+        df[col] = pd.Series(pd.NA, index=df.index, dtype="string")
+
+    return df
+
+
+def afficher_suppressions(stats: dict) -> None:
+    """Affiche le bilan des lignes supprimées."""
+    print(f"  Lignes supprimées: {stats['lignes_supprimees']}")
+    if stats["vitesses_non_entieres"]:
+        print(f"  dont vitesses non entières: {stats['vitesses_non_entieres']}")
+
+
+class FluxOctets(io.RawIOBase):
+    """Fichier en lecture seule alimenté par un itérateur de morceaux d'octets."""
+
+    def __init__(self, morceaux):
+        self._morceaux = iter(morceaux)
+        self._reste = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, tampon) -> int:
+        while not self._reste:
+            try:
+                self._reste = next(self._morceaux)
+            except StopIteration:
+                return 0
+        n = min(len(tampon), len(self._reste))
+        tampon[:n] = self._reste[:n]
+        self._reste = self._reste[n:]
+        return n
+
+
+def lire_par_blocs(chemin_entree, taille_bloc: int = TAILLE_BLOC):
+    """
+    Lit le CSV brut par blocs avec le parseur C.
+
+    Les colonnes inconnues sont ignorées et les colonnes absentes sont
+    vérifiées par nettoyer_bloc.
+
+    Args:
+        chemin_entree: Chemin du fichier CSV brut, ou fichier texte ouvert
+        taille_bloc: Nombre de lignes par bloc
+
+    Returns:
+        Itérateur de DataFrames bruts
+    """
+    return pd.read_csv(
+        chemin_entree,
+        sep=";",
+        engine="c",
+        usecols=lambda colonne: colonne in COLONNES_BRUTES,
+        dtype=TYPES_BRUTS,
+        chunksize=taille_bloc,
+    )
+
+
+def nettoyer_fichier(chemin_entree: Path, chemin_sortie: Path,
+                     taille_bloc: int = TAILLE_BLOC) -> dict:
+    """
+    Nettoie un fichier CSV de données radar, bloc par bloc.
+
+    Chaque bloc est nettoyé puis ajouté à la fin du fichier de sortie,
+    si bien que seul un bloc est présent en mémoire à la fois.
+
+    Args:
+        chemin_entree: Chemin du fichier CSV brut
+        chemin_sortie: Chemin du fichier CSV nettoyé
+        taille_bloc: Nombre de lignes lues par bloc
+
+    Returns:
+        Statistiques du nettoyage (lignes lues, conservées, supprimées,
+        dont vitesses non entières)
+    """
+    stats = nouvelles_stats()
+
+    # Un fichier partiel issu d'un précédent échec ne doit pas être complété
+    if chemin_sortie.exists():
+        chemin_sortie.unlink()
+
+    for i, bloc in enumerate(lire_par_blocs(chemin_entree, taille_bloc)):
+        bloc_nettoye = nettoyer_bloc(bloc, stats)
+        nb_supprimees = len(bloc) - len(bloc_nettoye)
+
+        stats["lignes_lues"] += len(bloc)
+        stats["lignes_conservees"] += len(bloc_nettoye)
+        stats["lignes_supprimees"] += nb_supprimees
+
+        if nb_supprimees:
+            print(f"  Bloc {i}: {nb_supprimees} lignes supprimées")
+
+        bloc_nettoye.to_csv(
+            chemin_sortie,
+            index=False,
+            sep=";",
+            mode="a",
+            header=(i == 0),
+        )
+
+    afficher_suppressions(stats)
+
+    return stats
+
+
+def nettoyer_flux(morceaux, taille_bloc: int = TAILLE_BLOC, stats: dict = None):
+    """
+    Nettoie un CSV brut reçu sous forme de flux d'octets.
+
+    Le flux n'est jamais écrit sur disque : il est découpé en blocs de
+    lignes par le parseur C puis nettoyé bloc par bloc.
+
+    Args:
+        morceaux: Itérable de morceaux d'octets (ex. corps HTTP)
+        taille_bloc: Nombre de lignes par bloc
+        stats: Statistiques complétées au fil du flux (cf. nettoyer_fichier)
 
-def main():
-    """Nettoie tous les fichiers définis."""
+    Yields:
+        Blocs nettoyés (mêmes colonnes que le CSV nettoyé)
+    """
+    texte = io.TextIOWrapper(io.BufferedReader(FluxOctets(morceaux)),
+                             encoding="utf-8")
+    stats = nouvelles_stats() if stats is None else stats
+
+    for i, bloc in enumerate(lire_par_blocs(texte, taille_bloc)):
+        bloc_nettoye = nettoyer_bloc(bloc, stats)
+        nb_supprimees = len(bloc) - len(bloc_nettoye)
+
+        stats["lignes_lues"] += len(bloc)
+        stats["lignes_conservees"] += len(bloc_nettoye)
+        stats["lignes_supprimees"] += nb_supprimees
+
+        if nb_supprimees:
+            print(f"  Bloc {i}: {nb_supprimees} lignes supprimées")
+
+        yield bloc_nettoye
+
+    afficher_suppressions(stats)
+
+
+def typer_bloc(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit un bloc nettoyé vers les types du jeu Parquet.
+
+    La date devient un timestamp, la position est éclatée en lat/lon
+    flottants et les vitesses passent en entiers courts. Une date ou une
+    position illisible devient une valeur manquante, comme dans la base
+    chargée depuis le CSV nettoyé : les deux chemins gardent les mêmes
+    lignes. Les mesures sans date vont dans la partition MOIS_INCONNU.
+
+    Args:
+        df: Bloc issu de nettoyer_bloc
+
+    Returns:
+        DataFrame conforme à SCHEMA_PARQUET
+    """
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+
+    coords = df["position"].str.split(n=1, expand=True).reindex(columns=[0, 1])
+    df["lat"] = pd.to_numeric(coords[0], errors="coerce")
+    df["lon"] = pd.to_numeric(coords[1], errors="coerce")
+
+    df["mois"] = df["date"].dt.strftime("%Y-%m").fillna(MOIS_INCONNU)
+    df["vitesse_mesuree"] = df["vitesse_mesuree"].astype("int16")
+    df["limitation"] = df["limitation"].astype("int16")
+
+    return df[SCHEMA_PARQUET.names]
+
+
+def nettoyer_fichier_parquet(chemin_entree: Path, repertoire_sortie: Path,
+                             taille_bloc: int = TAILLE_BLOC) -> dict:
+    """
+    Nettoie un fichier CSV de données radar vers un jeu Parquet par mois.
+
+    Args:
+        chemin_entree: Chemin du fichier CSV brut
+        repertoire_sortie: Répertoire racine du jeu Parquet (mois=AAAA-MM/)
+        taille_bloc: Nombre de lignes lues par bloc
+
+    Returns:
+        Statistiques du nettoyage (cf. nettoyer_fichier)
+    """
+    stats = nouvelles_stats()
+
+    if repertoire_sortie.exists():
+        shutil.rmtree(repertoire_sortie)
+
+    for i, bloc in enumerate(lire_par_blocs(chemin_entree, taille_bloc)):
+        bloc_type = typer_bloc(nettoyer_bloc(bloc, stats))
+        nb_supprimees = len(bloc) - len(bloc_type)
+
+        stats["lignes_lues"] += len(bloc)
+        stats["lignes_conservees"] += len(bloc_type)
+        stats["lignes_supprimees"] += nb_supprimees
+
+        if nb_supprimees:
+            print(f"  Bloc {i}: {nb_supprimees} lignes supprimées")
+
+        table = pa.Table.from_pandas(bloc_type, schema=SCHEMA_PARQUET,
+                                     preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            root_path=repertoire_sortie,
+            partition_cols=["mois"],
+            basename_template=f"bloc-{i:05d}-{{i}}.parquet",
+        )
+
+    afficher_suppressions(stats)
+
+    return stats
+
+
+def lire_parquet_par_blocs(repertoire: Path, colonnes: list = None,
+                           mois: list = None, filtre=None,
+                           taille_bloc: int = TAILLE_BLOC):
+    """
+    Lit le jeu Parquet nettoyé par blocs.
+
+    Seules les colonnes demandées sont décodées et seules les partitions
+    des mois demandés sont ouvertes.
+
+    Args:
+        repertoire: Répertoire racine du jeu Parquet
+        colonnes: Colonnes à lire (None = toutes)
+        mois: Liste de mois "AAAA-MM" à lire (None = tous)
+        filtre: Expression pyarrow supplémentaire sur les lignes
+        taille_bloc: Nombre maximal de lignes par bloc
+
+    Yields:
+        DataFrames pandas
+    """
+    jeu = ds.dataset(repertoire, format="parquet", partitioning="hive",
+                     schema=SCHEMA_PARQUET)
+
+    condition = filtre
+    if mois is not None:
+        filtre_mois = ds.field("mois").isin(list(mois))
+        condition = filtre_mois if condition is None else condition & filtre_mois
+
+    for lot in jeu.to_batches(columns=colonnes, filter=condition,
+                              batch_size=taille_bloc):
+        if lot.num_rows:
+            yield lot.to_pandas()
+
+
+def lire_parquet(repertoire: Path, colonnes: list = None,
+                 mois: list = None, filtre=None) -> pd.DataFrame:
+    """
+    Lit le jeu Parquet nettoyé en un seul DataFrame.
+
+    Args:
+        repertoire: Répertoire racine du jeu Parquet
+        colonnes: Colonnes à lire (None = toutes)
+        mois: Liste de mois "AAAA-MM" à lire (None = tous)
+        filtre: Expression pyarrow supplémentaire sur les lignes
+
+    Returns:
+        DataFrame pandas
+    """
+    blocs = list(lire_parquet_par_blocs(repertoire, colonnes, mois, filtre))
+    if not blocs:
+        colonnes = colonnes or SCHEMA_PARQUET.names
+        return SCHEMA_PARQUET.empty_table().select(colonnes).to_pandas()
+    return pd.concat(blocs, ignore_index=True)
+
+
+def main(parquet: bool = False, annees: list = None):
+    """
+    Nettoie les fichiers bruts de chaque année.
+
+    Args:
+        parquet: Écrit un jeu Parquet partitionné par mois au lieu du CSV
+        annees: Années à nettoyer (None = toutes celles de RESSOURCES)
+    """
     rep_brut = Path("data/raw")
     rep_nettoye = Path("data/cleaned")
     rep_nettoye.mkdir(parents=True, exist_ok=True)
-    
-    fichiers = {
-        "vitesse_2023.csv": "vitesse_2023_cleaned.csv"
-    }
-    
-    for nom_brut, nom_nettoye in fichiers.items():
+
+    for annee in annees or ANNEES:
+        nom_brut = f"vitesse_{annee}.csv"
+        nom_nettoye = f"vitesse_{annee}_cleaned.csv"
+        if parquet:
+            nom_nettoye = f"vitesse_{annee}_parquet"
+
         chemin_entree = rep_brut / nom_brut
         chemin_sortie = rep_nettoye / nom_nettoye
-        
+
         if not chemin_entree.exists():
             print(f"Fichier manquant: {nom_brut}")
             continue
-        
-        nettoyer_fichier(chemin_entree, chemin_sortie)
+
+        if parquet:
+            nettoyer_fichier_parquet(chemin_entree, chemin_sortie)
+        else:
+            nettoyer_fichier(chemin_entree, chemin_sortie)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,288 @@
+"""
+Cube d'agrégats matérialisé de la table vitesses.
+
+La table cube compte les mesures, et somme leurs dépassements, pour chaque
+combinaison des dimensions de DIMENSIONS_CUBE : année, période, limitation,
+classe de dépassement, mois, jour de la semaine, heure et département.
+Des cuboïdes plus petits (CUBOIDES) matérialisent les agrégations les plus
+courantes, sans le département ou sans l'heure. Tous sont alimentés par un
+seul parcours de vitesses, puis complétés avec les seules lignes ajoutées
+depuis (filigrane sur le rowid). Toute ventilation selon un sous-ensemble
+de ces dimensions devient un GROUP BY sur le plus petit cuboïde qui la
+couvre, au lieu d'un parcours des mesures : voir interroger_cube.
+
+La table histogramme_depassements, tenue à jour par la même actualisation,
+compte les infractions par département et valeur exacte du dépassement :
+elle donne des statistiques exactes (médiane comprise) sur toute la
+population sans relire les mesures.
+
+Valeurs inconnues : '' pour la période ou le département, -1 pour le
+mois, le jour et l'heure d'une mesure sans date.
+"""
+import sqlite3
+import pandas as pd
+
+from src.utils.positions import rattacher_departements
+from src.utils.schema import actualiser_agregat, agreger_delta, requete_cumul
+
+
+NOM_FILIGRANE = "cube"
+
+CLASSES_DEPASSEMENT = [
+    "≤ 0 km/h (respect)",
+    "0–10 km/h",
+    "10–20 km/h",
+    "20–30 km/h",
+    "> 30 km/h",
+]
+BORNES_DEPASSEMENT = [0, 10, 20, 30]  # Intervalles fermés à droite
+
+DIMENSIONS_CUBE = [
+    "annee", "periode", "limitation", "classe_depassement",
+    "mois", "jour_semaine", "heure", "departement",
+]
+
+TYPES_DIMENSIONS = {
+    "annee": "INTEGER",
+    "periode": "TEXT",
+    "limitation": "INTEGER",
+    "classe_depassement": "TEXT",
+    "mois": "INTEGER",
+    "jour_semaine": "INTEGER",  # 0 = dimanche, comme strftime('%w')
+    "heure": "INTEGER",
+    "departement": "TEXT",
+}
+
+# Cuboïdes matérialisés, du plus petit au plus détaillé (le cube complet)
+CUBOIDES = {
+    "cube_mensuel": ["annee", "periode", "limitation", "classe_depassement", "mois"],
+    "cube_departements": ["annee", "periode", "limitation", "classe_depassement",
+                          "mois", "departement"],
+    "cube_horaire": ["annee", "periode", "limitation", "classe_depassement",
+                     "mois", "jour_semaine", "heure"],
+    "cube": DIMENSIONS_CUBE,
+}
+
+CREATION_HISTOGRAMME = """
+    CREATE TABLE IF NOT EXISTS histogramme_depassements (
+        annee INTEGER NOT NULL,
+        departement TEXT NOT NULL,
+        depassement INTEGER NOT NULL,
+        nb INTEGER NOT NULL,
+        PRIMARY KEY (annee, departement, depassement)
+    ) STRICT, WITHOUT ROWID;
+"""
+
+ALIMENTATION_HISTOGRAMME = """
+    INSERT INTO histogramme_depassements
+    SELECT v.annee, COALESCE(p.departement, ''), v.depassement, COUNT(*)
+    FROM vitesses v
+    LEFT JOIN positions p ON p.id = v.position_id
+    WHERE v.rowid > ? AND v.rowid <= ? AND v.depassement > 0
+    GROUP BY 1, 2, 3
+    ON CONFLICT DO UPDATE SET nb = nb + excluded.nb;
+"""
+
+CLASSE_SQL = "CASE {} ELSE '{}' END".format(
+    " ".join(f"WHEN v.depassement <= {borne} THEN '{classe}'"
+             for borne, classe in zip(BORNES_DEPASSEMENT, CLASSES_DEPASSEMENT)),
+    CLASSES_DEPASSEMENT[-1],
+)
+
+# Les dates sont des secondes en heure locale : le jour et l'heure se
+# déduisent par division entière (le 1er janvier 1970 était un jeudi)
+CALCUL_DELTA = f"""
+    CREATE TEMP TABLE cube_delta AS
+    SELECT v.annee AS annee,
+           CASE v.est_nuit WHEN 1 THEN 'nuit' WHEN 0 THEN 'jour' ELSE '' END AS periode,
+           v.limitation AS limitation,
+           {CLASSE_SQL} AS classe_depassement,
+           COALESCE(CAST(strftime('%m', v.date, 'unixepoch') AS INTEGER), -1) AS mois,
+           COALESCE((v.date / 86400 + 4) % 7, -1) AS jour_semaine,
+           COALESCE(v.date / 3600 % 24, -1) AS heure,
+           COALESCE(p.departement, '') AS departement,
+           COUNT(*) AS nb,
+           SUM(v.depassement) AS somme_depassement
+    FROM vitesses v
+    LEFT JOIN positions p ON p.id = v.position_id
+    WHERE v.rowid > ? AND v.rowid <= ?
+    GROUP BY 1, 2, 3, 4, 5, 6, 7, 8;
+"""
+
+
+# Positions sans département dont des mesures sont déjà comptées (case '')
+COMPTAGE_POSITIONS_EN_ATTENTE = """
+    SELECT COUNT(*) FROM positions p
+    WHERE p.departement IS NULL AND EXISTS (
+        SELECT 1 FROM vitesses v WHERE v.position_id = p.id AND v.rowid <= ?
+    );
+"""
+
+
+def creation_cuboide(nom: str, dimensions: list) -> str:
+    """Renvoie la requête de création d'un cuboïde."""
+    colonnes = "".join(f"{d} {TYPES_DIMENSIONS[d]} NOT NULL, " for d in dimensions)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {nom} ({colonnes}"
+        "nb INTEGER NOT NULL, somme_depassement INTEGER NOT NULL, "
+        f"PRIMARY KEY ({', '.join(dimensions)})) STRICT, WITHOUT ROWID;"
+    )
+
+
+def creer_tables_cube(conn: sqlite3.Connection) -> bool:
+    """
+    Crée si besoin les cuboïdes et l'histogramme.
+
+    Returns:
+        True si une table d'agrégats manquait (elle doit être remplie
+        depuis le début de vitesses)
+    """
+    tables = {ligne[0] for ligne in conn.execute("SELECT name FROM sqlite_master;")}
+    for nom, dimensions in CUBOIDES.items():
+        conn.execute(creation_cuboide(nom, dimensions))
+    conn.execute(CREATION_HISTOGRAMME)
+    return not tables.issuperset([*CUBOIDES, "histogramme_depassements"])
+
+
+def actualiser_cube(conn: sqlite3.Connection, incremental: bool = True,
+                    nb_workers: int = 1) -> int:
+    """
+    Construit ou complète le cube de la base d'une année.
+
+    Les nouvelles lignes sont agrégées une seule fois au grain le plus fin
+    (cube_delta), puis chaque cuboïde est complété depuis ce delta ; leurs
+    infractions sont ajoutées à l'histogramme des dépassements. Les
+    agrégats, les départements des positions et le filigrane sont écrits
+    dans une même transaction (cf. schema.actualiser_agregat, qui décide
+    aussi d'une reconstruction complète). Le cube est encore reconstruit
+    quand des positions déjà comptées sans département (GeoJSON ou
+    geopandas absent au calcul précédent) viennent d'être rattachées :
+    leurs mesures quittent la case '' des tables par département.
+
+    Args:
+        conn: Connexion à la base de l'année
+        incremental: N'ajoute que les lignes de vitesses postérieures au
+            filigrane (False = reconstruction complète)
+        nb_workers: Processus pour rattacher les nouvelles positions à leur
+            département (0 = un par cœur)
+
+    Returns:
+        Nombre de mesures ajoutées au cube
+    """
+    incomplet = creer_tables_cube(conn)
+
+    def rattacher(rowid_depart: int, rowid_max: int) -> bool:
+        en_attente = 0
+        if rowid_depart:
+            en_attente = conn.execute(COMPTAGE_POSITIONS_EN_ATTENTE, (rowid_depart,)).fetchone()[0]
+        if rowid_depart == rowid_max and not en_attente:
+            return False
+        rattacher_departements(conn, nb_workers)
+        if not en_attente:
+            return False
+        rattachees = en_attente - conn.execute(
+            COMPTAGE_POSITIONS_EN_ATTENTE, (rowid_depart,)
+        ).fetchone()[0]
+        if rattachees:
+            print(f"{rattachees:,} positions déjà comptées rattachées à leur "
+                  "département : reconstruction complète du cube")
+        return rattachees > 0
+
+    def appliquer(rowid_depart: int, rowid_max: int) -> int:
+        cumuls = [requete_cumul(nom, {d: d for d in dimensions},
+                                ["nb", "somme_depassement"], "cube_delta")
+                  for nom, dimensions in CUBOIDES.items()]
+        nb_mesures = agreger_delta(conn, "cube_delta", CALCUL_DELTA, cumuls,
+                                   rowid_depart, rowid_max)
+        conn.execute(ALIMENTATION_HISTOGRAMME, (rowid_depart, rowid_max))
+        return nb_mesures
+
+    return actualiser_agregat(conn, NOM_FILIGRANE, [*CUBOIDES, "histogramme_depassements"],
+                              appliquer, incremental, incomplet, preparer=rattacher)
+
+
+def choisir_cuboide(conn: sqlite3.Connection, dimensions: set) -> str:
+    """
+    Renvoie le plus petit cuboïde présent qui contient les dimensions.
+
+    Args:
+        conn: Connexion exposant les cuboïdes (tables ou vues)
+        dimensions: Dimensions nécessaires à la requête
+
+    Returns:
+        Nom du cuboïde
+    """
+    presents = {ligne[0] for ligne in conn.execute(
+        "SELECT name FROM sqlite_master UNION ALL SELECT name FROM sqlite_temp_master;"
+    )}
+    for nom, dimensions_cuboide in CUBOIDES.items():
+        if nom in presents and dimensions <= set(dimensions_cuboide):
+            return nom
+    raise ValueError("Cube absent : lancer actualiser_cube")
+
+
+def requete_cube(conn: sqlite3.Connection, dimensions: list,
+                 filtres: dict = None) -> tuple:
+    """
+    Construit la requête d'agrégation du cube (cf. interroger_cube).
+
+    Args:
+        conn: Connexion exposant les cuboïdes (tables ou vues)
+        dimensions: Dimensions conservées, parmi DIMENSIONS_CUBE
+        filtres: Valeur ou liste de valeurs retenues par dimension
+
+    Returns:
+        Tuple (requête SQL, paramètres)
+    """
+    filtres = filtres or {}
+    inconnues = set(dimensions).union(filtres) - set(DIMENSIONS_CUBE)
+    if inconnues:
+        raise ValueError(f"Dimensions inconnues: {sorted(inconnues)}")
+
+    conditions, parametres = [], []
+    for dimension, valeurs in filtres.items():
+        if not isinstance(valeurs, (list, tuple, set)):
+            valeurs = [valeurs]
+        valeurs = list(valeurs)
+        conditions.append(f"{dimension} IN ({', '.join('?' * len(valeurs))})")
+        parametres.extend(valeurs)
+
+    nom = choisir_cuboide(conn, set(dimensions).union(filtres))
+    colonnes = "".join(f"{dimension}, " for dimension in dimensions)
+    requete = (f"SELECT {colonnes}SUM(nb) AS nb, "
+               f"SUM(somme_depassement) AS somme_depassement FROM {nom}")
+    if conditions:
+        requete += " WHERE " + " AND ".join(conditions)
+    if dimensions:
+        requete += f" GROUP BY {', '.join(dimensions)}"
+    return requete, parametres
+
+
+def interroger_cube(conn: sqlite3.Connection, dimensions: list,
+                    filtres: dict = None) -> pd.DataFrame:
+    """
+    Agrège le cube selon un sous-ensemble de ses dimensions.
+
+    La requête porte sur le plus petit cuboïde présent qui contient les
+    dimensions demandées et filtrées.
+
+    Args:
+        conn: Connexion exposant les cuboïdes (tables ou vues)
+        dimensions: Dimensions conservées, parmi DIMENSIONS_CUBE
+            (liste vide = total général)
+        filtres: Valeur ou liste de valeurs retenues par dimension,
+            par exemple {"periode": "nuit", "limitation": [80, 90]}
+
+    Returns:
+        DataFrame des dimensions demandées avec nb (mesures) et
+        somme_depassement, trié selon les dimensions
+    """
+    requete, parametres = requete_cube(conn, dimensions, filtres)
+    resultat = pd.read_sql_query(requete, conn, params=parametres)
+    if "classe_depassement" in resultat.columns:
+        resultat["classe_depassement"] = pd.Categorical(
+            resultat["classe_depassement"], categories=CLASSES_DEPASSEMENT, ordered=True
+        )
+    if dimensions:
+        resultat = resultat.sort_values(dimensions, ignore_index=True)
+    return resultat
@@ -0,0 +1,205 @@
+"""
+Contours simplifiés des départements pour la carte du dashboard.
+
+Le GeoJSON source (3,4 Mo, pleine résolution) est simplifié à quelques
+tolérances adaptées au zoom de la carte (NIVEAUX_CARTE). Les coordonnées
+sont d'abord arrondies (DECIMALES), puis la simplification porte sur la
+couverture entière (shapely.coverage_simplify) : une frontière commune
+reste identique des deux côtés, sans trou ni chevauchement, et les
+sommets conservés gardent leurs coordonnées arrondies.
+
+Chaque niveau est écrit à côté du GeoJSON source, sous un nom qui contient
+l'empreinte de la source : le navigateur peut le garder en cache sans
+limite de durée. Un manifeste (departements.simplifie.json) liste les
+fichiers et les codes des départements ; tout est reconstruit quand
+l'empreinte du GeoJSON source change.
+
+Les niveaux sont construits par le pipeline (main.py), dans un seul
+processus ; le dashboard ne fait que lire le manifeste (lire_manifeste).
+Chaque fichier est écrit sous un nom temporaire puis renommé, et les
+anciens niveaux ne sont supprimés qu'une fois le nouveau manifeste en
+place.
+"""
+import json
+import os
+from pathlib import Path
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+
+from src.utils.grille_departements import empreinte_fichier
+
+
+VERSION_SIMPLIFICATION = 1
+
+# niveau: (tolérance de simplification en degrés, zoom maximal d'usage)
+NIVEAUX_CARTE = {
+    "france": (0.02, 5.5),
+    "region": (0.005, 7.5),
+    "detail": (0.001, None),
+}
+DECIMALES = 4  # ≈ 11 m ; davantage si l'arrondi rendait un contour invalide
+DECIMALES_MAX = 7
+
+
+def chemin_manifeste(chemin_geojson: Path) -> Path:
+    """Renvoie le manifeste des contours simplifiés d'un GeoJSON."""
+    return chemin_geojson.with_suffix(".simplifie.json")
+
+
+def niveau_pour_zoom(zoom: float) -> str:
+    """Renvoie le niveau de simplification adapté à un zoom de carte."""
+    for niveau, (_, zoom_max) in NIVEAUX_CARTE.items():
+        if zoom_max is None or zoom < zoom_max:
+            return niveau
+    return niveau
+
+
+def quantifier(geometries: np.ndarray) -> tuple:
+    """
+    Arrondit les coordonnées d'une couverture de polygones.
+
+    L'arrondi est appliqué point par point : un sommet partagé reste
+    partagé. Le nombre de décimales augmente tant qu'un contour devient
+    invalide ou que la couverture perd sa cohérence.
+
+    Args:
+        geometries: Polygones de la couverture
+
+    Returns:
+        Tuple (polygones aux coordonnées arrondies, décimales retenues ou
+        None si aucun arrondi ne convient)
+    """
+    for decimales in range(DECIMALES, DECIMALES_MAX + 1):
+        arrondies = shapely.transform(geometries, lambda xy: np.round(xy, decimales))
+        if shapely.is_valid(arrondies).all() and shapely.coverage_is_valid(arrondies):
+            return arrondies, decimales
+    return geometries, None
+
+
+def chemin_temporaire(chemin: Path) -> Path:
+    """Renvoie un nom temporaire propre au processus, à côté de chemin."""
+    return chemin.with_name(f"{chemin.name}.{os.getpid()}.tmp")
+
+
+def ecrire_geojson(chemin: Path, proprietes: list, geometries: np.ndarray) -> None:
+    """Écrit une FeatureCollection compacte, de façon atomique."""
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": props, "geometry": mapping(geometrie)}
+            for props, geometrie in zip(proprietes, geometries)
+        ],
+    }
+    temporaire = chemin_temporaire(chemin)
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(collection, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(temporaire, chemin)
+
+
+def construire_simplifications(chemin_geojson: Path) -> dict:
+    """
+    Construit les contours simplifiés de chaque niveau et leur manifeste.
+
+    Args:
+        chemin_geojson: GeoJSON source des départements
+
+    Returns:
+        Manifeste : empreinte de la source, codes des départements et
+        fichier de chaque niveau
+    """
+    empreinte = empreinte_fichier(chemin_geojson)
+    with open(chemin_geojson, "r", encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    proprietes = [feature["properties"] for feature in features]
+    geometries, decimales = quantifier(
+        np.array([shape(feature["geometry"]) for feature in features])
+    )
+
+    niveaux = {}
+    for niveau, (tolerance, _) in NIVEAUX_CARTE.items():
+        simplifiees = shapely.coverage_simplify(geometries, tolerance)
+        if decimales is not None:
+            # Sommets inchangés : supprime seulement le bruit d'arrondi binaire
+            simplifiees = shapely.transform(simplifiees, lambda xy: np.round(xy, decimales))
+        nom = f"{chemin_geojson.stem}.{niveau}.{empreinte[:12]}.geojson"
+        ecrire_geojson(chemin_geojson.parent / nom, proprietes, simplifiees)
+        niveaux[niveau] = nom
+
+    manifeste = {
+        "empreinte": empreinte,
+        "version": VERSION_SIMPLIFICATION,
+        "tolerances": {niveau: tolerance for niveau, (tolerance, _) in NIVEAUX_CARTE.items()},
+        "codes": [str(props.get("code")) for props in proprietes],
+        "niveaux": niveaux,
+    }
+    temporaire = chemin_temporaire(chemin_manifeste(chemin_geojson))
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(manifeste, f)
+    os.replace(temporaire, chemin_manifeste(chemin_geojson))
+
+    # Anciens niveaux (source ou tolérances précédentes), plus référencés
+    for ancien in chemin_geojson.parent.glob(f"{chemin_geojson.stem}.*.*.geojson"):
+        if ancien.name not in niveaux.values():
+            ancien.unlink(missing_ok=True)
+    return manifeste
+
+
+def lire_manifeste(chemin_geojson: Path) -> dict:
+    """
+    Lit le manifeste s'il est à jour, sans rien construire.
+
+    Args:
+        chemin_geojson: GeoJSON source des départements
+
+    Returns:
+        Manifeste (cf. construire_simplifications), ou None s'il est
+        absent, périmé ou si un niveau manque
+    """
+    try:
+        with open(chemin_manifeste(chemin_geojson), "r", encoding="utf-8") as f:
+            manifeste = json.load(f)
+        a_jour = (
+            manifeste.get("version") == VERSION_SIMPLIFICATION
+            and manifeste.get("tolerances") == {
+                niveau: tolerance for niveau, (tolerance, _) in NIVEAUX_CARTE.items()
+            }
+            and manifeste.get("empreinte") == empreinte_fichier(chemin_geojson)
+            and all((chemin_geojson.parent / nom).exists()
+                    for nom in manifeste["niveaux"].values())
+        )
+        if a_jour:
+            return manifeste
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def lire_simplifications(chemin_geojson: Path) -> dict:
+    """
+    Renvoie le manifeste à jour, en reconstruisant les niveaux au besoin.
+
+    Args:
+        chemin_geojson: GeoJSON source des départements
+
+    Returns:
+        Manifeste (cf. construire_simplifications)
+    """
+    return lire_manifeste(chemin_geojson) or construire_simplifications(chemin_geojson)
+
+
+def main(chemin_geojson: Path = Path("data/geo/departements.geojson")):
+    """
+    Construit (si besoin) les contours simplifiés de la carte.
+
+    Args:
+        chemin_geojson: GeoJSON source des départements
+    """
+    manifeste = lire_simplifications(chemin_geojson)
+    for niveau, nom in manifeste["niveaux"].items():
+        taille = (chemin_geojson.parent / nom).stat().st_size
+        print(f"Contours {niveau}: {nom} ({taille / 1024:.0f} Ko)")
+
+
+if __name__ == "__main__":
+    main()
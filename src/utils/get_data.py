@@ -1,53 +1,459 @@
 """
 Module de téléchargement des données depuis Data.gouv.fr.
+
+Le fichier est découpé en segments HTTP Range téléchargés en parallèle
+sur une session à connexions réutilisées. La progression est enregistrée
+dans un manifeste à côté du fichier `.part`, ce qui permet de reprendre
+un téléchargement interrompu. Une requête conditionnelle (ETag /
+If-Modified-Since) évite de retélécharger un fichier déjà à jour. Le
+fichier reçu est comparé à la somme de contrôle que Data.gouv.fr publie
+dans les métadonnées de la ressource, quand elle existe.
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
 
 
+# Une ressource Data.gouv.fr par année : ajouter une année ici suffit
+# pour qu'elle soit téléchargée, nettoyée, chargée et proposée au dashboard
 RESSOURCES = {
     "2023": "52200d61-5e80-4a4e-999f-6e1c184fa122",
 }
+ANNEES = sorted(int(annee) for annee in RESSOURCES)
 
 URL_BASE = "https://www.data.gouv.fr/api/1/datasets/r/"
+URL_METADONNEES = "https://www.data.gouv.fr/api/2/datasets/resources/"
 REPERTOIRE_SORTIE = Path("data/raw")
 
+NB_SEGMENTS = 4
+TAILLE_MIN_SEGMENT = 8 * 1024 * 1024
+TAILLE_MORCEAU = 1024 * 1024
+NB_TENTATIVES = 5
+DELAI_REQUETE = 600
+# Le manifeste est réécrit au plus tous les N octets ou toutes les N secondes
+# par segment, et à la fin de chaque segment
+OCTETS_ENTRE_SAUVEGARDES = 16 * 1024 * 1024
+DELAI_ENTRE_SAUVEGARDES = 2.0
+
+
+def chemin_partiel(chemin_sortie: Path) -> Path:
+    """Chemin du fichier en cours de téléchargement."""
+    return chemin_sortie.with_name(chemin_sortie.name + ".part")
+
+
+def chemin_manifeste(chemin_sortie: Path) -> Path:
+    """Chemin du manifeste de reprise associé au fichier `.part`."""
+    return chemin_sortie.with_name(chemin_sortie.name + ".part.json")
+
+
+def chemin_metadonnees(chemin_sortie: Path) -> Path:
+    """Chemin des métadonnées (ETag, date, taille) du fichier terminé."""
+    return chemin_sortie.with_name(chemin_sortie.name + ".meta.json")
 
-def telecharger_fichier(id_ressource: str, chemin_sortie: Path) -> None:
+
+def lire_json(chemin: Path) -> dict:
+    """Lit un fichier JSON annexe, ou renvoie un dictionnaire vide."""
+    try:
+        with open(chemin, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ecrire_json(chemin: Path, contenu: dict) -> None:
+    """Écrit un fichier JSON annexe de façon atomique."""
+    temporaire = chemin.with_name(chemin.name + ".tmp")
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(contenu, f)
+    os.replace(temporaire, chemin)
+
+
+def creer_session(nb_connexions: int = NB_SEGMENTS) -> requests.Session:
     """
-    Télécharge un fichier depuis l'API Data.gouv.fr.
-    
+    Crée une session HTTP avec un pool de connexions et des relances.
+
     Args:
-        id_ressource: Identifiant de la ressource sur Data.gouv.fr
-        chemin_sortie: Chemin où sauvegarder le fichier
+        nb_connexions: Nombre de connexions simultanées à conserver
+
+    Returns:
+        Session requests configurée
     """
-    url = f"{URL_BASE}{id_ressource}"
-    REPERTOIRE_SORTIE.mkdir(parents=True, exist_ok=True)
-    
-    with requests.get(url, stream=True, timeout=600) as reponse:
+    relances = Retry(
+        total=NB_TENTATIVES,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET"],
+    )
+    adaptateur = HTTPAdapter(
+        pool_connections=nb_connexions,
+        pool_maxsize=nb_connexions,
+        max_retries=relances,
+    )
+    session = requests.Session()
+    session.mount("http://", adaptateur)
+    session.mount("https://", adaptateur)
+    return session
+
+
+def interroger_ressource(session: requests.Session, url: str,
+                         entetes: dict = None) -> dict:
+    """
+    Récupère les informations de la ressource par une requête HEAD.
+
+    Args:
+        session: Session HTTP
+        url: URL de la ressource (les redirections sont suivies)
+        entetes: En-têtes conditionnels éventuels
+
+    Returns:
+        Dictionnaire avec statut, url finale, taille, ETag, Last-Modified
+        et prise en charge des requêtes Range
+    """
+    reponse = session.head(url, headers=entetes or {},
+                           allow_redirects=True, timeout=DELAI_REQUETE)
+    if reponse.status_code != 304:
+        reponse.raise_for_status()
+
+    return {
+        "statut": reponse.status_code,
+        "url": reponse.url,
+        "taille": int(reponse.headers.get("Content-Length", 0)),
+        "etag": reponse.headers.get("ETag"),
+        "last_modified": reponse.headers.get("Last-Modified"),
+        "plages": reponse.headers.get("Accept-Ranges", "").lower() == "bytes",
+    }
+
+
+def decouper_segments(taille: int, nb_segments: int) -> list:
+    """
+    Découpe une ressource en segments d'octets [debut, fin] inclusifs.
+
+    Args:
+        taille: Taille totale en octets
+        nb_segments: Nombre de segments souhaité
+
+    Returns:
+        Liste de [debut, fin, octets_ecrits]
+    """
+    nb_segments = max(1, min(nb_segments, taille // TAILLE_MIN_SEGMENT or 1))
+    pas = -(-taille // nb_segments)
+    return [
+        [debut, min(debut + pas, taille) - 1, 0]
+        for debut in range(0, taille, pas)
+    ]
+
+
+def telecharger_segment(session: requests.Session, url: str, chemin_part: Path,
+                        segment: list, manifeste: dict, chemin_manif: Path,
+                        verrou: threading.Lock, barre: tqdm) -> None:
+    """
+    Télécharge un segment dans le fichier `.part`, avec reprise en cas d'erreur.
+
+    Chaque morceau est écrit dans le fichier avant d'être compté dans le
+    manifeste : celui-ci ne déclare jamais d'octets absents du disque. Le
+    manifeste n'est réécrit que tous les OCTETS_ENTRE_SAUVEGARDES octets
+    ou DELAI_ENTRE_SAUVEGARDES secondes, et quand le segment s'arrête
+    (terminé ou en erreur) : une reprise relit au pire ces derniers octets.
+
+    Args:
+        session: Session HTTP
+        url: URL finale de la ressource
+        chemin_part: Fichier `.part` pré-alloué
+        segment: [debut, fin, octets_ecrits], mis à jour au fil de l'eau
+        manifeste: Manifeste partagé entre les segments
+        chemin_manif: Chemin du manifeste sur disque
+        verrou: Verrou protégeant l'écriture du manifeste
+        barre: Barre de progression partagée
+    """
+    debut, fin, _ = segment
+    entetes_base = {}
+    if manifeste.get("etag"):
+        entetes_base["If-Range"] = manifeste["etag"]
+
+    for tentative in range(NB_TENTATIVES):
+        position = debut + segment[2]
+        if position > fin:
+            return
+
+        entetes = dict(entetes_base, Range=f"bytes={position}-{fin}")
+        try:
+            with session.get(url, headers=entetes, stream=True,
+                             timeout=DELAI_REQUETE) as reponse:
+                reponse.raise_for_status()
+                if reponse.status_code != 206:
+                    raise IOError("Le serveur a ignoré la requête Range")
+
+                with open(chemin_part, "r+b") as f:
+                    f.seek(position)
+                    non_sauves = 0
+                    derniere_sauvegarde = time.monotonic()
+                    try:
+                        for chunk in reponse.iter_content(chunk_size=TAILLE_MORCEAU):
+                            if not chunk:
+                                continue
+                            f.write(chunk)
+                            f.flush()
+                            non_sauves += len(chunk)
+                            sauvegarder = (
+                                non_sauves >= OCTETS_ENTRE_SAUVEGARDES
+                                or time.monotonic() - derniere_sauvegarde
+                                >= DELAI_ENTRE_SAUVEGARDES
+                            )
+                            with verrou:
+                                segment[2] += len(chunk)
+                                barre.update(len(chunk))
+                                if sauvegarder:
+                                    ecrire_json(chemin_manif, manifeste)
+                            if sauvegarder:
+                                non_sauves = 0
+                                derniere_sauvegarde = time.monotonic()
+                    finally:
+                        if non_sauves:
+                            with verrou:
+                                ecrire_json(chemin_manif, manifeste)
+            if debut + segment[2] > fin:
+                return
+        except (requests.RequestException, IOError):
+            if tentative == NB_TENTATIVES - 1:
+                raise
+
+    raise IOError(f"Segment {debut}-{fin} incomplet")
+
+
+def telecharger_flux_simple(session: requests.Session, url: str,
+                            chemin_part: Path) -> None:
+    """
+    Télécharge la ressource en un seul flux (serveur sans Range).
+
+    Args:
+        session: Session HTTP
+        url: URL de la ressource
+        chemin_part: Fichier `.part` de destination
+    """
+    with session.get(url, stream=True, timeout=DELAI_REQUETE) as reponse:
         reponse.raise_for_status()
         taille_totale = int(reponse.headers.get("Content-Length", 0))
-        
-        with open(chemin_sortie, "wb") as f, tqdm(
+
+        with open(chemin_part, "wb") as f, tqdm(
             total=taille_totale,
             unit="B",
             unit_scale=True,
-            desc=chemin_sortie.name
+            desc=chemin_part.name
         ) as barre_progression:
-            for chunk in reponse.iter_content(chunk_size=1024 * 1024):
+            for chunk in reponse.iter_content(chunk_size=TAILLE_MORCEAU):
                 if chunk:
                     f.write(chunk)
                     barre_progression.update(len(chunk))
 
 
-def main():
-    """Télécharge tous les fichiers définis dans RESSOURCES."""
+def lire_somme_controle(id_ressource: str) -> tuple:
+    """
+    Lit la somme de contrôle publiée dans les métadonnées d'une ressource.
+
+    Args:
+        id_ressource: Identifiant de la ressource sur Data.gouv.fr
+
+    Returns:
+        Tuple (algorithme hashlib, valeur hexadécimale), ou None si
+        Data.gouv.fr n'en publie pas (ou si les métadonnées sont illisibles)
+    """
+    try:
+        with creer_session(1) as session:
+            reponse = session.get(f"{URL_METADONNEES}{id_ressource}/",
+                                  timeout=DELAI_REQUETE)
+            reponse.raise_for_status()
+            somme = reponse.json()["resource"].get("checksum") or {}
+    except (requests.RequestException, ValueError, KeyError) as e:
+        print(f"Attention: somme de contrôle de {id_ressource} indisponible ({e})")
+        return None
+    if somme.get("type") not in hashlib.algorithms_guaranteed or not somme.get("value"):
+        return None
+    return somme["type"], somme["value"].lower()
+
+
+def calculer_empreinte(chemin: Path, algorithme: str = "sha256") -> str:
+    """Calcule l'empreinte d'un fichier sans le charger en mémoire."""
+    empreinte = hashlib.new(algorithme)
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(TAILLE_MORCEAU), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def telecharger_url(url: str, chemin_sortie: Path,
+                    nb_segments: int = NB_SEGMENTS,
+                    somme_controle: tuple = None) -> bool:
+    """
+    Télécharge une URL en segments parallèles, avec reprise et cache HTTP.
+
+    Args:
+        url: URL de la ressource
+        chemin_sortie: Chemin où sauvegarder le fichier
+        nb_segments: Nombre de connexions simultanées
+        somme_controle: (algorithme hashlib, valeur) attendus, vérifiés en
+            fin de transfert (None = pas de vérification, ni de relecture)
+
+    Returns:
+        True si le fichier a été (re)téléchargé, False s'il était déjà à jour
+    """
+    chemin_sortie.parent.mkdir(parents=True, exist_ok=True)
+    chemin_part = chemin_partiel(chemin_sortie)
+    chemin_manif = chemin_manifeste(chemin_sortie)
+    chemin_meta = chemin_metadonnees(chemin_sortie)
+
+    with creer_session(nb_segments) as session:
+        # Requête conditionnelle : rien à faire si le fichier est inchangé
+        entetes = {}
+        meta = lire_json(chemin_meta) if chemin_sortie.exists() else {}
+        if meta.get("etag"):
+            entetes["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            entetes["If-Modified-Since"] = meta["last_modified"]
+
+        info = interroger_ressource(session, url, entetes)
+        if info["statut"] == 304:
+            print(f"  {chemin_sortie.name} déjà à jour")
+            return False
+
+        if info["plages"] and info["taille"] > 0:
+            # Reprise possible seulement si la ressource n'a pas changé
+            manifeste = lire_json(chemin_manif)
+            reprise = (
+                chemin_part.exists()
+                and manifeste.get("taille") == info["taille"]
+                and manifeste.get("etag") == info["etag"]
+                and manifeste.get("last_modified") == info["last_modified"]
+            )
+            if not reprise:
+                manifeste = {
+                    "taille": info["taille"],
+                    "etag": info["etag"],
+                    "last_modified": info["last_modified"],
+                    "segments": decouper_segments(info["taille"], nb_segments),
+                }
+                with open(chemin_part, "wb") as f:
+                    f.truncate(info["taille"])
+                ecrire_json(chemin_manif, manifeste)
+
+            deja_recu = sum(s[2] for s in manifeste["segments"])
+            verrou = threading.Lock()
+
+            with tqdm(total=info["taille"], initial=deja_recu, unit="B",
+                      unit_scale=True, desc=chemin_sortie.name) as barre:
+                with ThreadPoolExecutor(max_workers=len(manifeste["segments"])) as pool:
+                    taches = [
+                        pool.submit(telecharger_segment, session, info["url"],
+                                    chemin_part, segment, manifeste,
+                                    chemin_manif, verrou, barre)
+                        for segment in manifeste["segments"]
+                    ]
+                    for tache in taches:
+                        tache.result()
+
+            # Le `.part` est pré-alloué : sa taille ne prouve rien, chaque
+            # segment doit avoir reçu exactement ses octets
+            incomplets = [s for s in manifeste["segments"] if s[0] + s[2] != s[1] + 1]
+            if incomplets:
+                raise IOError(f"{len(incomplets)} segments incomplets pour {chemin_sortie.name}")
+        else:
+            telecharger_flux_simple(session, info["url"], chemin_part)
+            taille_recue = chemin_part.stat().st_size
+            if info["taille"] and taille_recue != info["taille"]:
+                raise IOError(f"Taille incorrecte: {taille_recue} au lieu de {info['taille']}")
+
+    if somme_controle:
+        algorithme, valeur = somme_controle
+        if calculer_empreinte(chemin_part, algorithme) != valeur.lower():
+            chemin_part.unlink()
+            chemin_manif.unlink(missing_ok=True)
+            raise IOError(f"Somme de contrôle {algorithme} incorrecte pour {chemin_sortie.name}")
+
+    os.replace(chemin_part, chemin_sortie)
+    chemin_manif.unlink(missing_ok=True)
+    ecrire_json(chemin_meta, {
+        "url": url,
+        "taille": chemin_sortie.stat().st_size,
+        "etag": info["etag"],
+        "last_modified": info["last_modified"],
+    })
+    return True
+
+
+def telecharger_fichier(id_ressource: str, chemin_sortie: Path,
+                        nb_segments: int = NB_SEGMENTS) -> bool:
+    """
+    Télécharge un fichier depuis l'API Data.gouv.fr.
+
+    Le fichier reçu est vérifié par la somme de contrôle des métadonnées
+    de la ressource (cf. lire_somme_controle), quand elle est publiée.
+
+    Args:
+        id_ressource: Identifiant de la ressource sur Data.gouv.fr
+        chemin_sortie: Chemin où sauvegarder le fichier
+        nb_segments: Nombre de connexions simultanées
+
+    Returns:
+        True si le fichier a été (re)téléchargé, False s'il était déjà à jour
+    """
+    url = f"{URL_BASE}{id_ressource}"
+    return telecharger_url(url, chemin_sortie, nb_segments=nb_segments,
+                           somme_controle=lire_somme_controle(id_ressource))
+
+
+def flux_url(url: str, taille_morceau: int = TAILLE_MORCEAU):
+    """
+    Diffuse le corps d'une réponse HTTP sans l'écrire sur disque.
+
+    Args:
+        url: URL de la ressource
+        taille_morceau: Taille des morceaux d'octets renvoyés
+
+    Yields:
+        Morceaux d'octets du fichier distant
+    """
+    with creer_session(1) as session:
+        with session.get(url, stream=True, timeout=DELAI_REQUETE) as reponse:
+            reponse.raise_for_status()
+            for chunk in reponse.iter_content(chunk_size=taille_morceau):
+                if chunk:
+                    yield chunk
+
+
+def flux_ressource(id_ressource: str):
+    """
+    Diffuse une ressource Data.gouv.fr morceau par morceau.
+
+    Args:
+        id_ressource: Identifiant de la ressource sur Data.gouv.fr
+
+    Yields:
+        Morceaux d'octets du fichier distant
+    """
+    yield from flux_url(f"{URL_BASE}{id_ressource}")
+
+
+def main(annees: list = None):
+    """
+    Télécharge les fichiers définis dans RESSOURCES.
+
+    Args:
+        annees: Années à télécharger (None = toutes)
+    """
     for annee, id_ressource in RESSOURCES.items():
+        if annees is not None and int(annee) not in annees:
+            continue
         nom_fichier = f"vitesse_{annee}.csv"
         chemin = REPERTOIRE_SORTIE / nom_fichier
         telecharger_fichier(id_ressource, chemin)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
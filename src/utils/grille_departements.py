@@ -0,0 +1,374 @@
+"""
+Grille de recherche point → département.
+
+La France métropolitaine est découpée en cellules de PAS_GRILLE degrés.
+Une cellule que ne traverse aucune frontière est entièrement dans un seul
+département (ou hors de tous) : le département d'un point s'y lit par un
+simple calcul d'indice, vectorisé avec NumPy. Seuls les points des
+cellules frontières sont testés sur les contours exacts (géométries
+préparées). Le résultat est identique à celui de
+gpd.sjoin(predicate="within") en gardant la première correspondance.
+
+La grille est mise en cache à côté du GeoJSON (departements.grille.npz)
+et reconstruite quand l'empreinte SHA-256 du GeoJSON change.
+
+La jointure exacte (joindre_departements) peut être répartie sur
+plusieurs processus : les points sont découpés en blocs spatialement
+compacts, et chaque processus prépare une seule fois les contours et leur
+STRtree. Comparaison des méthodes : python -m src.utils.grille_departements
+"""
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import shapely
+
+
+PAS_GRILLE = 0.01  # Degrés
+MARGE_CELLULE = 1e-9  # Absorbe les arrondis du calcul d'indice de cellule
+VERSION_GRILLE = 1
+
+HORS_DEPARTEMENT = -1
+CELLULE_FRONTIERE = -2
+
+SEUIL_PARALLELE = 50_000  # Points en dessous desquels la jointure reste séquentielle
+BLOCS_PAR_WORKER = 4
+LARGEUR_BANDE = 0.5  # Degrés de longitude par bande lors du découpage spatial
+
+_CONTOURS_PROCESSUS = None  # (géométries préparées, STRtree) d'un processus de calcul
+
+
+def chemin_grille(chemin_geojson: Path) -> Path:
+    """Renvoie le fichier cache de la grille d'un GeoJSON."""
+    return chemin_geojson.with_suffix(".grille.npz")
+
+
+def empreinte_fichier(chemin: Path) -> str:
+    """Renvoie l'empreinte SHA-256 d'un fichier."""
+    return hashlib.sha256(Path(chemin).read_bytes()).hexdigest()
+
+
+def indices_exacts(geometries: np.ndarray, arbre: shapely.STRtree,
+                   lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """
+    Teste des points sur les contours exacts des départements.
+
+    Args:
+        geometries: Contours préparés des départements
+        arbre: STRtree de ces contours
+        lon: Longitudes
+        lat: Latitudes
+
+    Returns:
+        Indice du premier département contenant chaque point, ou
+        HORS_DEPARTEMENT
+    """
+    # Candidats par rectangle englobant, puis test exact département par
+    # département sur sa géométrie préparée
+    points, departements = arbre.query(shapely.points(lon, lat))
+    resultat = np.full(len(lon), HORS_DEPARTEMENT, dtype=np.int64)
+    # À rebours : le plus petit indice de département l'emporte
+    for indice in np.unique(departements)[::-1]:
+        candidats = points[departements == indice]
+        dedans = shapely.contains_xy(geometries[indice], lon[candidats], lat[candidats])
+        resultat[candidats[dedans]] = indice
+    return resultat
+
+
+def preparer_contours(geometries) -> tuple:
+    """Prépare les contours et construit leur STRtree."""
+    geometries = np.asarray(geometries)
+    shapely.prepare(geometries)
+    return geometries, shapely.STRtree(geometries)
+
+
+def initialiser_processus(geometries: np.ndarray) -> None:
+    """Prépare, une fois par processus de calcul, les contours et leur STRtree."""
+    global _CONTOURS_PROCESSUS
+    _CONTOURS_PROCESSUS = preparer_contours(geometries)
+
+
+def indices_exacts_processus(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Teste un bloc de points dans un processus de calcul."""
+    return indices_exacts(*_CONTOURS_PROCESSUS, lon, lat)
+
+
+def decouper_spatialement(lon: np.ndarray, lat: np.ndarray, nb_blocs: int) -> list:
+    """
+    Découpe des points en blocs spatialement compacts.
+
+    Les points sont triés par bande de longitude puis par latitude : chaque
+    bloc couvre une zone réduite et ne touche que peu de départements.
+
+    Returns:
+        Liste de tableaux d'indices des points, un par bloc
+    """
+    ordre = np.lexsort((lat, np.floor(lon / LARGEUR_BANDE)))
+    return [bloc for bloc in np.array_split(ordre, nb_blocs) if len(bloc)]
+
+
+def joindre_departements(geometries, lon, lat, nb_workers: int = 1,
+                         contours: tuple = None) -> np.ndarray:
+    """
+    Jointure spatiale exacte des points avec les départements.
+
+    Même résultat que gpd.sjoin(predicate="within") en gardant la première
+    correspondance. Avec nb_workers > 1, les blocs sont traités par un
+    ProcessPoolExecutor et replacés à la position de leurs points : le
+    résultat ne dépend pas de l'ordre de fin des processus.
+
+    Args:
+        geometries: Contours des départements (EPSG:4326)
+        lon: Longitudes
+        lat: Latitudes
+        nb_workers: Nombre de processus (0 = un par cœur)
+        contours: Contours déjà préparés (cf. preparer_contours), pour le
+            traitement séquentiel
+
+    Returns:
+        Indice du département de chaque point, ou HORS_DEPARTEMENT
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    nb_workers = nb_workers or os.cpu_count() or 1
+    if nb_workers == 1 or len(lon) < SEUIL_PARALLELE:
+        return indices_exacts(*(contours or preparer_contours(geometries)), lon, lat)
+
+    blocs = decouper_spatialement(lon, lat, nb_workers * BLOCS_PAR_WORKER)
+    resultat = np.empty(len(lon), dtype=np.int64)
+    with ProcessPoolExecutor(nb_workers, initializer=initialiser_processus,
+                             initargs=(np.asarray(geometries),)) as pool:
+        futurs = [pool.submit(indices_exacts_processus, lon[bloc], lat[bloc])
+                  for bloc in blocs]
+        for bloc, futur in zip(blocs, futurs):
+            resultat[bloc] = futur.result()
+    return resultat
+
+
+class GrilleDepartements:
+    """
+    Grille régulière des départements avec repli exact aux frontières.
+
+    cellules[iy, ix] vaut l'indice du département qui contient toute la
+    cellule, HORS_DEPARTEMENT, ou CELLULE_FRONTIERE.
+    """
+
+    def __init__(self, geometries, codes, cellules: np.ndarray,
+                 origine: tuple, pas: float = PAS_GRILLE):
+        """
+        Args:
+            geometries: Contours des départements (EPSG:4326)
+            codes: Code de chaque département, dans le même ordre
+            cellules: Classement des cellules (cf. construire)
+            origine: Coin sud-ouest (lon, lat) de la grille
+            pas: Côté d'une cellule en degrés
+        """
+        self.geometries = np.asarray(geometries)
+        self.codes = np.asarray(codes, dtype=object)
+        self.cellules = cellules
+        self.origine = origine
+        self.pas = pas
+        self._contours = None
+
+    @classmethod
+    def construire(cls, geometries, codes, pas: float = PAS_GRILLE) -> "GrilleDepartements":
+        """
+        Classe chaque cellule de la grille couvrant les départements.
+
+        Une cellule (légèrement élargie de MARGE_CELLULE) est frontière si
+        un contour la touche, ou si son centre tombe dans plusieurs
+        départements ; sinon son centre donne le département de toute la
+        cellule.
+
+        Args:
+            geometries: Contours des départements (EPSG:4326)
+            codes: Code de chaque département, dans le même ordre
+            pas: Côté d'une cellule en degrés
+
+        Returns:
+            Grille construite
+        """
+        geometries = np.asarray(geometries)
+        minx, miny, maxx, maxy = shapely.total_bounds(geometries)
+        # Une cellule de marge de chaque côté : les bords de la grille sont
+        # toujours hors des départements
+        x0 = np.floor(minx / pas) * pas - pas
+        y0 = np.floor(miny / pas) * pas - pas
+        nx = int(np.ceil((maxx - x0) / pas)) + 2
+        ny = int(np.ceil((maxy - y0) / pas)) + 2
+
+        ix, iy = np.meshgrid(np.arange(nx), np.arange(ny))
+        ix, iy = ix.ravel(), iy.ravel()
+        boites = shapely.box(
+            x0 + ix * pas - MARGE_CELLULE, y0 + iy * pas - MARGE_CELLULE,
+            x0 + (ix + 1) * pas + MARGE_CELLULE, y0 + (iy + 1) * pas + MARGE_CELLULE,
+        )
+        _, frontieres = shapely.STRtree(boites).query(
+            shapely.boundary(geometries), predicate="intersects"
+        )
+        del boites
+
+        cellules = np.full(nx * ny, HORS_DEPARTEMENT, dtype=np.int16)
+        nb_centres = np.zeros(nx * ny, dtype=np.int8)
+        cx = x0 + (ix + 0.5) * pas
+        cy = y0 + (iy + 0.5) * pas
+        for indice, geometrie in enumerate(geometries):
+            gx0, gy0, gx1, gy1 = shapely.bounds(geometrie)
+            candidats = np.flatnonzero((cx >= gx0) & (cx <= gx1) & (cy >= gy0) & (cy <= gy1))
+            shapely.prepare(geometrie)
+            dedans = candidats[shapely.contains_xy(geometrie, cx[candidats], cy[candidats])]
+            cellules[dedans] = indice
+            nb_centres[dedans] += 1
+
+        cellules[nb_centres > 1] = CELLULE_FRONTIERE
+        cellules[frontieres] = CELLULE_FRONTIERE
+        return cls(geometries, codes, cellules.reshape(ny, nx), (x0, y0), pas)
+
+    @classmethod
+    def charger(cls, geometries, codes, chemin_geojson: Path) -> "GrilleDepartements":
+        """
+        Lit la grille en cache, ou la construit et l'enregistre.
+
+        Args:
+            geometries: Contours des départements lus dans chemin_geojson
+            codes: Code de chaque département, dans le même ordre
+            chemin_geojson: GeoJSON source (son empreinte valide le cache)
+
+        Returns:
+            Grille prête à l'emploi
+        """
+        chemin = chemin_grille(chemin_geojson)
+        empreinte = empreinte_fichier(chemin_geojson)
+        codes = [str(code) for code in codes]
+        try:
+            with np.load(chemin, allow_pickle=False) as cache:
+                if (cache["empreinte"].item() == empreinte
+                        and cache["version"].item() == VERSION_GRILLE
+                        and cache["pas"].item() == PAS_GRILLE
+                        and cache["codes"].tolist() == codes):
+                    return cls(geometries, codes, cache["cellules"],
+                               tuple(cache["origine"].tolist()), PAS_GRILLE)
+        except (OSError, KeyError, ValueError):
+            pass
+
+        grille = cls.construire(geometries, codes)
+        temporaire = chemin.with_name(chemin.name + ".tmp.npz")
+        np.savez_compressed(
+            temporaire, cellules=grille.cellules, origine=np.array(grille.origine),
+            pas=grille.pas, codes=np.array(codes), empreinte=empreinte,
+            version=VERSION_GRILLE,
+        )
+        os.replace(temporaire, chemin)
+        return grille
+
+    def indices(self, lon, lat, nb_workers: int = 1) -> np.ndarray:
+        """
+        Renvoie l'indice du département contenant chaque point.
+
+        Args:
+            lon: Longitudes (EPSG:4326)
+            lat: Latitudes (EPSG:4326)
+            nb_workers: Processus pour les points des cellules frontières
+                (0 = un par cœur)
+
+        Returns:
+            Indices dans codes, HORS_DEPARTEMENT pour un point hors de
+            tous les départements ou sans coordonnées
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        ny, nx = self.cellules.shape
+        with np.errstate(invalid="ignore"):
+            ix = np.floor((lon - self.origine[0]) / self.pas)
+            iy = np.floor((lat - self.origine[1]) / self.pas)
+        dans_grille = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+        resultat = np.full(len(lon), HORS_DEPARTEMENT, dtype=np.int64)
+        resultat[dans_grille] = self.cellules[iy[dans_grille].astype(np.intp),
+                                              ix[dans_grille].astype(np.intp)]
+
+        frontiere = np.flatnonzero(resultat == CELLULE_FRONTIERE)
+        if len(frontiere):
+            if self._contours is None:
+                self._contours = preparer_contours(self.geometries)
+            resultat[frontiere] = joindre_departements(
+                self.geometries, lon[frontiere], lat[frontiere], nb_workers, self._contours
+            )
+        return resultat
+
+    def departements(self, lon, lat, nb_workers: int = 1) -> np.ndarray:
+        """
+        Renvoie le code du département contenant chaque point.
+
+        Args:
+            lon: Longitudes (EPSG:4326)
+            lat: Latitudes (EPSG:4326)
+            nb_workers: Processus pour les points des cellules frontières
+                (0 = un par cœur)
+
+        Returns:
+            Codes des départements ('' hors de tous les départements)
+        """
+        indices = self.indices(lon, lat, nb_workers)
+        codes = np.append(self.codes, "")
+        return codes[indices]
+
+
+def comparer_jointures(nb_points: int, nb_workers: int = 0) -> dict:
+    """
+    Mesure sjoin, la jointure exacte parallèle et la grille sur des points
+    tirés au hasard dans l'emprise des départements.
+
+    Args:
+        nb_points: Nombre de points
+        nb_workers: Processus de la jointure exacte (0 = un par cœur)
+
+    Returns:
+        Durées en secondes par méthode
+    """
+    import geopandas as gpd
+    from src.utils.build_radars_departements import CHEMIN_GEOJSON, lire_departements
+
+    gdf_dept, col_code = lire_departements()
+    geometries = gdf_dept.geometry.values
+    minx, miny, maxx, maxy = gdf_dept.total_bounds
+    generateur = np.random.default_rng(0)
+    lon = generateur.uniform(minx, maxx, nb_points)
+    lat = generateur.uniform(miny, maxy, nb_points)
+    nb_workers = nb_workers or os.cpu_count() or 1
+
+    durees = {}
+    debut = time.perf_counter()
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lon, lat), crs="EPSG:4326")
+    joint = gpd.sjoin(points, gdf_dept[[col_code, "geometry"]], how="left", predicate="within")
+    reference = joint[~joint.index.duplicated()][col_code].fillna("").to_numpy()
+    durees["sjoin (1 cœur)"] = time.perf_counter() - debut
+
+    codes = np.append(gdf_dept[col_code].astype(str).to_numpy(dtype=object), "")
+    debut = time.perf_counter()
+    exacts = codes[joindre_departements(geometries, lon, lat, nb_workers)]
+    durees[f"jointure exacte ({nb_workers} processus)"] = time.perf_counter() - debut
+
+    grille = GrilleDepartements.charger(geometries, gdf_dept[col_code], CHEMIN_GEOJSON)
+    debut = time.perf_counter()
+    par_grille = grille.departements(lon, lat, nb_workers)
+    durees["grille"] = time.perf_counter() - debut
+
+    for methode, duree in durees.items():
+        print(f"{methode:<32} {duree:8.2f} s")
+    print(f"Résultats identiques à sjoin : "
+          f"{(exacts == reference).all() and (par_grille == reference).all()}")
+    return durees
+
+
+if __name__ == "__main__":
+    parseur = argparse.ArgumentParser(description="Comparaison des jointures départements")
+    parseur.add_argument("--points", type=int, default=1_000_000, metavar="N",
+                         help="nombre de points tirés au hasard (défaut 1 000 000)")
+    parseur.add_argument("--workers", type=int, default=0, metavar="N",
+                         help="processus de la jointure exacte (0 = un par cœur, défaut)")
+    arguments = parseur.parse_args()
+    comparer_jointures(arguments.points, arguments.workers)
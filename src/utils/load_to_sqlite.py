@@ -2,20 +2,57 @@
 Module de chargement des données nettoyées vers SQLite.
 Calcule également les périodes jour/nuit basées sur les éphémérides.
 """
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import hashlib
+import os
 import sqlite3
+import time
 import pandas as pd
 import numpy as np
 from astral import LocationInfo
 from astral.sun import sun
+import pyarrow as pa
+import pyarrow.dataset as ds
 import pytz
 
+from src.utils.cache_ephemerides import CacheEphemerides
+from src.utils.clean_data import MOIS_INCONNU, SCHEMA_PARQUET, lire_parquet_par_blocs
+from src.utils.get_data import ANNEES
+from src.utils.partitions import chemin_base
+from src.utils.positions import IndexPositions
+from src.utils.schema import (
+    COLONNES_VITESSES, appliquer_profil, copier_positions, creer_index,
+    creer_table_vitesses, creer_tables_suivi, enregistrer_source, lire_source,
+    migrer_schema, optimiser, supprimer_index, version_schema,
+)
+from src.utils.soleil import lever_coucher
+
 
 REPERTOIRE_NETTOYE = Path("data/cleaned")
-CHEMIN_DB = Path("data/database/vitesses.db")
 FUSEAU_HORAIRE = pytz.timezone("Europe/Paris")
 PRECISION_GRILLE = 1  # Arrondi à 0.1° pour optimisation
 TAILLE_BLOC = 400_000
+COLONNES_PARQUET = ["date", "lat", "lon", "vitesse_mesuree", "limitation"]
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+MOTEUR_EPHEMERIDES = "numpy"  # "numpy" (vectorisé) ou "astral" (référence)
+PROFIL_CHARGEMENT = "chargement"  # cf. schema.PROFILS_SQLITE
+PROFIL_AJOUT = "ajout"
+LIGNES_PAR_TRANSACTION = 2_000_000
+BLOCS_EN_VOL_PAR_WORKER = 2  # Blocs soumis par processus, pour borner la mémoire
+# Colonnes d'un bloc enrichi : lat / lon sont remplacées par position_id
+# au moment de l'insertion, par le seul processus qui écrit dans la base
+COLONNES_ENRICHIES = [
+    "date", "lat", "lon", "vitesse_mesuree", "limitation", "annee", "est_nuit",
+]
+INSERTION_VITESSES = (
+    f"INSERT INTO vitesses ({', '.join(COLONNES_VITESSES)}) "
+    f"VALUES ({', '.join('?' * len(COLONNES_VITESSES))});"
+)
+
+# Cache des éphémérides propre à chaque processus de calcul parallèle
+_CACHE_PROCESSUS = None
 
 
 def verifier_colonne_existe(conn: sqlite3.Connection, table: str, colonne: str) -> bool:
@@ -43,16 +80,25 @@ def localiser_paris(series_naive: pd.Series) -> pd.Series:
                                   nonexistent="shift_forward")
 
 
-def calculer_ephemerides(dates_positions: pd.DataFrame) -> pd.DataFrame:
+def calculer_ephemerides(dates_positions: pd.DataFrame,
+                         moteur: str = None) -> pd.DataFrame:
     """
     Calcule les heures de lever et coucher du soleil pour chaque position.
     
     Args:
         dates_positions: DataFrame avec colonnes date_only, lat_round, lon_round
+        moteur: "numpy" (calcul vectorisé) ou "astral" (boucle de référence),
+            MOTEUR_EPHEMERIDES par défaut
         
     Returns:
         DataFrame enrichi avec sunrise_local et sunset_local
     """
+    moteur = moteur or MOTEUR_EPHEMERIDES
+    if moteur == "numpy":
+        return calculer_ephemerides_numpy(dates_positions)
+    if moteur != "astral":
+        raise ValueError(f"Moteur d'éphémérides inconnu: {moteur}")
+    
     resultats = []
     
     for date, lat, lon in dates_positions.itertuples(index=False, name=None):
@@ -73,109 +119,731 @@ def calculer_ephemerides(dates_positions: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def calculer_periode_bloc(bloc: pd.DataFrame) -> pd.DataFrame:
+def calculer_ephemerides_numpy(dates_positions: pd.DataFrame) -> pd.DataFrame:
     """
-    Détermine la période (jour/nuit) pour un bloc de données.
+    Calcule les heures de lever et coucher du soleil en une seule passe NumPy.
     
     Args:
-        bloc: DataFrame avec colonnes rid, date, position
+        dates_positions: DataFrame avec colonnes date_only, lat_round, lon_round
         
     Returns:
-        DataFrame avec rid et periode
+        DataFrame enrichi avec sunrise_local et sunset_local
+    """
+    resultats = dates_positions[["date_only", "lat_round", "lon_round"]].copy()
+    lever, coucher = lever_coucher(
+        resultats["date_only"], resultats["lat_round"], resultats["lon_round"],
+        FUSEAU_HORAIRE,
+    )
+    resultats["sunrise_local"] = lever
+    resultats["sunset_local"] = coucher
+    return resultats.reset_index(drop=True)
+
+
+def ouvrir_cache_ephemerides(moteur: str = None) -> CacheEphemerides:
+    """Ouvre le cache persistant des éphémérides pour le moteur donné."""
+    return CacheEphemerides(FUSEAU_HORAIRE, PRECISION_GRILLE,
+                            moteur or MOTEUR_EPHEMERIDES)
+
+
+def afficher_stats_cache(cache: CacheEphemerides) -> None:
+    """Affiche le taux de succès du cache des éphémérides."""
+    total = cache.stats["succes"] + cache.stats["echecs"]
+    print(f"Cache éphémérides: {cache.taux_succes():.1%} de succès "
+          f"({cache.stats['succes']:,} / {total:,} clés)")
+
+
+def separer_position(positions: pd.Series) -> tuple:
+    """
+    Découpe une colonne position ("lat lon") en deux tableaux de flottants.
+    
+    La découpe n'est faite qu'une fois par position distincte.
+    
+    Args:
+        positions: Série de chaînes "lat lon"
+        
+    Returns:
+        Tuple (lat, lon) de tableaux NumPy (NaN si illisible)
+    """
+    codes, distinctes = pd.factorize(positions)
+    coords = pd.Series(distinctes, dtype="string").str.split(n=1, expand=True)
+    coords = coords.reindex(columns=[0, 1]).apply(pd.to_numeric, errors="coerce")
+    lat = np.append(coords[0].to_numpy(dtype=float), np.nan)
+    lon = np.append(coords[1].to_numpy(dtype=float), np.nan)
+    # Les valeurs manquantes ont le code -1, qui pointe sur le NaN ajouté
+    return lat[codes], lon[codes]
+
+
+def calculer_est_nuit(dates: pd.Series, lat, lon, moteur: str = None,
+                      cache: CacheEphemerides = None) -> np.ndarray:
     """
-    bloc = bloc.copy()
-    bloc["datetime"] = pd.to_datetime(bloc["date"], errors="coerce")
-    bloc = bloc.dropna(subset=["datetime", "position"]).copy()
+    Détermine pour chaque mesure si elle a eu lieu de nuit.
+    
+    Args:
+        dates: Série de datetimes naifs (heure locale)
+        lat: Latitudes
+        lon: Longitudes
+        moteur: Moteur d'éphémérides ("numpy" ou "astral")
+        cache: Cache persistant des éphémérides (None = tout recalculer)
+        
+    Returns:
+        Tableau de flottants : 1 = nuit, 0 = jour, NaN si date ou
+        position manquante
+    """
+    bloc = pd.DataFrame({
+        "datetime": pd.to_datetime(pd.Series(dates)).to_numpy(),
+        "lat": np.asarray(lat, dtype=float),
+        "lon": np.asarray(lon, dtype=float),
+    })
+    valides = bloc.notna().all(axis=1).to_numpy()
+    est_nuit = np.full(len(bloc), np.nan)
+    bloc = bloc[valides].copy()
+    if bloc.empty:
+        return est_nuit
+    
     bloc["datetime"] = localiser_paris(bloc["datetime"])
     bloc["date_only"] = bloc["datetime"].dt.date
     
-    # Extraction lat/lon
-    coords = bloc["position"].str.split(expand=True)
-    coords.columns = ["lat", "lon"]
-    bloc = pd.concat([bloc, coords], axis=1)
-    bloc["lat"] = pd.to_numeric(bloc["lat"], errors="coerce")
-    bloc["lon"] = pd.to_numeric(bloc["lon"], errors="coerce")
-    bloc = bloc.dropna(subset=["lat", "lon"]).copy()
-    
     # Arrondi pour optimisation
     bloc["lat_round"] = bloc["lat"].round(PRECISION_GRILLE)
     bloc["lon_round"] = bloc["lon"].round(PRECISION_GRILLE)
     
     # Calcul des éphémérides pour les clés uniques
     cles_uniques = bloc[["date_only", "lat_round", "lon_round"]].drop_duplicates()
-    ephemerides = calculer_ephemerides(cles_uniques)
+    if cache is None:
+        ephemerides = calculer_ephemerides(cles_uniques, moteur)
+    else:
+        ephemerides = cache.obtenir(
+            cles_uniques, lambda cles: calculer_ephemerides(cles, cache.moteur)
+        )
     
-    # Jointure et détermination période
+    # Jointure (ordre du bloc conservé) et détermination période
     bloc_enrichi = bloc.merge(
         ephemerides, 
         on=["date_only", "lat_round", "lon_round"], 
         how="left"
     )
     
-    bloc_enrichi["periode"] = np.where(
+    est_nuit[valides] = np.where(
         (bloc_enrichi["datetime"] >= bloc_enrichi["sunrise_local"]) & 
         (bloc_enrichi["datetime"] <= bloc_enrichi["sunset_local"]),
-        "jour", 
-        "nuit"
+        0, 
+        1
     )
+    return est_nuit
+
+
+def calculer_periode_bloc(bloc: pd.DataFrame, moteur: str = None,
+                          cache: CacheEphemerides = None) -> pd.DataFrame:
+    """
+    Détermine la période (jour/nuit) pour un bloc de données.
+    
+    Args:
+        bloc: DataFrame avec colonnes rid, date, position
+        moteur: Moteur d'éphémérides ("numpy" ou "astral")
+        cache: Cache persistant des éphémérides (None = tout recalculer)
+        
+    Returns:
+        DataFrame avec rid et periode
+    """
+    dates = pd.to_datetime(bloc["date"], errors="coerce", format=FORMAT_DATE)
+    lat, lon = separer_position(bloc["position"])
+    est_nuit = calculer_est_nuit(dates, lat, lon, moteur, cache)
+    
+    classes = ~np.isnan(est_nuit)
+    return pd.DataFrame({
+        "rid": bloc["rid"].to_numpy()[classes],
+        "periode": np.where(est_nuit[classes] == 1, "nuit", "jour"),
+    })
+
+
+def vers_secondes(dates: pd.Series) -> pd.Series:
+    """
+    Convertit des datetimes naifs en secondes depuis 1970 (heure locale).
+    
+    Args:
+        dates: Série de datetimes naifs
+        
+    Returns:
+        Série Int64 (valeur manquante si la date est manquante)
+    """
+    valeurs = pd.to_datetime(dates).to_numpy().astype("datetime64[s]")
+    secondes = pd.Series(valeurs.astype("int64"), dtype="Int64")
+    secondes[np.isnat(valeurs)] = pd.NA
+    return secondes
+
+
+def enrichir_bloc(bloc: pd.DataFrame, annee: int,
+                  cache: CacheEphemerides = None) -> pd.DataFrame:
+    """
+    Prépare un bloc nettoyé pour l'insertion dans le schéma typé.
     
-    return bloc_enrichi[["rid", "periode"]]
+    Args:
+        bloc: DataFrame avec colonnes date, position (ou lat/lon),
+            vitesse_mesuree, limitation
+        annee: Année des mesures
+        cache: Cache persistant des éphémérides
+        
+    Returns:
+        DataFrame aux colonnes COLONNES_ENRICHIES
+    """
+    bloc = bloc.reset_index(drop=True)
+    dates = pd.to_datetime(bloc["date"], errors="coerce")
+    if "lat" in bloc.columns:
+        lat = bloc["lat"].to_numpy(dtype=float)
+        lon = bloc["lon"].to_numpy(dtype=float)
+    else:
+        lat, lon = separer_position(bloc["position"])
+    
+    est_nuit = calculer_est_nuit(dates, lat, lon, cache=cache)
+    
+    return pd.DataFrame({
+        "date": vers_secondes(dates),
+        "lat": lat,
+        "lon": lon,
+        "vitesse_mesuree": bloc["vitesse_mesuree"].to_numpy(dtype="int64"),
+        "limitation": bloc["limitation"].to_numpy(dtype="int64"),
+        "annee": annee,
+        "est_nuit": pd.array(est_nuit, dtype="Int8"),
+    }, columns=COLONNES_ENRICHIES)
+
 
+def initialiser_processus(moteur: str, chemin_cache: Path) -> None:
+    """Ouvre, dans un processus de calcul, le cache en lecture seule."""
+    global _CACHE_PROCESSUS
+    _CACHE_PROCESSUS = CacheEphemerides(FUSEAU_HORAIRE, PRECISION_GRILLE, moteur,
+                                        chemin_cache, lecture_seule=True)
 
-def main():
-    """Charge les données CSV dans SQLite et calcule les périodes."""
-    fichiers = {"vitesse_2023_cleaned.csv": 2023}
+
+def enrichir_bloc_processus(bloc: pd.DataFrame, annee: int) -> tuple:
+    """
+    Enrichit un bloc dans un processus de calcul.
+    
+    Returns:
+        Tuple (bloc enrichi, nouvelles éphémérides à enregistrer ou None,
+        (succès, échecs) du cache pour ce bloc)
+    """
+    cache = _CACHE_PROCESSUS
+    avant = dict(cache.stats)
+    bloc_enrichi = enrichir_bloc(bloc, annee, cache)
+    stats = (cache.stats["succes"] - avant["succes"],
+             cache.stats["echecs"] - avant["echecs"])
+    return bloc_enrichi, cache.extraire_en_attente(), stats
+
+
+def enrichir_blocs(blocs, annee: int, cache: CacheEphemerides,
+                   nb_workers: int = 1):
+    """
+    Enrichit un flux de blocs, en parallèle si nb_workers > 1.
     
-    CHEMIN_DB.parent.mkdir(parents=True, exist_ok=True)
+    Les blocs sont répartis sur un ProcessPoolExecutor et rendus dans
+    leur ordre d'arrivée ; au plus BLOCS_EN_VOL_PAR_WORKER blocs par
+    processus sont en cours à la fois pour borner la mémoire. Le cache
+    disque n'est écrit que par le processus appelant.
     
-    # Import CSV vers SQLite
-    donnees_completes = []
-    for nom_fichier, annee in fichiers.items():
-        chemin_csv = REPERTOIRE_NETTOYE / nom_fichier
-        if not chemin_csv.exists():
-            raise FileNotFoundError(f"CSV introuvable: {chemin_csv}")
+    Args:
+        blocs: Itérable de DataFrames nettoyés
+        annee: Année des mesures
+        cache: Cache persistant des éphémérides
+        nb_workers: Nombre de processus (0 = un par cœur)
         
-        df = pd.read_csv(chemin_csv, sep=";", dtype={"date": "string"})
-        df["annee"] = annee
-        df["date"] = (pd.to_datetime(df["date"], errors="coerce")
-                        .dt.strftime("%Y-%m-%d %H:%M:%S"))
-        donnees_completes.append(df)
+    Yields:
+        DataFrames enrichis, dans l'ordre des blocs
+    """
+    nb_workers = nb_workers or os.cpu_count() or 1
+    if nb_workers == 1:
+        for bloc in blocs:
+            yield enrichir_bloc(bloc, annee, cache)
+        return
     
-    df_final = pd.concat(donnees_completes, ignore_index=True)
-    df_final["date"] = df_final["date"].astype(str)
+    def recuperer(futur):
+        bloc_enrichi, nouveaux, (succes, echecs) = futur.result()
+        if nouveaux is not None:
+            cache.enregistrer(nouveaux)
+        cache.stats["succes"] += succes
+        cache.stats["echecs"] += echecs
+        return bloc_enrichi
     
-    with sqlite3.connect(CHEMIN_DB) as conn:
-        df_final.to_sql("vitesses", conn, if_exists="replace", index=False)
-        print(f"Table créée: {len(df_final):,} lignes")
+    pool = ProcessPoolExecutor(nb_workers, initializer=initialiser_processus,
+                               initargs=(cache.moteur, cache.chemin))
+    en_vol = deque()
+    try:
+        for bloc in blocs:
+            en_vol.append(pool.submit(enrichir_bloc_processus, bloc, annee))
+            if len(en_vol) >= BLOCS_EN_VOL_PAR_WORKER * nb_workers:
+                yield recuperer(en_vol.popleft())
+        while en_vol:
+            yield recuperer(en_vol.popleft())
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def lignes_a_inserer(bloc: pd.DataFrame):
+    """
+    Convertit un bloc enrichi en tuples Python pour executemany.
+    
+    Args:
+        bloc: DataFrame aux colonnes COLONNES_VITESSES
         
-        # Ajout colonne periode si nécessaire
-        if not verifier_colonne_existe(conn, "vitesses", "periode"):
-            conn.execute("ALTER TABLE vitesses ADD COLUMN periode TEXT;")
-            conn.commit()
+    Returns:
+        Itérateur de tuples (valeurs manquantes → None)
+    """
+    colonnes = []
+    for nom in COLONNES_VITESSES:
+        colonne = bloc[nom]
+        valeurs = colonne.to_numpy(dtype=object)
+        if colonne.hasnans:
+            valeurs[colonne.isna().to_numpy()] = None
+        colonnes.append(valeurs)
+    return zip(*colonnes)
+
+
+def charger_flux(blocs, annee: int, chemin_db: Path = None,
+                 remplacer: bool = True, profil: str = None,
+                 nb_workers: int = 1, reconstruire_index: bool = None) -> int:
+    """
+    Insère un flux de blocs nettoyés dans la table vitesses.
+    
+    Chaque bloc est enrichi de sa période en mémoire puis inséré en une
+    seule fois : aucun fichier intermédiaire n'est écrit et seul un bloc
+    est présent en mémoire à la fois. Les insertions sont regroupées en
+    transactions explicites de LIGNES_PAR_TRANSACTION lignes, les index
+    sont (re)construits une seule fois à la fin, puis la base est analysée.
+    Avec remplacer, la base est construite dans un fichier temporaire qui
+    remplace l'ancienne d'un bloc à la fin : le profil de chargement (sans
+    journal sur disque) ne touche jamais une base existante, qu'une
+    interruption laisse intacte. Les PRAGMA du profil ne valent que pour
+    la connexion du chargement. Avec nb_workers > 1, la période est
+    calculée en parallèle (cf. enrichir_blocs) et cette fonction reste le
+    seul écrivain de la base. Les coordonnées de chaque bloc sont
+    remplacées par l'identifiant de leur position (cf. IndexPositions) ;
+    une base remplacée transmet ses positions à la nouvelle.
+    
+    Args:
+        blocs: Itérable de DataFrames nettoyés (cf. clean_data.nettoyer_flux)
+        annee: Année des mesures
+        chemin_db: Base SQLite de destination (base de l'année par défaut)
+        remplacer: Remplace la base par une base neuve (sinon ajoute à la
+            suite, après migration éventuelle de l'ancien schéma)
+        profil: Profil PRAGMA du chargement (par défaut PROFIL_CHARGEMENT
+            avec remplacer, PROFIL_AJOUT sinon)
+        nb_workers: Nombre de processus de calcul (0 = un par cœur)
+        reconstruire_index: Supprime les index avant et les recrée après
+            (par défaut seulement si la table est recréée ; un petit ajout
+            est plus rapide avec les index en place)
         
-        # Calcul des périodes par blocs
-        requete = "SELECT rowid AS rid, date, position FROM vitesses;"
-        total_mis_a_jour = 0
+    Returns:
+        Nombre de lignes insérées
+
+    Raises:
+        ValueError: Profil de chargement demandé pour un ajout
+    """
+    chemin_db = chemin_db or chemin_base(annee)
+    chemin_db.parent.mkdir(parents=True, exist_ok=True)
+    profil = profil or (PROFIL_CHARGEMENT if remplacer else PROFIL_AJOUT)
+    if profil == PROFIL_CHARGEMENT and not remplacer:
+        raise ValueError("Le profil de chargement est réservé à une base neuve")
+    # Base neuve construite à part, pour ne jamais abîmer l'ancienne
+    chemin_ecrit = chemin_db.with_name(chemin_db.name + ".tmp") if remplacer else chemin_db
+    if remplacer:
+        chemin_ecrit.unlink(missing_ok=True)
+    total = 0
+    en_cours = 0
+    duree_insertion = 0.0
+    cache = ouvrir_cache_ephemerides()
+    debut = time.perf_counter()
+    
+    # Mode autocommit : les transactions sont ouvertes explicitement
+    conn = sqlite3.connect(chemin_ecrit, isolation_level=None)
+    try:
+        appliquer_profil(conn, profil)
+        nouvelle_table = remplacer or version_schema(conn) == 0
+        if nouvelle_table:
+            creer_table_vitesses(conn)
+            if remplacer:
+                copier_positions(conn, chemin_db)
+        else:
+            migrer_schema(conn)
+        if reconstruire_index is None:
+            reconstruire_index = nouvelle_table
+        if reconstruire_index:
+            supprimer_index(conn)
+        index_positions = IndexPositions(conn)
         
-        for i, bloc in enumerate(pd.read_sql_query(requete, conn, 
-                                                   chunksize=TAILLE_BLOC)):
-            resultats = calculer_periode_bloc(bloc)
-            
-            conn.executemany(
-                "UPDATE vitesses SET periode=? WHERE rowid=?;",
-                [(p, rid) for rid, p in resultats.itertuples(index=False, name=None)]
+        conn.execute("BEGIN;")
+        for bloc_enrichi in enrichir_blocs(blocs, annee, cache, nb_workers):
+            debut_insertion = time.perf_counter()
+            bloc_enrichi["position_id"] = index_positions.identifiants(
+                bloc_enrichi["lat"], bloc_enrichi["lon"]
             )
-            conn.commit()
-            total_mis_a_jour += len(resultats)
+            conn.executemany(INSERTION_VITESSES, lignes_a_inserer(bloc_enrichi))
+            en_cours += len(bloc_enrichi)
+            if en_cours >= LIGNES_PAR_TRANSACTION:
+                conn.execute("COMMIT;")
+                conn.execute("BEGIN;")
+                en_cours = 0
+            duree_insertion += time.perf_counter() - debut_insertion
+            total += len(bloc_enrichi)
+        conn.execute("COMMIT;")
+        
+        duree = time.perf_counter() - debut
+        etat_table = "créée" if nouvelle_table else "complétée"
+        print(f"Table {etat_table}: {total:,} lignes (périodes calculées)")
+        print(f"Débit (profil {profil}): {total / max(duree, 1e-9):,.0f} lignes/s au total, "
+              f"{total / max(duree_insertion, 1e-9):,.0f} lignes/s en insertion")
+        
+        if reconstruire_index:
+            creer_index(conn)
+            optimiser(conn)
+        else:
+            conn.execute("PRAGMA optimize;")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK;")
+        conn.close()
+        if remplacer:
+            chemin_ecrit.unlink(missing_ok=True)
+        raise
+    conn.close()
+    if remplacer:
+        os.replace(chemin_ecrit, chemin_db)
+    
+    afficher_stats_cache(cache)
+    cache.fermer()
+    return total
+
+
+def nom_fichier_nettoye(annee: int) -> str:
+    """Renvoie le nom du CSV nettoyé d'une année."""
+    return f"vitesse_{annee}_cleaned.csv"
+
+
+def lire_blocs_nettoyes(nom_fichier: str, annee: int):
+    """
+    Lit les données nettoyées d'une année par blocs de TAILLE_BLOC lignes.
+    
+    Le jeu Parquet est utilisé s'il existe (colonnes déjà typées),
+    sinon le CSV nettoyé.
+    
+    Args:
+        nom_fichier: Nom du CSV nettoyé dans REPERTOIRE_NETTOYE
+        annee: Année des mesures
+        
+    Returns:
+        Itérateur de DataFrames nettoyés
+    """
+    chemin_csv = REPERTOIRE_NETTOYE / nom_fichier
+    chemin_parquet = REPERTOIRE_NETTOYE / f"vitesse_{annee}_parquet"
+    
+    if chemin_parquet.exists():
+        return lire_parquet_par_blocs(chemin_parquet, colonnes=COLONNES_PARQUET,
+                                      taille_bloc=TAILLE_BLOC)
+    if chemin_csv.exists():
+        return pd.read_csv(chemin_csv, sep=";", dtype={"date": "string"},
+                           chunksize=TAILLE_BLOC)
+    raise FileNotFoundError(f"CSV introuvable: {chemin_csv}")
+
+
+def lister_sources(nom_fichier: str, annee: int) -> list:
+    """
+    Liste les sources suivies pour le chargement incrémental d'une année.
+    
+    Avec le jeu Parquet, chaque partition mensuelle est une source ;
+    sinon le CSV nettoyé est une source unique.
+    
+    Args:
+        nom_fichier: Nom du CSV nettoyé dans REPERTOIRE_NETTOYE
+        annee: Année des mesures
+        
+    Returns:
+        Liste de tuples (nom de la source, chemin, mois ou None)
+    """
+    chemin_csv = REPERTOIRE_NETTOYE / nom_fichier
+    chemin_parquet = REPERTOIRE_NETTOYE / f"vitesse_{annee}_parquet"
+    
+    if chemin_parquet.exists():
+        return [
+            (f"{chemin_parquet.name}/{partition.name}", partition,
+             partition.name.split("=", 1)[1])
+            for partition in sorted(chemin_parquet.glob("mois=*"))
+        ]
+    if chemin_csv.exists():
+        return [(nom_fichier, chemin_csv, None)]
+    raise FileNotFoundError(f"CSV introuvable: {chemin_csv}")
+
+
+def calculer_empreinte(chemin: Path) -> str:
+    """
+    Calcule l'empreinte SHA-256 d'un fichier ou d'un répertoire.
+    
+    Args:
+        chemin: Fichier, ou répertoire (noms et contenus de ses fichiers)
+        
+    Returns:
+        Empreinte hexadécimale
+    """
+    empreinte = hashlib.sha256()
+    fichiers = [chemin]
+    if chemin.is_dir():
+        fichiers = sorted(f for f in chemin.rglob("*") if f.is_file())
+    
+    for fichier in fichiers:
+        empreinte.update(fichier.name.encode("utf-8"))
+        with open(fichier, "rb") as f:
+            for morceau in iter(lambda: f.read(1 << 20), b""):
+                empreinte.update(morceau)
+    return empreinte.hexdigest()
+
+
+def lire_blocs_source(chemin: Path, mois: str = None, apres: int = None):
+    """
+    Lit une source nettoyée en ne gardant que les mesures postérieures à apres.
+    
+    Args:
+        chemin: CSV nettoyé, ou partition Parquet mois=AAAA-MM
+        mois: Mois de la partition Parquet (None pour un CSV)
+        apres: Date maximale déjà chargée, en secondes (None = tout lire)
+        
+    Yields:
+        DataFrames nettoyés
+    """
+    seuil = None if apres is None else pd.Timestamp(apres, unit="s")
+    
+    if mois is not None:
+        filtre = None
+        if seuil is not None:
+            filtre = ds.field("date") > pa.scalar(seuil.to_pydatetime(),
+                                                  type=pa.timestamp("s"))
+        yield from lire_parquet_par_blocs(chemin.parent, COLONNES_PARQUET, [mois],
+                                          filtre, TAILLE_BLOC)
+        return
+    
+    for bloc in pd.read_csv(chemin, sep=";", dtype={"date": "string"},
+                            chunksize=TAILLE_BLOC):
+        if seuil is not None:
+            bloc = bloc[pd.to_datetime(bloc["date"], errors="coerce") > seuil]
+        if len(bloc):
+            yield bloc
+
+
+def compter_lignes_source(chemin: Path, mois: str = None, jusqua: int = None) -> tuple:
+    """
+    Compte les mesures d'une source, et celles qui ne sont pas postérieures à jusqua.
+    
+    Les mesures sans date sont comptées avec ces dernières : rien ne les
+    distingue des mesures déjà chargées.
+    
+    Args:
+        chemin: CSV nettoyé, ou partition Parquet mois=AAAA-MM
+        mois: Mois de la partition Parquet (None pour un CSV)
+        jusqua: Date maximale déjà chargée, en secondes (None = aucune)
+        
+    Returns:
+        Tuple (nombre de mesures, nombre de mesures sans date ou datées
+        au plus de jusqua)
+    """
+    seuil = None if jusqua is None else pd.Timestamp(jusqua, unit="s")
+    
+    if mois is not None:
+        jeu = ds.dataset(chemin.parent, format="parquet", partitioning="hive",
+                         schema=SCHEMA_PARQUET)
+        dans_mois = ds.field("mois") == mois
+        anciennes = ds.field("date").is_null()
+        if seuil is not None:
+            anciennes = anciennes | (ds.field("date") <= pa.scalar(
+                seuil.to_pydatetime(), type=pa.timestamp("s")))
+        return jeu.count_rows(filter=dans_mois), jeu.count_rows(filter=dans_mois & anciennes)
+    
+    total = nb_anciennes = 0
+    for bloc in pd.read_csv(chemin, sep=";", usecols=["date"], dtype={"date": "string"},
+                            chunksize=TAILLE_BLOC):
+        dates = pd.to_datetime(bloc["date"], errors="coerce")
+        anciennes = dates.isna()
+        if seuil is not None:
+            anciennes |= dates <= seuil
+        total += len(bloc)
+        nb_anciennes += int(anciennes.sum())
+    return total, nb_anciennes
+
+
+def mesurer_chargement(conn: sqlite3.Connection, rowid_avant: int,
+                       mois: str = None) -> tuple:
+    """
+    Date maximale et nombre des lignes insérées après rowid_avant.
+    
+    Args:
+        conn: Connexion SQLite
+        rowid_avant: Dernier rowid présent avant le chargement
+        mois: Restreint au mois "AAAA-MM", ou aux lignes sans date pour
+            MOIS_INCONNU (None = toutes les lignes)
         
-        print(f"Périodes calculées: {total_mis_a_jour:,} lignes")
+    Returns:
+        Tuple (date_max en secondes ou None, nombre de lignes)
+    """
+    requete = "SELECT MAX(date), COUNT(*) FROM vitesses WHERE rowid > ?"
+    parametres = [rowid_avant]
+    if mois == MOIS_INCONNU:
+        requete += " AND date IS NULL"
+    elif mois is not None:
+        debut = pd.Timestamp(f"{mois}-01")
+        fin = debut + pd.offsets.MonthBegin(1)
+        requete += " AND date >= ? AND date < ?"
+        parametres += [debut.value // 10**9, fin.value // 10**9]
+    return conn.execute(requete, parametres).fetchone()
+
+
+def dernier_rowid(conn: sqlite3.Connection) -> int:
+    """Renvoie le plus grand rowid de la table vitesses (0 si absente ou vide)."""
+    if version_schema(conn) == 0:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM vitesses;").fetchone()[0]
+
+
+def charger_incremental_annee(annee: int, nb_workers: int = 1) -> int:
+    """
+    Ajoute à la base d'une année les seules mesures nouvelles de ses sources.
+    
+    Une source dont l'empreinte n'a pas changé est ignorée ; pour une
+    source modifiée, seules les mesures postérieures à sa date maximale
+    déjà chargée sont insérées (et leur période calculée). Ce n'est sûr
+    que si la source a seulement été complétée à la fin : ses mesures sans
+    date ou antérieures à cette date doivent être aussi nombreuses que lors
+    du dernier chargement et que dans la base. Sinon (mesure tardive,
+    corrigée, supprimée ou sans date), la base est reconstruite entièrement.
+    
+    Args:
+        annee: Année des mesures
+        nb_workers: Nombre de processus de calcul (0 = un par cœur)
         
-        # Création d'index pour performances
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_date ON vitesses(date);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_position ON vitesses(position);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_periode ON vitesses(periode);")
-        conn.commit()
+    Returns:
+        Nombre de lignes ajoutées (chargées en cas de reconstruction)
+    """
+    chemin_db = chemin_base(annee)
+    chemin_db.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
+    
+    # Base construite sans suivi des sources (ex. pipeline fusionné) :
+    # impossible de savoir ce qui est déjà chargé, on reconstruit
+    conn = sqlite3.connect(chemin_db)
+    creer_tables_suivi(conn)
+    non_suivie = dernier_rowid(conn) > 0 and not conn.execute(
+        "SELECT COUNT(*) FROM sources;"
+    ).fetchone()[0]
+    conn.close()
+    if non_suivie:
+        print(f"Base {annee} sans suivi des sources: reconstruction complète")
+        return charger_annee(annee, nb_workers)
+    
+    # Toutes les sources sont vérifiées avant d'en charger une seule
+    modifiees = []
+    conn = sqlite3.connect(chemin_db)
+    for source, chemin, mois in lister_sources(nom_fichier_nettoye(annee), annee):
+        empreinte = calculer_empreinte(chemin)
+        etat = lire_source(conn, source) if version_schema(conn) else None
+        if etat and etat["empreinte"] == empreinte:
+            print(f"{source}: inchangée")
+            continue
+        
+        date_max = etat["date_max"] if etat else None
+        nb_source, nb_anciennes = compter_lignes_source(chemin, mois, date_max)
+        if etat:
+            nb_base = mesurer_chargement(conn, 0, mois)[1]
+            # Sans date maximale, rien ne sépare les nouvelles mesures datées
+            # des mesures sans date déjà chargées
+            situable = date_max is not None or nb_anciennes == nb_source
+            if not (situable and nb_anciennes == etat["nb_lignes"] == nb_base):
+                conn.close()
+                print(f"Attention: {source} modifiée avant sa dernière date chargée "
+                      f"({nb_anciennes:,} mesures anciennes ou sans date, "
+                      f"{etat['nb_lignes']:,} au dernier chargement, {nb_base:,} en base): "
+                      "reconstruction complète")
+                return charger_annee(annee, nb_workers)
+        modifiees.append((source, chemin, mois, empreinte, etat, nb_source, nb_anciennes))
+    conn.close()
+    
+    for source, chemin, mois, empreinte, etat, nb_source, nb_anciennes in modifiees:
+        conn = sqlite3.connect(chemin_db)
+        rowid_avant = dernier_rowid(conn)
+        conn.close()
+        
+        apres = etat["date_max"] if etat else None
+        if not etat or nb_source > nb_anciennes:
+            charger_flux(lire_blocs_source(chemin, mois, apres), annee, chemin_db,
+                         remplacer=False, profil=PROFIL_AJOUT, nb_workers=nb_workers)
+        
+        conn = sqlite3.connect(chemin_db)
+        date_max, nb_lignes = mesurer_chargement(conn, rowid_avant)
+        if etat:
+            dates = [d for d in (date_max, etat["date_max"]) if d is not None]
+            date_max = max(dates) if dates else None
+        # Nombre réel de mesures de la source, comparé au prochain chargement
+        enregistrer_source(conn, source, annee, empreinte, date_max, nb_source)
+        conn.close()
+        
+        print(f"{source}: {nb_lignes:,} nouvelles lignes")
+        total += nb_lignes
+    
+    return total
+
+
+def charger_incremental(nb_workers: int = 1, annees: list = None) -> int:
+    """
+    Ajoute les seules mesures nouvelles de chaque année (cf. charger_incremental_annee).
+    
+    Args:
+        nb_workers: Nombre de processus de calcul (0 = un par cœur)
+        annees: Années à mettre à jour (None = toutes celles de RESSOURCES)
+        
+    Returns:
+        Nombre de lignes ajoutées
+    """
+    return sum(charger_incremental_annee(annee, nb_workers)
+               for annee in annees or ANNEES)
+
+
+def charger_annee(annee: int, nb_workers: int = 1) -> int:
+    """
+    Reconstruit entièrement la base d'une année.
+    
+    L'état de chaque source est ensuite enregistré pour les chargements
+    incrémentaux suivants.
+    
+    Args:
+        annee: Année des mesures
+        nb_workers: Nombre de processus de calcul (0 = un par cœur)
+        
+    Returns:
+        Nombre de lignes chargées
+    """
+    chemin_db = chemin_base(annee)
+    nom_fichier = nom_fichier_nettoye(annee)
+    
+    # Chaque bloc est enrichi de sa période puis inséré une seule fois
+    blocs = lire_blocs_nettoyes(nom_fichier, annee)
+    total = charger_flux(blocs, annee, chemin_db, remplacer=True,
+                         nb_workers=nb_workers, reconstruire_index=True)
+    
+    conn = sqlite3.connect(chemin_db)
+    for source, chemin, mois in lister_sources(nom_fichier, annee):
+        date_max, nb_lignes = mesurer_chargement(conn, 0, mois)
+        enregistrer_source(conn, source, annee, calculer_empreinte(chemin),
+                           date_max, nb_lignes)
+    conn.close()
+    return total
+
+
+def main(nb_workers: int = 1, annees: list = None):
+    """
+    Charge les données nettoyées dans SQLite avec leur période jour/nuit.
+    
+    Chaque année est chargée dans sa propre base (cf. partitions).
+    
+    Args:
+        nb_workers: Nombre de processus de calcul (0 = un par cœur)
+        annees: Années à charger (None = toutes celles de RESSOURCES)
+    """
+    for annee in annees or ANNEES:
+        charger_annee(annee, nb_workers)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
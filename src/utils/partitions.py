@@ -0,0 +1,170 @@
+"""
+Stockage des mesures partitionné par année.
+
+Chaque année a sa propre base SQLite (data/database/vitesses_AAAA.db), avec
+la table vitesses de schema.py et ses tables de suivi. Les pipelines de
+deux années écrivent dans deux fichiers différents et peuvent donc tourner
+en parallèle ; une requête sur une année n'ouvre que son fichier et ses
+index restent à la taille d'une année.
+
+Pour interroger plusieurs années, connecter() attache leurs fichiers à une
+même connexion et expose une vue temporaire vitesses qui les réunit.
+"""
+from pathlib import Path
+import sqlite3
+
+from src.utils.cube import CUBOIDES
+from src.utils.schema import (
+    COLONNES_VITESSES, creer_index, creer_table_vitesses, creer_tables_suivi,
+    migrer_schema, optimiser,
+)
+
+
+REPERTOIRE_DB = Path("data/database")
+NOM_BASE_UNIQUE = "vitesses.db"  # Ancien stockage, toutes années confondues
+LIMITE_ATTACHEES = 10  # SQLITE_MAX_ATTACHED par défaut
+TABLES_REUNIES = ["vitesses", "mesures", *CUBOIDES, "histogramme_depassements"]
+
+
+def chemin_base(annee: int) -> Path:
+    """Renvoie le chemin de la base SQLite d'une année."""
+    return REPERTOIRE_DB / f"vitesses_{annee}.db"
+
+
+def annees_chargees() -> list:
+    """
+    Liste les années dont la base SQLite existe.
+
+    Returns:
+        Années triées
+    """
+    annees = []
+    for chemin in REPERTOIRE_DB.glob("vitesses_*.db"):
+        suffixe = chemin.stem.split("_", 1)[1]
+        if suffixe.isdigit():
+            annees.append(int(suffixe))
+    return sorted(annees)
+
+
+def connecter(annees: list = None) -> sqlite3.Connection:
+    """
+    Ouvre une connexion sur la table vitesses d'une ou plusieurs années.
+
+    Pour une seule année, la base de l'année est ouverte directement.
+    Sinon, les bases sont attachées à une connexion en mémoire et une vue
+    temporaire par table de TABLES_REUNIES les réunit (UNION ALL) : SQLite
+    y propage les conditions WHERE, chaque partition utilise ses propres
+    index. La vue d'un cuboïde n'est créée que si toutes les années l'ont.
+    Les identifiants position_id sont propres à chaque base : sur plusieurs
+    années, les coordonnées et départements se lisent dans la vue mesures.
+
+    Args:
+        annees: Années à interroger (None = toutes les années chargées)
+
+    Returns:
+        Connexion SQLite exposant une table ou une vue vitesses (et cuboïdes)
+    """
+    annees = sorted(annees or annees_chargees())
+    if not annees:
+        raise FileNotFoundError(f"Aucune base annuelle dans {REPERTOIRE_DB}")
+    if len(annees) > LIMITE_ATTACHEES:
+        raise ValueError(f"Au plus {LIMITE_ATTACHEES} années par connexion")
+    if len(annees) == 1:
+        return sqlite3.connect(chemin_base(annees[0]))
+
+    conn = sqlite3.connect(":memory:")
+    for annee in annees:
+        conn.execute(f"ATTACH DATABASE ? AS annee_{int(annee)};",
+                     (str(chemin_base(annee)),))
+    for table in TABLES_REUNIES:
+        presente = all(
+            conn.execute(f"SELECT 1 FROM annee_{int(annee)}.sqlite_master "
+                         "WHERE type IN ('table', 'view') AND name = ?;",
+                         (table,)).fetchone()
+            for annee in annees
+        )
+        if not presente:
+            continue
+        union = " UNION ALL ".join(
+            f"SELECT * FROM annee_{int(annee)}.{table}" for annee in annees
+        )
+        conn.execute(f"CREATE TEMP VIEW {table} AS {union};")
+    return conn
+
+
+def separer_base_unique() -> list:
+    """
+    Répartit l'ancienne base vitesses.db en une base par année.
+
+    Les années qui ont déjà leur base sont ignorées. L'état des sources
+    est recopié pour que le chargement incrémental reprenne là où il en
+    était ; les agrégats, dont les filigranes portent sur les rowid de
+    l'ancienne base, seront reconstruits. L'ancienne base est renommée
+    en vitesses.db.ancien, et peut être supprimée.
+
+    Returns:
+        Années créées
+    """
+    chemin_unique = REPERTOIRE_DB / NOM_BASE_UNIQUE
+    if not chemin_unique.exists():
+        return []
+
+    print("Répartition de la base vitesses.db par année...")
+    conn = sqlite3.connect(chemin_unique)
+    migrer_schema(conn)
+    creer_tables_suivi(conn)
+    annees = [ligne[0] for ligne in
+              conn.execute("SELECT DISTINCT annee FROM vitesses ORDER BY annee;")]
+    colonnes = ", ".join(COLONNES_VITESSES)
+
+    creees = []
+    for annee in annees:
+        chemin = chemin_base(annee)
+        if chemin.exists():
+            continue
+        cible = sqlite3.connect(chemin)
+        creer_table_vitesses(cible)
+        cible.close()
+
+        conn.execute("ATTACH DATABASE ? AS cible;", (str(chemin),))
+        conn.execute(
+            "INSERT INTO cible.positions SELECT * FROM positions WHERE id IN "
+            "(SELECT position_id FROM vitesses WHERE annee = ?);",
+            (annee,),
+        )
+        conn.execute(
+            f"INSERT INTO cible.vitesses ({colonnes}) "
+            f"SELECT {colonnes} FROM vitesses WHERE annee = ? ORDER BY rowid;",
+            (annee,),
+        )
+        conn.execute("INSERT INTO cible.sources SELECT * FROM sources WHERE annee = ?;",
+                     (annee,))
+        conn.commit()
+        conn.execute("DETACH DATABASE cible;")
+
+        cible = sqlite3.connect(chemin)
+        creer_index(cible)
+        optimiser(cible)
+        cible.close()
+        creees.append(annee)
+        print(f"  {annee}: {chemin}")
+
+    conn.close()
+    chemin_unique.rename(chemin_unique.with_name(NOM_BASE_UNIQUE + ".ancien"))
+    return creees
+
+
+def migrer_bases() -> list:
+    """
+    Met au schéma courant les bases annuelles construites avec un ancien schéma.
+
+    Returns:
+        Années migrées
+    """
+    migrees = []
+    for annee in annees_chargees():
+        conn = sqlite3.connect(chemin_base(annee))
+        if migrer_schema(conn):
+            migrees.append(annee)
+        conn.close()
+    return migrees
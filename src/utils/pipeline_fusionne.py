@@ -0,0 +1,34 @@
+"""
+Pipeline fusionné téléchargement → nettoyage → chargement SQLite.
+
+Le corps HTTP est diffusé à travers une chaîne de générateurs jusqu'aux
+insertions par lots dans SQLite : aucun CSV intermédiaire n'est écrit et
+la mémoire reste bornée à un bloc. La table vitesses obtenue est
+identique à celle du pipeline par étapes.
+"""
+from src.utils.get_data import RESSOURCES, flux_ressource
+from src.utils.clean_data import nettoyer_flux, nouvelles_stats
+from src.utils.load_to_sqlite import charger_flux
+
+
+def main(nb_workers: int = 1, annees: list = None):
+    """
+    Construit les bases annuelles directement depuis Data.gouv.fr.
+
+    Args:
+        nb_workers: Nombre de processus de calcul (0 = un par cœur)
+        annees: Années à construire (None = toutes celles de RESSOURCES)
+    """
+    for annee, id_ressource in RESSOURCES.items():
+        if annees is not None and int(annee) not in annees:
+            continue
+        morceaux = flux_ressource(id_ressource)
+        stats = nouvelles_stats()
+        blocs = nettoyer_flux(morceaux, stats=stats)
+        charger_flux(blocs, int(annee), remplacer=True, nb_workers=nb_workers)
+        print(f"  {annee}: {stats['lignes_lues']:,} lignes lues, "
+              f"{stats['lignes_conservees']:,} conservées")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Table de dimension des positions de mesure.
+
+Les voitures radars repassent sans cesse aux mêmes positions : chaque
+position distincte est stockée une seule fois dans la table positions
+(schema.py), avec un identifiant entier que la table vitesses référence.
+Le département et la région d'une position sont calculés une seule fois,
+à sa première apparition ; regrouper une mesure par département devient
+une jointure SQL sur la clé primaire de positions.
+"""
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+REGIONS = {
+    "Auvergne-Rhône-Alpes": ["01", "03", "07", "15", "26", "38", "42", "43",
+                             "63", "69", "73", "74"],
+    "Bourgogne-Franche-Comté": ["21", "25", "39", "58", "70", "71", "89", "90"],
+    "Bretagne": ["22", "29", "35", "56"],
+    "Centre-Val de Loire": ["18", "28", "36", "37", "41", "45"],
+    "Corse": ["2A", "2B"],
+    "Grand Est": ["08", "10", "51", "52", "54", "55", "57", "67", "68", "88"],
+    "Hauts-de-France": ["02", "59", "60", "62", "80"],
+    "Île-de-France": ["75", "77", "78", "91", "92", "93", "94", "95"],
+    "Normandie": ["14", "27", "50", "61", "76"],
+    "Nouvelle-Aquitaine": ["16", "17", "19", "23", "24", "33", "40", "47",
+                           "64", "79", "86", "87"],
+    "Occitanie": ["09", "11", "12", "30", "31", "32", "34", "46", "48", "65",
+                  "66", "81", "82"],
+    "Pays de la Loire": ["44", "49", "53", "72", "85"],
+    "Provence-Alpes-Côte d'Azur": ["04", "05", "06", "13", "83", "84"],
+}
+
+REGION_PAR_DEPARTEMENT = {
+    departement: region
+    for region, departements in REGIONS.items()
+    for departement in departements
+}
+
+
+class IndexPositions:
+    """
+    Correspondance (lat, lon) → identifiant de la table positions.
+
+    Les positions connues sont lues une fois à l'ouverture ; les nouvelles
+    reçoivent les identifiants suivants et sont insérées par lot, dans la
+    transaction en cours de l'appelant (seul écrivain de la base).
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Connexion à la base de l'année (table positions créée)
+        """
+        self.conn = conn
+        self.identifiants_connus = {
+            (lat, lon): identifiant
+            for identifiant, lat, lon in conn.execute("SELECT id, lat, lon FROM positions;")
+        }
+        self.prochain = max(self.identifiants_connus.values(), default=0) + 1
+
+    def identifiants(self, lat, lon) -> pd.array:
+        """
+        Renvoie l'identifiant de chaque position, en créant les nouvelles.
+
+        Args:
+            lat: Latitudes (NaN si inconnue)
+            lon: Longitudes (NaN si inconnue)
+
+        Returns:
+            Tableau Int64 des identifiants (NA si la position est inconnue)
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        valides = ~(np.isnan(lat) | np.isnan(lon))
+        resultat = pd.array(np.full(len(lat), pd.NA), dtype="Int64")
+        if not valides.any():
+            return resultat
+
+        # Une recherche par position distincte du bloc, pas par ligne ; le
+        # couple (lat, lon) est factorisé comme un seul nombre complexe
+        codes, uniques = pd.factorize(lat[valides] + 1j * lon[valides])
+        identifiants_uniques = np.empty(len(uniques), dtype=np.int64)
+        nouvelles = []
+        for rang, cle in enumerate(zip(uniques.real.tolist(), uniques.imag.tolist())):
+            identifiant = self.identifiants_connus.get(cle)
+            if identifiant is None:
+                identifiant = self.prochain
+                self.prochain += 1
+                self.identifiants_connus[cle] = identifiant
+                nouvelles.append((identifiant, *cle))
+            identifiants_uniques[rang] = identifiant
+
+        if nouvelles:
+            self.conn.executemany(
+                "INSERT INTO positions (id, lat, lon) VALUES (?, ?, ?);", nouvelles
+            )
+        resultat[valides] = identifiants_uniques[codes]
+        return resultat
+
+
+def rattacher_departements(conn: sqlite3.Connection, nb_workers: int = 1) -> int:
+    """
+    Renseigne le département et la région des positions qui n'en ont pas.
+
+    Seules les positions jamais rattachées sont recherchées, dans la
+    grille des départements (cf. grille_departements). Sans geopandas ou
+    sans GeoJSON, elles restent à NULL et seront rattachées à un prochain
+    appel (le cube, qui les comptait hors départements, est alors
+    reconstruit : cf. cube.actualiser_cube).
+
+    Args:
+        conn: Connexion à la base de l'année
+        nb_workers: Processus pour la jointure exacte aux frontières
+            (0 = un par cœur)
+
+    Returns:
+        Nombre de positions rattachées
+    """
+    positions = pd.read_sql_query(
+        "SELECT id, lat, lon FROM positions WHERE departement IS NULL;", conn
+    )
+    if positions.empty:
+        return 0
+
+    try:
+        from src.utils.build_radars_departements import lire_grille_departements
+        grille = lire_grille_departements()
+    except (ImportError, FileNotFoundError) as e:
+        print(f"Attention: départements des positions non renseignés ({e})")
+        return 0
+
+    codes = grille.departements(positions["lon"], positions["lat"], nb_workers).tolist()
+    conn.executemany(
+        "UPDATE positions SET departement = ?, region = ? WHERE id = ?;",
+        zip(codes, [REGION_PAR_DEPARTEMENT.get(code) for code in codes],
+            positions["id"].tolist()),
+    )
+    return len(positions)
@@ -0,0 +1,523 @@
+"""
+Schéma typé et versionné de la table vitesses.
+
+Version 3 (STRICT) :
+- date : INTEGER, secondes depuis 1970 en heure locale (Europe/Paris),
+  relisible avec datetime(date, 'unixepoch')
+- position_id : INTEGER, identifiant dans la table de dimension positions
+- est_nuit : INTEGER, 1 = nuit, 0 = jour, NULL = indéterminé
+- depassement : colonne générée (vitesse_mesuree - limitation)
+
+La table positions garde chaque position distincte une seule fois (lat,
+lon REAL) avec son département et sa région, renseignés une fois pour
+toutes (voir positions.py). La vue mesures rejoint les deux tables pour
+les lectures qui ont besoin des coordonnées.
+
+La version 1 est l'ancienne table créée par DataFrame.to_sql (date,
+position et periode en TEXT) ; la version 2 stockait lat / lon dans
+chaque ligne. migrer_schema les convertit sur place.
+
+Deux tables de suivi accompagnent vitesses pour le chargement incrémental :
+sources (empreinte et date maximale chargée par fichier ou partition) et
+filigranes (dernier rowid intégré par chaque agrégat du dashboard, et
+empreinte des sources à ce moment ; cf. actualiser_agregat).
+
+Les profils PRAGMA règlent la connexion selon l'usage : "chargement" pour
+une construction en masse dans un fichier neuf (journal en mémoire, pas
+de fsync, gros cache), "ajout" pour compléter une base existante. Ils ne
+valent que pour la connexion qui les applique.
+"""
+from pathlib import Path
+import hashlib
+import sqlite3
+
+
+VERSION_SCHEMA = 3
+
+COLONNES_VITESSES = [
+    "date", "position_id", "vitesse_mesuree", "limitation", "annee", "est_nuit",
+]
+
+CREATION_VITESSES = """
+    CREATE TABLE vitesses (
+        date INTEGER,
+        position_id INTEGER REFERENCES positions (id),
+        vitesse_mesuree INTEGER NOT NULL,
+        limitation INTEGER NOT NULL,
+        annee INTEGER NOT NULL,
+        est_nuit INTEGER CHECK (est_nuit IN (0, 1)),
+        depassement INTEGER GENERATED ALWAYS AS (vitesse_mesuree - limitation) VIRTUAL
+    ) STRICT;
+"""
+
+# Reprise d'une reconstruction à l'autre (cf. copier_positions) :
+# identifiants et départements restent valables quelles que soient les mesures
+CREATION_POSITIONS = """
+    CREATE TABLE IF NOT EXISTS positions (
+        id INTEGER PRIMARY KEY,
+        lat REAL NOT NULL,
+        lon REAL NOT NULL,
+        departement TEXT,  -- NULL = pas encore rattachée, '' = hors départements
+        region TEXT,
+        UNIQUE (lat, lon)
+    ) STRICT;
+"""
+
+CREATION_MESURES = """
+    CREATE VIEW IF NOT EXISTS mesures AS
+    SELECT v.date, p.lat, p.lon, v.vitesse_mesuree, v.limitation, v.annee,
+           v.est_nuit, v.depassement, p.departement, p.region
+    FROM vitesses v
+    LEFT JOIN positions p ON p.id = v.position_id;
+"""
+
+CREATION_SUIVI = """
+    CREATE TABLE IF NOT EXISTS sources (
+        source TEXT PRIMARY KEY,
+        annee INTEGER NOT NULL,
+        empreinte TEXT NOT NULL,
+        date_max INTEGER,
+        nb_lignes INTEGER NOT NULL
+    ) STRICT;
+    CREATE TABLE IF NOT EXISTS filigranes (
+        agregat TEXT PRIMARY KEY,
+        rowid_max INTEGER NOT NULL,
+        empreinte_sources TEXT  -- cf. empreinte_sources
+    ) STRICT;
+"""
+
+INDEX_VITESSES = {
+    "idx_date": "CREATE INDEX IF NOT EXISTS idx_date ON vitesses(date);",
+    "idx_position": "CREATE INDEX IF NOT EXISTS idx_position ON vitesses(position_id);",
+    "idx_nuit": "CREATE INDEX IF NOT EXISTS idx_nuit ON vitesses(est_nuit);",
+}
+
+PROFILS_SQLITE = {
+    # Réglages par défaut de SQLite (pour comparer les débits)
+    "defaut": {},
+    # Construction en masse, dans un fichier neuf qui ne remplace la base
+    # qu'une fois complet : on échange la durabilité contre le débit
+    "chargement": {
+        "page_size": 32768,
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -262144,  # 256 Mio
+        "temp_store": "MEMORY",
+        "mmap_size": 1 << 30,
+    },
+    # Ajout incrémental à une base existante : le journal reste sur disque
+    # pour ne pas risquer les données déjà chargées
+    "ajout": {
+        "synchronous": "NORMAL",
+        "cache_size": -262144,
+        "temp_store": "MEMORY",
+        "mmap_size": 1 << 30,
+    },
+}
+
+# Table version 2, étape de la migration depuis la version 1
+CREATION_VITESSES_V2 = """
+    CREATE TABLE vitesses (
+        date INTEGER,
+        lat REAL,
+        lon REAL,
+        vitesse_mesuree INTEGER NOT NULL,
+        limitation INTEGER NOT NULL,
+        annee INTEGER NOT NULL,
+        est_nuit INTEGER CHECK (est_nuit IN (0, 1)),
+        depassement INTEGER GENERATED ALWAYS AS (vitesse_mesuree - limitation) VIRTUAL
+    ) STRICT;
+"""
+
+# Conversion d'une table version 1 (tout en TEXT) vers la version 2
+MIGRATION_V1_V2 = """
+    INSERT INTO vitesses (date, lat, lon, vitesse_mesuree, limitation, annee, est_nuit)
+    SELECT
+        CAST(strftime('%s', date) AS INTEGER),
+        CASE WHEN instr(position, ' ') > 0
+             THEN CAST(substr(position, 1, instr(position, ' ') - 1) AS REAL) END,
+        CASE WHEN instr(position, ' ') > 0
+             THEN CAST(substr(position, instr(position, ' ') + 1) AS REAL) END,
+        CAST(vitesse_mesuree AS INTEGER),
+        CAST(limitation AS INTEGER),
+        CAST(annee AS INTEGER),
+        CASE periode WHEN 'nuit' THEN 1 WHEN 'jour' THEN 0 END
+    FROM vitesses_v1
+    ORDER BY rowid;
+"""
+
+# Conversion de la version 2 vers la version 3 : positions distinctes
+# extraites dans la table de dimension, puis référencées par identifiant
+MIGRATION_V2_V3 = [
+    """
+    INSERT OR IGNORE INTO positions (lat, lon)
+    SELECT DISTINCT lat, lon FROM vitesses_v2
+    WHERE lat IS NOT NULL AND lon IS NOT NULL;
+    """,
+    """
+    INSERT INTO vitesses (date, position_id, vitesse_mesuree, limitation, annee, est_nuit)
+    SELECT v.date, p.id, v.vitesse_mesuree, v.limitation, v.annee, v.est_nuit
+    FROM vitesses_v2 v
+    LEFT JOIN positions p ON p.lat = v.lat AND p.lon = v.lon
+    ORDER BY v.rowid;
+    """,
+]
+
+
+def version_schema(conn: sqlite3.Connection) -> int:
+    """
+    Renvoie la version du schéma de la base.
+
+    Args:
+        conn: Connexion SQLite
+
+    Returns:
+        0 si la table vitesses n'existe pas, 1 pour l'ancienne table
+        sans version, sinon la valeur de PRAGMA user_version
+    """
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vitesses';"
+    ).fetchone()
+    if not existe:
+        return 0
+    return conn.execute("PRAGMA user_version;").fetchone()[0] or 1
+
+
+def appliquer_profil(conn: sqlite3.Connection, profil: str) -> None:
+    """
+    Applique un profil de PRAGMA à la connexion.
+
+    Args:
+        conn: Connexion SQLite (hors transaction)
+        profil: Nom du profil dans PROFILS_SQLITE
+    """
+    if profil not in PROFILS_SQLITE:
+        raise ValueError(f"Profil SQLite inconnu: {profil}")
+    for pragma, valeur in PROFILS_SQLITE[profil].items():
+        conn.execute(f"PRAGMA {pragma} = {valeur};")
+
+
+def creer_table_vitesses(conn: sqlite3.Connection) -> None:
+    """
+    Recrée une table vitesses vide au schéma courant.
+
+    La base est compactée après suppression de l'ancienne table, ce qui
+    applique aussi un éventuel nouveau page_size.
+    """
+    conn.execute("DROP TABLE IF EXISTS vitesses;")
+    conn.commit()
+    conn.execute("VACUUM;")
+    conn.execute(CREATION_POSITIONS)
+    conn.execute(CREATION_VITESSES)
+    conn.execute(CREATION_MESURES)
+    conn.execute(f"PRAGMA user_version = {VERSION_SCHEMA};")
+
+    # Les rowid repartent de zéro : le suivi incrémental est réinitialisé
+    creer_tables_suivi(conn)
+    conn.execute("DELETE FROM sources;")
+    conn.execute("DELETE FROM filigranes;")
+    conn.commit()
+
+
+def copier_positions(conn: sqlite3.Connection, chemin_ancienne: Path) -> int:
+    """
+    Reprend dans une base neuve les positions de l'ancienne base de l'année.
+
+    Une base reconstruite dans un fichier neuf garde ainsi les identifiants
+    et les départements déjà calculés : seules les positions nouvelles
+    restent à rattacher.
+
+    Args:
+        conn: Connexion à la base neuve (table positions vide, hors transaction)
+        chemin_ancienne: Base remplacée (ignorée si absente ou sans positions)
+
+    Returns:
+        Nombre de positions reprises
+    """
+    if not chemin_ancienne.exists():
+        return 0
+    conn.execute("ATTACH DATABASE ? AS ancienne;", (str(chemin_ancienne),))
+    try:
+        existe = conn.execute(
+            "SELECT 1 FROM ancienne.sqlite_master WHERE type = 'table' AND name = 'positions';"
+        ).fetchone()
+        if not existe:
+            return 0
+        nb_positions = conn.execute(
+            "INSERT INTO positions (id, lat, lon, departement, region) "
+            "SELECT id, lat, lon, departement, region FROM ancienne.positions;"
+        ).rowcount
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE ancienne;")
+    return nb_positions
+
+
+def creer_tables_suivi(conn: sqlite3.Connection) -> None:
+    """
+    Crée si besoin les tables sources et filigranes.
+
+    Les requêtes sont exécutées une à une (et non par executescript, qui
+    valide la transaction en cours) : un filigrane peut ainsi être écrit
+    dans la même transaction que l'agrégat qu'il décrit.
+    """
+    for creation in CREATION_SUIVI.split(";"):
+        if creation.strip():
+            conn.execute(creation)
+    colonnes = {ligne[1] for ligne in conn.execute("PRAGMA table_info(filigranes);")}
+    if "empreinte_sources" not in colonnes:
+        conn.execute("ALTER TABLE filigranes ADD COLUMN empreinte_sources TEXT;")
+
+
+def lire_source(conn: sqlite3.Connection, source: str) -> dict:
+    """
+    Renvoie l'état d'une source déjà chargée.
+
+    Args:
+        conn: Connexion SQLite
+        source: Nom de la source (fichier ou partition)
+
+    Returns:
+        Dictionnaire (empreinte, date_max, nb_lignes) ou None si inconnue
+    """
+    creer_tables_suivi(conn)
+    ligne = conn.execute(
+        "SELECT empreinte, date_max, nb_lignes FROM sources WHERE source = ?;",
+        (source,),
+    ).fetchone()
+    if ligne is None:
+        return None
+    return {"empreinte": ligne[0], "date_max": ligne[1], "nb_lignes": ligne[2]}
+
+
+def enregistrer_source(conn: sqlite3.Connection, source: str, annee: int,
+                       empreinte: str, date_max: int, nb_lignes: int) -> None:
+    """Enregistre (ou remplace) l'état d'une source après chargement."""
+    creer_tables_suivi(conn)
+    conn.execute(
+        "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?);",
+        (source, annee, empreinte, date_max, nb_lignes),
+    )
+    conn.commit()
+
+
+def empreinte_sources(conn: sqlite3.Connection) -> str:
+    """Résume l'état des sources chargées (nom et empreinte de chacune)."""
+    creer_tables_suivi(conn)
+    lignes = conn.execute("SELECT source, empreinte FROM sources ORDER BY source;").fetchall()
+    return hashlib.sha256(repr(lignes).encode("utf-8")).hexdigest()
+
+
+def ecrire_filigrane(conn: sqlite3.Connection, agregat: str, rowid_max: int) -> None:
+    """Enregistre le dernier rowid de vitesses intégré par un agrégat, et l'état des sources."""
+    creer_tables_suivi(conn)
+    conn.execute(
+        "INSERT OR REPLACE INTO filigranes VALUES (?, ?, ?);",
+        (agregat, rowid_max, empreinte_sources(conn)),
+    )
+    conn.commit()
+
+
+def compter_sous_filigrane(conn: sqlite3.Connection, rowid_max: int,
+                           condition: str = "true") -> int:
+    """
+    Compte les lignes de vitesses de rowid inférieur ou égal à un filigrane.
+
+    Un agrégat arrêté à ce filigrane doit en compter autant : sinon, des
+    lignes ont été ajoutées ou supprimées sous le filigrane depuis son
+    calcul, et l'ajout incrémental ne les verrait pas.
+
+    Args:
+        conn: Connexion à la base de l'année
+        rowid_max: Filigrane de l'agrégat
+        condition: Filtre SQL des lignes retenues par l'agrégat
+    """
+    return conn.execute(
+        f"SELECT COUNT(*) FROM vitesses WHERE rowid <= ? AND {condition};", (rowid_max,)
+    ).fetchone()[0]
+
+
+def requete_cumul(table: str, cles: dict, sommes: list, delta: str) -> str:
+    """
+    Renvoie la requête qui ajoute une table delta à une table d'agrégats.
+
+    Args:
+        table: Table d'agrégats, de clé primaire les colonnes de cles
+        cles: Expression calculée sur le delta pour chaque colonne de clé
+        sommes: Colonnes additionnées (présentes dans la table et le delta)
+        delta: Table temporaire des lignes nouvelles, déjà agrégées
+
+    Returns:
+        Requête INSERT ... ON CONFLICT DO UPDATE
+    """
+    colonnes = ", ".join([*cles, *sommes])
+    groupes = ", ".join(cles.values())
+    sommes_delta = ", ".join(f"SUM({colonne})" for colonne in sommes)
+    mises_a_jour = ", ".join(f"{colonne} = {colonne} + excluded.{colonne}" for colonne in sommes)
+    # WHERE true : lève l'ambiguïté entre la clause ON CONFLICT et une jointure
+    return (
+        f"INSERT INTO {table} ({colonnes}) SELECT {groupes}, {sommes_delta} "
+        f"FROM {delta} WHERE true GROUP BY {groupes} "
+        f"ON CONFLICT DO UPDATE SET {mises_a_jour};"
+    )
+
+
+def agreger_delta(conn: sqlite3.Connection, delta: str, calcul: str,
+                  cumuls: list, rowid_depart: int, rowid_max: int) -> int:
+    """
+    Agrège une fois les lignes nouvelles de vitesses, puis les cumule.
+
+    Args:
+        conn: Connexion à la base de l'année
+        delta: Nom de la table temporaire créée par calcul
+        calcul: Requête CREATE TEMP TABLE, paramétrée par l'intervalle de
+            rowid ]rowid_depart, rowid_max] ; sa colonne nb compte les mesures
+        cumuls: Requêtes qui ajoutent le delta aux tables (cf. requete_cumul)
+        rowid_depart: Filigrane de départ (exclu)
+        rowid_max: Dernier rowid intégré (inclus)
+
+    Returns:
+        Nombre de mesures agrégées
+    """
+    conn.execute(f"DROP TABLE IF EXISTS temp.{delta};")
+    conn.execute(calcul, (rowid_depart, rowid_max))
+    for cumul in cumuls:
+        conn.execute(cumul)
+    nb_mesures = conn.execute(f"SELECT COALESCE(SUM(nb), 0) FROM {delta};").fetchone()[0]
+    conn.execute(f"DROP TABLE temp.{delta};")
+    return nb_mesures
+
+
+def actualiser_agregat(conn: sqlite3.Connection, agregat: str, tables: list,
+                       appliquer, incremental: bool = True, incomplet: bool = False,
+                       condition: str = "true", preparer=None) -> int:
+    """
+    Construit ou complète un agrégat de vitesses suivi par un filigrane.
+
+    Seules les lignes de vitesses postérieures au filigrane sont passées à
+    appliquer ; les tables de l'agrégat et le filigrane sont écrits dans
+    une même transaction : une interruption ne peut pas compter deux fois
+    des lignes. L'agrégat est reconstruit entièrement s'il vient d'être
+    créé, si vitesses a été reconstruite depuis (filigrane au-delà du
+    dernier rowid), ou s'il ne compte plus autant de mesures que vitesses
+    sous son filigrane (lignes ajoutées sans nouveau rowid maximal, ou
+    supprimées). Ce comptage parcourt vitesses : il est évité quand ni le
+    rowid maximal ni les sources chargées n'ont changé depuis le calcul.
+
+    Args:
+        conn: Connexion à la base de l'année
+        agregat: Nom du filigrane de l'agrégat
+        tables: Tables de l'agrégat, vidées avant une reconstruction ; la
+            première compte toutes ses mesures dans sa colonne nb
+        appliquer: Fonction (rowid_depart, rowid_max) qui ajoute aux tables
+            les lignes de vitesses de cet intervalle et renvoie leur nombre
+        incremental: False = reconstruction complète
+        incomplet: Une table de l'agrégat vient d'être créée
+        condition: Filtre SQL des lignes de vitesses que l'agrégat compte
+        preparer: Fonction (rowid_depart, rowid_max) appelée avant le
+            calcul, dans la même transaction ; True impose une
+            reconstruction complète
+
+    Returns:
+        Nombre de mesures ajoutées à l'agrégat
+    """
+    creer_tables_suivi(conn)
+    rowid_max = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM vitesses").fetchone()[0]
+    ligne = conn.execute(
+        "SELECT rowid_max, empreinte_sources FROM filigranes WHERE agregat = ?;", (agregat,)
+    ).fetchone()
+    rowid_depart, empreinte = ligne if ligne and incremental else (0, None)
+    if incomplet or rowid_depart > rowid_max:
+        # Nouvelle table d'agrégats, ou table vitesses reconstruite depuis :
+        # le filigrane n'a plus de sens
+        rowid_depart = 0
+    sources_modifiees = empreinte != empreinte_sources(conn)
+    if rowid_depart and (rowid_depart < rowid_max or sources_modifiees):
+        total = conn.execute(f"SELECT COALESCE(SUM(nb), 0) FROM {tables[0]};").fetchone()[0]
+        ecart = compter_sous_filigrane(conn, rowid_depart, condition) - total
+        if ecart:
+            print(f"Attention: {ecart:+,} mesures sous le filigrane « {agregat} » depuis "
+                  "son calcul, invisibles en incrémental : reconstruction complète")
+            rowid_depart = 0
+
+    try:
+        if preparer is not None and preparer(rowid_depart, rowid_max):
+            rowid_depart = 0
+        if incremental and rowid_depart == rowid_max:
+            if sources_modifiees and rowid_max:
+                ecrire_filigrane(conn, agregat, rowid_max)
+            return 0
+        if not rowid_depart:
+            for table in tables:
+                conn.execute(f"DELETE FROM {table};")
+        nb_mesures = appliquer(rowid_depart, rowid_max)
+        ecrire_filigrane(conn, agregat, rowid_max)
+    except Exception:
+        conn.rollback()
+        raise
+
+    return nb_mesures
+
+
+def creer_index(conn: sqlite3.Connection) -> None:
+    """Crée les index de la table vitesses."""
+    for creation in INDEX_VITESSES.values():
+        conn.execute(creation)
+    conn.commit()
+
+
+def supprimer_index(conn: sqlite3.Connection) -> None:
+    """Supprime les index de la table vitesses avant un chargement en masse."""
+    for nom_index in [*INDEX_VITESSES, "idx_periode"]:
+        conn.execute(f"DROP INDEX IF EXISTS {nom_index};")
+    conn.commit()
+
+
+def optimiser(conn: sqlite3.Connection) -> None:
+    """Met à jour les statistiques du planificateur après un chargement."""
+    conn.execute("ANALYZE;")
+    conn.execute("PRAGMA optimize;")
+    conn.commit()
+
+
+def migrer_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Convertit une table vitesses version 1 ou 2 vers le schéma courant.
+
+    Les agrégats dont le filigrane porte sur les rowid de l'ancienne table
+    sont remis à zéro et seront reconstruits.
+
+    Args:
+        conn: Connexion SQLite
+
+    Returns:
+        True si une migration a eu lieu, False si la base était déjà à jour
+    """
+    version = version_schema(conn)
+    if version in (0, VERSION_SCHEMA):
+        return False
+
+    print(f"Migration du schéma vitesses de la version {version} vers la version {VERSION_SCHEMA}...")
+    supprimer_index(conn)
+    conn.execute("BEGIN;")
+    if version == 1:
+        conn.execute("ALTER TABLE vitesses RENAME TO vitesses_v1;")
+        conn.execute(CREATION_VITESSES_V2)
+        conn.execute(MIGRATION_V1_V2)
+        conn.execute("DROP TABLE vitesses_v1;")
+
+    conn.execute("ALTER TABLE vitesses RENAME TO vitesses_v2;")
+    conn.execute(CREATION_POSITIONS)
+    conn.execute(CREATION_VITESSES)
+    for requete in MIGRATION_V2_V3:
+        conn.execute(requete)
+    conn.execute("DROP TABLE vitesses_v2;")
+    conn.execute(CREATION_MESURES)
+    creer_tables_suivi(conn)
+    conn.execute("DELETE FROM filigranes;")
+    conn.execute(f"PRAGMA user_version = {VERSION_SCHEMA};")
+    conn.commit()
+
+    creer_index(conn)
+    conn.execute("VACUUM;")
+    return True
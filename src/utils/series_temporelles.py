@@ -0,0 +1,177 @@
+"""
+Séries temporelles agrégées de la table vitesses.
+
+Pour chaque granularité de GRANULARITES (5 minutes, heure, jour), une
+table serie_<nom> compte les mesures, les infractions et la somme des
+dépassements par intervalle. Les intervalles sont indexés par leur début
+(secondes locales depuis 1970, comme vitesses.date) : une plage de dates
+se lit par la clé primaire, quelle que soit la taille de la table
+vitesses. Les nouvelles lignes sont agrégées une fois à 5 minutes, puis
+chaque granularité est complétée depuis ce delta (filigrane sur le
+rowid, comme le cube).
+
+lttb réduit une série à un nombre de points donné en gardant sa forme
+(Largest Triangle Three Buckets, Steinarsson 2013).
+"""
+import sqlite3
+import numpy as np
+
+from src.utils.partitions import annees_chargees, chemin_base
+from src.utils.schema import actualiser_agregat, agreger_delta, requete_cumul
+
+
+NOM_FILIGRANE = "series"
+
+# nom: durée d'un intervalle en secondes, de la plus fine à la plus grossière
+GRANULARITES = {
+    "5min": 300,
+    "heure": 3600,
+    "jour": 86400,
+}
+
+CALCUL_DELTA_SERIES = f"""
+    CREATE TEMP TABLE serie_delta AS
+    SELECT date / {GRANULARITES['5min']} * {GRANULARITES['5min']} AS debut,
+           COUNT(*) AS nb,
+           SUM(depassement > 0) AS nb_infractions,
+           SUM(depassement) AS somme_depassement
+    FROM vitesses
+    WHERE rowid > ? AND rowid <= ? AND date IS NOT NULL
+    GROUP BY 1;
+"""
+
+
+def table_serie(granularite: str) -> str:
+    """Renvoie le nom de la table d'une granularité."""
+    return f"serie_{granularite}"
+
+
+def creer_tables_series(conn: sqlite3.Connection) -> bool:
+    """
+    Crée si besoin les tables des séries.
+
+    Returns:
+        True si une table manquait (elle doit être remplie depuis le
+        début de vitesses)
+    """
+    tables = {ligne[0] for ligne in conn.execute("SELECT name FROM sqlite_master;")}
+    for granularite in GRANULARITES:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_serie(granularite)} ("
+            "debut INTEGER PRIMARY KEY, nb INTEGER NOT NULL, "
+            "nb_infractions INTEGER NOT NULL, somme_depassement INTEGER NOT NULL"
+            ") STRICT;"
+        )
+    return not tables.issuperset(table_serie(granularite) for granularite in GRANULARITES)
+
+
+def actualiser_series(conn: sqlite3.Connection, incremental: bool = True) -> int:
+    """
+    Construit ou complète les séries de la base d'une année.
+
+    Les séries et le filigrane sont écrits dans une même transaction, et
+    reconstruits entièrement au besoin, comme le cube (cf.
+    schema.actualiser_agregat).
+
+    Args:
+        conn: Connexion à la base de l'année
+        incremental: N'ajoute que les lignes de vitesses postérieures au
+            filigrane (False = reconstruction complète)
+
+    Returns:
+        Nombre de mesures datées ajoutées aux séries
+    """
+    incomplet = creer_tables_series(conn)
+    cumuls = [
+        requete_cumul(table_serie(granularite), {"debut": f"debut / {pas} * {pas}"},
+                      ["nb", "nb_infractions", "somme_depassement"], "serie_delta")
+        for granularite, pas in GRANULARITES.items()
+    ]
+
+    def appliquer(rowid_depart: int, rowid_max: int) -> int:
+        return agreger_delta(conn, "serie_delta", CALCUL_DELTA_SERIES, cumuls,
+                             rowid_depart, rowid_max)
+
+    return actualiser_agregat(
+        conn, NOM_FILIGRANE, [table_serie(granularite) for granularite in GRANULARITES],
+        appliquer, incremental, incomplet, condition="date IS NOT NULL",
+    )
+
+
+def choisir_granularite(duree: float, points_max: int) -> str:
+    """
+    Renvoie la granularité la plus fine qui couvre une durée en peu de points.
+
+    Args:
+        duree: Durée de la plage affichée, en secondes
+        points_max: Nombre maximal d'intervalles à lire
+
+    Returns:
+        Nom de la granularité (la plus grossière si aucune ne convient)
+    """
+    for granularite, pas in GRANULARITES.items():
+        if duree / pas <= points_max:
+            return granularite
+    return granularite
+
+
+def lttb(x: np.ndarray, y: np.ndarray, nb_points: int) -> np.ndarray:
+    """
+    Choisit les points à garder pour tracer une série avec nb_points points.
+
+    Le premier et le dernier point sont gardés ; les autres sont répartis
+    en nb_points - 2 seaux, et chaque seau garde le point qui forme le plus
+    grand triangle avec le point gardé précédent et la moyenne du seau
+    suivant. Les pics restent visibles, contrairement à un sous-échantillonnage
+    régulier ou à une moyenne.
+
+    Args:
+        x: Abscisses croissantes
+        y: Ordonnées
+        nb_points: Nombre de points voulus
+
+    Returns:
+        Indices des points gardés, croissants
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if nb_points >= n or nb_points < 3:
+        return np.arange(n)
+
+    bornes = np.linspace(1, n - 1, nb_points - 1).astype(np.int64)
+    indices = np.empty(nb_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    precedent = 0
+    for seau in range(nb_points - 2):
+        debut, fin = bornes[seau], bornes[seau + 1]
+        suivant_fin = bornes[seau + 2] if seau + 2 < len(bornes) else n
+        x_moyen = x[fin:suivant_fin].mean()
+        y_moyen = y[fin:suivant_fin].mean()
+        aires = np.abs(
+            (x[precedent] - x_moyen) * (y[debut:fin] - y[precedent])
+            - (x[precedent] - x[debut:fin]) * (y_moyen - y[precedent])
+        )
+        precedent = debut + int(np.argmax(aires))
+        indices[seau + 1] = precedent
+    return indices
+
+
+def main(annees: list = None, incremental: bool = True):
+    """
+    Construit ou complète les séries temporelles de chaque année chargée.
+
+    Args:
+        annees: Années à traiter (None = toutes les années chargées)
+        incremental: Complète les séries sans les reconstruire
+    """
+    for annee in annees or annees_chargees():
+        conn = sqlite3.connect(chemin_base(annee))
+        nouvelles = actualiser_series(conn, incremental)
+        conn.close()
+        if nouvelles:
+            print(f"Séries temporelles {annee}: {nouvelles:,} mesures ajoutées")
+
+
+if __name__ == "__main__":
+    main()
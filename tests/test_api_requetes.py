@@ -0,0 +1,118 @@
+"""
+Tests unitaires pour l'API d'exploration des mesures.
+"""
+import unittest
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+from flask import Flask
+from src.pages import api_requetes
+from src.pages.api_requetes import DelaiDepasse, PoolLecture, executer
+from src.utils import partitions
+from src.utils.cube import actualiser_cube
+from src.utils.schema import creer_table_vitesses
+
+
+# Secondes locales : 2023-03-01 08:00, 2023-03-01 23:30, 2023-03-02 08:00
+MESURES = [
+    (1677657600, 1, 95, 90, 0),
+    (1677713400, 2, 62, 50, 1),
+    (1677744000, 1, 85, 90, 0),
+]
+
+SERIE = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT i FROM n"
+
+
+class TestApiRequetes(unittest.TestCase):
+    """Tests du pool en lecture seule, des limites et des routes."""
+
+    def setUp(self):
+        """Préparation avant chaque test : base 2023 avec deux positions."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.patch = mock.patch.object(partitions, "REPERTOIRE_DB", self.rep_temp)
+        self.patch.start()
+        api_requetes._POOLS.clear()
+
+        conn = sqlite3.connect(partitions.chemin_base(2023))
+        creer_table_vitesses(conn)
+        conn.execute("INSERT INTO positions VALUES (1, 45.5, 2.5, '63', NULL), "
+                     "(2, 48.8, 2.3, '75', NULL);")
+        conn.executemany(
+            "INSERT INTO vitesses (date, position_id, vitesse_mesuree, limitation, annee, est_nuit) "
+            "VALUES (?, ?, ?, ?, 2023, ?);", MESURES,
+        )
+        conn.commit()
+        actualiser_cube(conn)
+        conn.commit()
+        conn.close()
+
+        app = mock.Mock(server=Flask(__name__))
+        api_requetes.register_routes(app)
+        self.client = app.server.test_client()
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        api_requetes._POOLS.clear()
+        self.patch.stop()
+        shutil.rmtree(self.rep_temp)
+
+    def test_pool_lecture_seule(self):
+        """Vérifie la réutilisation des connexions et le refus d'écrire."""
+        pool = PoolLecture(partitions.chemin_base(2023), taille=1)
+        with pool.connexion() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM vitesses;")
+            # Connexion unique déjà prêtée : la demande suivante expire
+            with self.assertRaises(DelaiDepasse):
+                with pool.connexion(delai=0.01):
+                    pass
+        with pool.connexion() as seconde:
+            self.assertIs(seconde, conn)
+
+    def test_pool_apres_fork(self):
+        """Vérifie qu'un pool fermé ou hérité d'un fork rouvre ses connexions."""
+        pool = PoolLecture(partitions.chemin_base(2023))
+        with pool.connexion() as conn:
+            pass
+        pool.fermer()
+        self.assertEqual(pool.nb_ouvertes, 0)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+        with pool.connexion() as parent:
+            pass
+        pool.pid = -1  # Comme dans un worker créé par fork
+        with pool.connexion() as enfant:
+            self.assertIsNot(enfant, parent)
+        self.assertEqual(pool.nb_ouvertes, 1)
+
+    def test_limites(self):
+        """Vérifie le plafond de lignes et l'interruption au délai."""
+        conn = sqlite3.connect(":memory:")
+        _, lignes, tronque = executer(conn, f"{SERIE} LIMIT 10", [], time.monotonic() + 5, 4)
+        self.assertEqual(lignes, [(1,), (2,), (3,), (4,)])
+        self.assertTrue(tronque)
+        with self.assertRaises(DelaiDepasse):
+            executer(conn, f"SELECT COUNT(*) FROM ({SERIE})", [], time.monotonic() + 0.05)
+
+    def test_routes(self):
+        """Vérifie les deux routes et le refus des paramètres inconnus."""
+        reponse = self.client.get("/api/mesures?debut=2023-03-01&fin=2023-03-01&par=departement")
+        self.assertEqual(reponse.get_json()["lignes"], [["63", 1, 1, 5], ["75", 1, 1, 12]])
+
+        reponse = self.client.get("/api/agregats?dimensions=limitation&periode=jour")
+        self.assertEqual(reponse.get_json(), {
+            "colonnes": ["limitation", "nb", "somme_depassement"],
+            "lignes": [[90, 2, 0]],
+            "tronque": False,
+        })
+
+        self.assertEqual(self.client.get("/api/agregats?rowid=1").status_code, 400)
+        self.assertEqual(self.client.get("/api/mesures?debut=2023-03-01").status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
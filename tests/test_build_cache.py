@@ -2,7 +2,11 @@
 Tests unitaires pour le module build_dashboard_cache.
 """
 import unittest
+import sqlite3
 import pandas as pd
+from src.utils.build_dashboard_cache import agreger, agreger_en_base
+from src.utils.cube import actualiser_cube
+from src.utils.schema import creer_table_vitesses
 
 
 class TestBuildCache(unittest.TestCase):
@@ -49,6 +53,33 @@ class TestBuildCache(unittest.TestCase):
         
         self.assertEqual(agg[("jour", 90, "0–10 km/h")], 2)
         self.assertEqual(agg[("nuit", 90, "0–10 km/h")], 2)
+    
+    def test_agregation_cube_identique_a_pandas(self):
+        """Vérifie que l'agrégation du cube reproduit agreger (bornes comprises)."""
+        vitesses = [40, 50, 51, 60, 61, 70, 71, 80, 81, 95, 125, 130, 131, 175, 88]
+        limitations = [50, 50, 50, 50, 50, 50, 50, 50, 50, 90, 130, 130, 130, 130, 90]
+        nuits = [0, 1, 0, 1, 0, 0, 1, 1, 0, 1, 0, 1, 0, None, 1]
+        
+        conn = sqlite3.connect(":memory:")
+        creer_table_vitesses(conn)
+        conn.executemany(
+            "INSERT INTO vitesses (vitesse_mesuree, limitation, annee, est_nuit) "
+            "VALUES (?, ?, 2023, ?);",
+            zip(vitesses, limitations, nuits),
+        )
+        actualiser_cube(conn)
+        df = pd.read_sql_query(
+            "SELECT vitesse_mesuree, limitation, "
+            "CASE est_nuit WHEN 1 THEN 'nuit' WHEN 0 THEN 'jour' END AS periode "
+            "FROM vitesses", conn,
+        )
+        
+        pd.testing.assert_frame_equal(
+            agreger_en_base(conn, 2023),
+            agreger(df).astype({"classe_depassement": "str"}),
+            check_dtype=False,
+        )
+        conn.close()
 
 
 if __name__ == '__main__':
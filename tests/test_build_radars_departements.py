@@ -4,7 +4,9 @@ Tests unitaires pour le module build_radars_departements.
 import unittest
 import pandas as pd
 import geopandas as gpd
-from src.utils.build_radars_departements import detecter_colonne_code, convertir_en_geodataframe
+from src.utils.build_radars_departements import (
+    calculer_statistiques, detecter_colonne_code,
+)
 
 
 class TestBuildDepartements(unittest.TestCase):
@@ -22,17 +24,24 @@ class TestBuildDepartements(unittest.TestCase):
         with self.assertRaises(ValueError):
             detecter_colonne_code(gdf)
     
-    def test_convertir_en_geodataframe(self):
-        """Vérifie la conversion en GeoDataFrame."""
-        df = pd.DataFrame({
-            "position": ["45.0 2.0", "46.0 3.0"],
-            "depassement": [10, 15]
+    def test_statistiques_histogramme_exactes(self):
+        """Vérifie moyenne, médiane et max calculés depuis l'histogramme."""
+        depassements = pd.DataFrame({
+            "code_dept": ["01"] * 4 + ["02"] * 5,
+            "depassement": [3, 8, 8, 20, 1, 2, 2, 9, 40],
         })
-        gdf = convertir_en_geodataframe(df)
+        histogramme = (depassements.groupby(["code_dept", "depassement"])
+                                   .size().reset_index(name="nb"))
         
-        self.assertIsInstance(gdf, gpd.GeoDataFrame)
-        self.assertEqual(len(gdf), 2)
-        self.assertTrue(hasattr(gdf, 'geometry'))
+        stats = calculer_statistiques(histogramme).set_index("code_dept")
+        attendu = depassements.groupby("code_dept")["depassement"]
+        
+        self.assertEqual(list(stats.index), ["02", "01"])
+        self.assertEqual(stats.loc["01", "depassement_median"], attendu.median()["01"])
+        self.assertEqual(stats.loc["02", "depassement_median"], attendu.median()["02"])
+        self.assertEqual(stats.loc["02", "depassement_moyen"], round(attendu.mean()["02"], 2))
+        self.assertEqual(stats.loc["01", "depassement_max"], 20)
+        self.assertEqual(stats.loc["02", "nb_infractions"], 5)
 
 
 if __name__ == '__main__':
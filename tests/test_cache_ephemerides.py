@@ -0,0 +1,85 @@
+"""
+Tests unitaires pour le cache persistant des éphémérides.
+"""
+import unittest
+import datetime
+import shutil
+import tempfile
+from pathlib import Path
+import pandas as pd
+from src.utils.cache_ephemerides import CacheEphemerides
+from src.utils.load_to_sqlite import (
+    FUSEAU_HORAIRE, PRECISION_GRILLE, calculer_ephemerides, calculer_periode_bloc,
+)
+
+
+class TestCacheEphemerides(unittest.TestCase):
+    """Tests du cache des éphémérides."""
+    
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.chemin = self.rep_temp / "ephemerides.db"
+        self.cles = pd.DataFrame({
+            "date_only": [datetime.date(2023, 1, 1), datetime.date(2023, 6, 21),
+                          datetime.date(2023, 6, 21)],
+            "lat_round": [48.8, 43.6, 47.2],
+            "lon_round": [2.3, 1.4, -1.5],
+        })
+    
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        shutil.rmtree(self.rep_temp)
+    
+    def ouvrir(self) -> CacheEphemerides:
+        """Ouvre un cache sur la base temporaire."""
+        return CacheEphemerides(FUSEAU_HORAIRE, PRECISION_GRILLE, "numpy", self.chemin)
+    
+    def test_resultats_identiques_au_calcul(self):
+        """Vérifie que le cache renvoie les mêmes heures que le calcul direct."""
+        cache = self.ouvrir()
+        resultat = cache.obtenir(self.cles, calculer_ephemerides)
+        attendu = calculer_ephemerides(self.cles)
+        cache.fermer()
+        
+        ecart = (resultat["sunrise_local"] - attendu["sunrise_local"]).abs().max()
+        self.assertLess(ecart, pd.Timedelta(microseconds=1))
+        self.assertEqual(list(resultat["date_only"]), list(self.cles["date_only"]))
+    
+    def test_succes_entre_executions(self):
+        """Vérifie que les clés calculées sont réutilisées après réouverture."""
+        cache = self.ouvrir()
+        cache.obtenir(self.cles, calculer_ephemerides)
+        self.assertEqual(cache.stats, {"succes": 0, "echecs": 3})
+        cache.fermer()
+        
+        def interdit(cles):
+            raise AssertionError("Aucun calcul attendu")
+        
+        cache = self.ouvrir()
+        cache.obtenir(self.cles, interdit)
+        self.assertEqual(cache.stats, {"succes": 3, "echecs": 0})
+        self.assertEqual(cache.taux_succes(), 1.0)
+        cache.fermer()
+    
+    def test_periode_avec_cache(self):
+        """Vérifie que la période est la même avec ou sans cache."""
+        bloc = pd.DataFrame({
+            "rid": range(4),
+            "date": ["2023-01-01 07:00:00", "2023-01-01 12:00:00",
+                     "2023-06-21 21:00:00", "2023-06-21 23:00:00"],
+            "position": ["48.8 2.3", "48.8 2.3", "43.6 1.4", "43.6 1.4"],
+        })
+        cache = self.ouvrir()
+        
+        sans_cache = calculer_periode_bloc(bloc)
+        premier = calculer_periode_bloc(bloc, cache=cache)
+        second = calculer_periode_bloc(bloc, cache=cache)
+        cache.fermer()
+        
+        pd.testing.assert_frame_equal(premier, sans_cache)
+        pd.testing.assert_frame_equal(second, sans_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
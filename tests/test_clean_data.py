@@ -2,11 +2,14 @@
 Tests unitaires pour le module clean_data.
 """
 import unittest
+import sqlite3
 import pandas as pd
 from pathlib import Path
 import tempfile
 import shutil
-from src.utils.clean_data import nettoyer_fichier
+from unittest import mock
+from src.utils import cache_ephemerides, load_to_sqlite, partitions
+from src.utils.clean_data import nettoyer_fichier, nettoyer_fichier_parquet, lire_parquet
 
 
 class TestCleanData(unittest.TestCase):
@@ -73,6 +76,129 @@ class TestCleanData(unittest.TestCase):
         df_result = pd.read_csv(self.chemin_sortie, sep=";")
         self.assertTrue(pd.api.types.is_numeric_dtype(df_result["vitesse_mesuree"]))
         self.assertTrue(pd.api.types.is_numeric_dtype(df_result["limitation"]))
+    
+    def test_nettoyage_par_blocs(self):
+        """Vérifie que le découpage en blocs donne le même résultat."""
+        df_test = pd.DataFrame({
+            "date": [f"2023-01-0{i} 10:00:00" for i in range(1, 8)],
+            "position": ["45.0 2.0", None, "46.0 3.0", "47.0 4.0",
+                         "48.0 5.0", "49.0 6.0", "50.0 7.0"],
+            "mesure": [95, 100, "abc", 80, 70, None, 130],
+            "limite": [90, 90, 90, 80, 70, 90, 110]
+        })
+        df_test.to_csv(self.chemin_entree, index=False, sep=";")
+        
+        stats = nettoyer_fichier(self.chemin_entree, self.chemin_sortie, taille_bloc=2)
+        df_blocs = pd.read_csv(self.chemin_sortie, sep=";")
+        
+        nettoyer_fichier(self.chemin_entree, self.chemin_sortie, taille_bloc=100)
+        df_entier = pd.read_csv(self.chemin_sortie, sep=";")
+        
+        pd.testing.assert_frame_equal(df_blocs, df_entier)
+        self.assertEqual(len(df_blocs), 4)
+        self.assertEqual(stats["lignes_lues"], 7)
+        self.assertEqual(stats["lignes_supprimees"], 3)
+    
+    def test_vitesses_non_entieres(self):
+        """Vérifie que les vitesses décimales sont rejetées et comptées, pas tronquées."""
+        self.chemin_entree.write_text(
+            "date;position;mesure;limite\n"
+            "2023-01-01 10:00:00;45.0 2.0;95.7;90\n"
+            "2023-01-01 11:00:00;45.0 2.0;95.0;90\n"
+            "2023-01-01 12:00:00;45.0 2.0;80;90.5\n",
+            encoding="utf-8",
+        )
+
+        stats = nettoyer_fichier(self.chemin_entree, self.chemin_sortie)
+
+        df_result = pd.read_csv(self.chemin_sortie, sep=";")
+        self.assertEqual(df_result["vitesse_mesuree"].tolist(), [95])
+        self.assertEqual(stats["vitesses_non_entieres"], 2)
+        self.assertEqual(stats["lignes_supprimees"], 2)
+
+    def test_colonnes_absentes(self):
+        """Vérifie qu'une colonne facultative peut manquer, pas une obligatoire."""
+        self.chemin_entree.write_text(
+            "date;mesure;limite;radar\n"
+            "2023-01-01 10:00:00;95;90;R1\n",
+            encoding="utf-8",
+        )
+
+        nettoyer_fichier(self.chemin_entree, self.chemin_sortie)
+        df_result = pd.read_csv(self.chemin_sortie, sep=";")
+        self.assertEqual(len(df_result), 1)
+        self.assertNotIn("radar", df_result.columns)
+        self.assertTrue(df_result["position"].isna().all())
+
+        rep_parquet = Path(self.rep_temp) / "parquet"
+        nettoyer_fichier_parquet(self.chemin_entree, rep_parquet)
+        self.assertTrue(lire_parquet(rep_parquet)["lat"].isna().all())
+
+        self.chemin_entree.write_text("date;position;mesure\n2023-01-01;45.0 2.0;95\n",
+                                      encoding="utf-8")
+        with self.assertRaises(ValueError):
+            nettoyer_fichier(self.chemin_entree, self.chemin_sortie)
+
+    def test_sortie_parquet_partitionnee(self):
+        """Vérifie le jeu Parquet typé et partitionné par mois."""
+        df_test = pd.DataFrame({
+            "date": ["2023-01-05 10:00:00", "2023-02-10 22:30:00", "2023-02-11 08:00:00"],
+            "position": ["45.5 2.25", "46.0 3.0", None],
+            "mesure": [95, 60, 70],
+            "limite": [90, 50, 70]
+        })
+        df_test.to_csv(self.chemin_entree, index=False, sep=";")
+        rep_parquet = Path(self.rep_temp) / "parquet"
+        
+        stats = nettoyer_fichier_parquet(self.chemin_entree, rep_parquet)
+        
+        self.assertEqual(stats["lignes_conservees"], 2)
+        self.assertTrue((rep_parquet / "mois=2023-01").is_dir())
+        self.assertTrue((rep_parquet / "mois=2023-02").is_dir())
+        
+        df_result = lire_parquet(rep_parquet, colonnes=["date", "lat", "vitesse_mesuree"],
+                                 mois=["2023-02"])
+        self.assertEqual(list(df_result.columns), ["date", "lat", "vitesse_mesuree"])
+        self.assertEqual(len(df_result), 1)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df_result["date"]))
+        self.assertEqual(df_result["lat"].iloc[0], 46.0)
+        self.assertEqual(str(df_result["vitesse_mesuree"].dtype), "int16")
+
+    def test_parquet_meme_base_que_csv(self):
+        """Vérifie que les chemins CSV et Parquet chargent les mêmes mesures."""
+        self.chemin_entree.write_text(
+            "date;position;mesure;limite\n"
+            "2023-01-05 10:00:00;45.5 2.25;95;90\n"
+            "2023-02-10 22:30:00;46.0 3.0;60;50\n"
+            "date invalide;47.2 -1.5;72;70\n"
+            "2023-02-11 08:00:00;position invalide;70;70\n"
+            "2023-03-01 12:00:00;;70;70\n"
+            "2023-03-02 12:00:00;48.8 2.3;;90\n",
+            encoding="utf-8",
+        )
+        rep_csv = Path(self.rep_temp) / "csv"
+        rep_parquet = Path(self.rep_temp) / "parquet"
+        rep_csv.mkdir()
+        rep_parquet.mkdir()
+        stats_csv = nettoyer_fichier(self.chemin_entree, rep_csv / "vitesse_2023_cleaned.csv")
+        stats_parquet = nettoyer_fichier_parquet(self.chemin_entree,
+                                                 rep_parquet / "vitesse_2023_parquet")
+        self.assertEqual(stats_parquet, stats_csv)
+        self.assertEqual(stats_csv["lignes_conservees"], 4)
+
+        mesures = {}
+        with mock.patch.object(cache_ephemerides, "CHEMIN_CACHE",
+                               Path(self.rep_temp) / "ephemerides.db"):
+            for rep in (rep_csv, rep_parquet):
+                with mock.patch.object(load_to_sqlite, "REPERTOIRE_NETTOYE", rep), \
+                        mock.patch.object(partitions, "REPERTOIRE_DB", rep):
+                    load_to_sqlite.main(annees=[2023])
+                with sqlite3.connect(rep / "vitesses_2023.db") as conn:
+                    mesures[rep] = pd.read_sql_query(
+                        "SELECT date, lat, lon, vitesse_mesuree, limitation, est_nuit "
+                        "FROM mesures ORDER BY date, lat", conn)
+        self.assertEqual(len(mesures[rep_csv]), 4)
+        pd.testing.assert_frame_equal(mesures[rep_parquet], mesures[rep_csv])
 
 
 if __name__ == '__main__':
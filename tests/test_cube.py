@@ -0,0 +1,155 @@
+"""
+Tests unitaires pour le cube d'agrégats.
+"""
+import unittest
+import json
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+from src.utils import build_radars_departements, schema
+from src.utils.cube import actualiser_cube, interroger_cube
+from src.utils.positions import IndexPositions
+from src.utils.schema import creer_table_vitesses, enregistrer_source
+
+
+def secondes(texte: str) -> int:
+    """Convertit une date locale "AAAA-MM-JJ HH:MM" en secondes stockées."""
+    date = datetime.strptime(texte, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+MESURES = [
+    # date, lat, lon, vitesse, limitation, est_nuit
+    (secondes("2023-01-01 03:10"), 45.5, 2.5, 95, 90, 1),   # dimanche
+    (secondes("2023-01-02 14:00"), 45.5, 2.5, 80, 90, 0),   # lundi
+    (secondes("2023-03-15 22:45"), 48.0, 7.0, 135, 130, 1),
+    (secondes("2023-06-21 12:00"), 45.2, 2.8, 75, 50, 0),
+    (None, 45.5, 2.5, 60, 50, None),
+]
+
+
+class TestCube(unittest.TestCase):
+    """Tests de construction et d'interrogation du cube."""
+
+    def setUp(self):
+        """Préparation avant chaque test : un département carré autour de (45, 2)."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        geojson = self.rep_temp / "departements.geojson"
+        geojson.write_text(json.dumps({
+            "type": "FeatureCollection",
+            "features": [{
+                "type": "Feature",
+                "properties": {"code": "63", "nom": "Puy-de-Dôme"},
+                "geometry": {"type": "Polygon", "coordinates": [
+                    [[2, 45], [3, 45], [3, 46], [2, 46], [2, 45]]
+                ]},
+            }],
+        }))
+        self.patch = mock.patch.object(build_radars_departements, "CHEMIN_GEOJSON", geojson)
+        self.patch.start()
+        self.conn = sqlite3.connect(":memory:")
+        creer_table_vitesses(self.conn)
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.conn.close()
+        self.patch.stop()
+        shutil.rmtree(self.rep_temp)
+
+    def inserer(self, mesures: list) -> None:
+        """Ajoute des mesures (avec leurs coordonnées) à la table vitesses."""
+        dates, lat, lon, vitesses, limitations, nuits = zip(*mesures)
+        identifiants = IndexPositions(self.conn).identifiants(lat, lon)
+        self.conn.executemany(
+            "INSERT INTO vitesses (date, position_id, vitesse_mesuree, limitation, annee, est_nuit) "
+            "VALUES (?, ?, ?, ?, 2023, ?);",
+            zip(dates, [int(i) for i in identifiants], vitesses, limitations, nuits),
+        )
+        self.conn.commit()
+
+    def contenu_cube(self) -> list:
+        """Renvoie toutes les lignes du cube, triées."""
+        return self.conn.execute("SELECT * FROM cube ORDER BY 1, 2, 3, 4, 5, 6, 7, 8").fetchall()
+
+    def test_dimensions_calculees(self):
+        """Vérifie mois, jour, heure, département et valeurs inconnues."""
+        self.inserer(MESURES)
+        self.assertEqual(actualiser_cube(self.conn), 5)
+
+        par_date = interroger_cube(self.conn, ["mois", "jour_semaine", "heure"])
+        self.assertEqual(
+            list(par_date[["mois", "jour_semaine", "heure"]].itertuples(index=False, name=None)),
+            [(-1, -1, -1), (1, 0, 3), (1, 1, 14), (3, 3, 22), (6, 3, 12)],
+        )
+
+        par_dept = interroger_cube(self.conn, ["departement"])
+        self.assertEqual(list(par_dept["departement"]), ["", "63"])
+        self.assertEqual(list(par_dept["nb"]), [1, 4])
+
+        nuit = interroger_cube(self.conn, [], filtres={"periode": "nuit"})
+        self.assertEqual(nuit.loc[0, "nb"], 2)
+        self.assertEqual(nuit.loc[0, "somme_depassement"], 10)
+
+    def test_actualisation_incrementale(self):
+        """Vérifie que compléter le cube équivaut à le reconstruire."""
+        self.inserer(MESURES[:2])
+        actualiser_cube(self.conn)
+        self.inserer(MESURES[2:])
+        self.assertEqual(actualiser_cube(self.conn), 3)
+        self.assertEqual(actualiser_cube(self.conn), 0)
+        incremental = self.contenu_cube()
+
+        actualiser_cube(self.conn, incremental=False)
+        self.assertEqual(incremental, self.contenu_cube())
+
+    def test_departements_rattaches_plus_tard(self):
+        """Vérifie la reconstruction quand des positions comptées sans département sont rattachées."""
+        self.inserer(MESURES)
+        with mock.patch.object(build_radars_departements, "CHEMIN_GEOJSON",
+                               self.rep_temp / "absent.geojson"), \
+                mock.patch("builtins.print"):
+            actualiser_cube(self.conn)
+        self.assertEqual(list(interroger_cube(self.conn, ["departement"])["nb"]), [5])
+
+        # Aucune nouvelle mesure : le cube est reconstruit avec les départements
+        self.assertEqual(actualiser_cube(self.conn), 5)
+        par_dept = interroger_cube(self.conn, ["departement"])
+        self.assertEqual(list(par_dept["departement"]), ["", "63"])
+        self.assertEqual(list(par_dept["nb"]), [1, 4])
+        self.assertEqual(actualiser_cube(self.conn), 0)
+
+    def test_lignes_sous_filigrane(self):
+        """Vérifie la reconstruction quand des lignes arrivent sous le filigrane."""
+        self.inserer(MESURES)
+        complet = (actualiser_cube(self.conn), self.contenu_cube())
+        colonnes = "date, position_id, vitesse_mesuree, limitation, annee, est_nuit"
+        self.conn.execute(f"CREATE TEMP TABLE retirees AS SELECT rowid AS r, {colonnes} "
+                          "FROM vitesses WHERE rowid BETWEEN 2 AND 4;")
+        self.conn.execute("DELETE FROM vitesses WHERE rowid BETWEEN 2 AND 4;")
+        actualiser_cube(self.conn, incremental=False)
+
+        # Aucune source rechargée : le comptage de vitesses est évité
+        with mock.patch.object(schema, "compter_sous_filigrane") as compter:
+            self.assertEqual(actualiser_cube(self.conn), 0)
+        compter.assert_not_called()
+
+        # Rechargées avec leurs anciens rowid : le rowid maximal ne change pas
+        enregistrer_source(self.conn, "vitesse_2023_cleaned.csv", 2023, "modifiee", None, 0)
+        self.conn.execute(f"INSERT INTO vitesses (rowid, {colonnes}) "
+                          f"SELECT r, {colonnes} FROM retirees;")
+        self.conn.commit()
+        with mock.patch("builtins.print") as affichage:
+            self.assertEqual((actualiser_cube(self.conn), self.contenu_cube()), complet)
+        self.assertIn("+3 mesures", affichage.call_args[0][0])
+
+    def test_dimension_inconnue(self):
+        """Vérifie l'erreur pour une dimension absente du cube."""
+        with self.assertRaises(ValueError):
+            interroger_cube(self.conn, ["vitesse_mesuree"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests unitaires pour l'accès aux données des pages.
+"""
+import unittest
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+from src.pages import donnees
+from src.pages.donnees import CacheLRU, JeuDonnees, annees_fichiers
+
+
+class TestJeuDonnees(unittest.TestCase):
+    """Tests du chargement paresseux et du rechargement à chaud."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.chemin = self.rep_temp / "vitesses_agg_2023.csv"
+        self.lectures = []
+        self.patch = mock.patch.object(donnees, "DELAI_VERIFICATION", 0)
+        self.patch.start()
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.patch.stop()
+        shutil.rmtree(self.rep_temp)
+
+    def lecteur(self, chemin: Path) -> str:
+        """Lit le fichier en comptant les lectures."""
+        self.lectures.append(chemin)
+        return chemin.read_text()
+
+    def ecrire(self, texte: str, decalage: int) -> None:
+        """Écrit le fichier avec une date de modification distincte."""
+        self.chemin.write_text(texte)
+        os.utime(self.chemin, ns=(decalage * 10**9, decalage * 10**9))
+
+    def test_rechargement(self):
+        """Vérifie la lecture à la demande, la relecture et le fichier absent."""
+        jeu = JeuDonnees(self.chemin, self.lecteur, defaut="absent")
+        self.assertEqual(jeu.lire(), "absent")
+
+        self.ecrire("a", 1)
+        self.assertEqual(jeu.lire(), "a")
+        self.assertEqual(jeu.lire(), "a")
+        self.assertEqual(len(self.lectures), 1)
+
+        # Date changée, contenu identique : pas de relecture
+        self.ecrire("a", 2)
+        self.assertEqual(jeu.lire(), "a")
+        self.assertEqual(len(self.lectures), 1)
+
+        self.ecrire("b", 3)
+        self.assertEqual(jeu.lire(), "b")
+        self.assertEqual(len(self.lectures), 2)
+
+        self.chemin.unlink()
+        self.assertEqual(jeu.lire(), "absent")
+        self.assertIsNone(jeu.version)
+
+    def test_delai_verification(self):
+        """Vérifie qu'un fichier n'est pas revérifié avant le délai."""
+        self.ecrire("a", 1)
+        jeu = JeuDonnees(self.chemin, self.lecteur)
+        with mock.patch.object(donnees, "DELAI_VERIFICATION", 3600):
+            self.assertEqual(jeu.lire(), "a")
+            self.ecrire("b", 2)
+            self.assertEqual(jeu.lire(), "a")
+
+    def test_annees_fichiers(self):
+        """Vérifie la détection des années."""
+        self.ecrire("a", 1)
+        (self.rep_temp / "vitesses_agg_2022.csv").write_text("")
+        (self.rep_temp / "vitesses_agg_tmp.csv").write_text("")
+        self.assertEqual(annees_fichiers(self.rep_temp, "vitesses_agg_"), [2022, 2023])
+
+
+class TestCacheLRU(unittest.TestCase):
+    """Tests du cache borné."""
+
+    def test_eviction(self):
+        """Vérifie que l'entrée la moins récemment utilisée est évincée."""
+        cache = CacheLRU(2)
+        cache.obtenir("a", lambda: 1)
+        cache.obtenir("b", lambda: 2)
+        self.assertEqual(cache.obtenir("a", lambda: 0), 1)
+        cache.obtenir("c", lambda: 3)
+
+        self.assertEqual(list(cache.valeurs), ["a", "c"])
+        self.assertEqual(cache.stats, {"succes": 1, "echecs": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests unitaires pour les contours simplifiés de la carte.
+"""
+import unittest
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from src.pages import create_geo_loc, donnees
+from src.utils.geojson_simplifie import (
+    NIVEAUX_CARTE, lire_manifeste, lire_simplifications, niveau_pour_zoom,
+)
+
+
+def ecrire_departements(chemin: Path, code_ouest: str = "01") -> None:
+    """Écrit deux départements séparés par une frontière sinueuse."""
+    frontiere = [(3 + 0.003 * np.sin(i), 45 + i / 100) for i in range(101)]
+    ouest = [(2, 46), (2, 45)] + frontiere
+    est = [(4, 45), (4, 46)] + frontiere[::-1]
+    features = [
+        {"type": "Feature", "properties": {"code": code},
+         "geometry": {"type": "Polygon", "coordinates": [anneau + [anneau[0]]]}}
+        for code, anneau in [(code_ouest, ouest), ("02", est)]
+    ]
+    chemin.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+
+
+class TestGeojsonSimplifie(unittest.TestCase):
+    """Tests de la simplification et de son cache."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.geojson = self.rep_temp / "departements.geojson"
+        ecrire_departements(self.geojson)
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        shutil.rmtree(self.rep_temp)
+
+    def test_frontieres_communes(self):
+        """Vérifie que chaque niveau reste une couverture sans trou ni chevauchement."""
+        manifeste = lire_simplifications(self.geojson)
+        self.assertEqual(manifeste["codes"], ["01", "02"])
+        self.assertEqual(set(manifeste["niveaux"]), set(NIVEAUX_CARTE))
+
+        nb_sommets = []
+        for nom in manifeste["niveaux"].values():
+            with open(self.rep_temp / nom, encoding="utf-8") as f:
+                geometries = np.array([shape(feature["geometry"])
+                                       for feature in json.load(f)["features"]])
+            self.assertTrue(shapely.coverage_is_valid(geometries))
+            self.assertAlmostEqual(shapely.area(shapely.union_all(geometries)), 2.0, places=6)
+            coordonnees = shapely.get_coordinates(geometries)
+            np.testing.assert_array_equal(coordonnees, np.round(coordonnees, 4))
+            nb_sommets.append(len(coordonnees))
+        # Du niveau le plus grossier au plus détaillé
+        self.assertEqual(nb_sommets, sorted(nb_sommets))
+
+    def test_reconstruction_si_source_modifiee(self):
+        """Vérifie que le cache suit l'empreinte du GeoJSON source."""
+        premier = lire_simplifications(self.geojson)
+        self.assertEqual(lire_simplifications(self.geojson), premier)
+
+        ecrire_departements(self.geojson, code_ouest="03")
+        second = lire_simplifications(self.geojson)
+        self.assertEqual(second["codes"], ["03", "02"])
+        self.assertEqual(len(list(self.rep_temp.glob("departements.*.*.geojson"))),
+                         len(NIVEAUX_CARTE))
+
+    def test_page_sans_construction(self):
+        """Vérifie que la page lit les contours sans jamais les construire."""
+        with mock.patch.object(create_geo_loc, "CHEMIN_GEOJSON", self.geojson), \
+                mock.patch.object(donnees, "DELAI_VERIFICATION", 0):
+            actuels = create_geo_loc.contours()
+            self.assertIsNone(actuels["manifeste"])
+            self.assertEqual(len(actuels["geojson"]["features"]), 2)
+            self.assertEqual(sorted(p.name for p in self.rep_temp.iterdir()),
+                             ["departements.geojson"])
+
+            manifeste = lire_simplifications(self.geojson)
+            self.assertEqual(lire_manifeste(self.geojson), manifeste)
+            self.assertEqual(create_geo_loc.contours()["manifeste"], manifeste)
+
+    def test_niveau_pour_zoom(self):
+        """Vérifie le choix du niveau selon le zoom."""
+        self.assertEqual(niveau_pour_zoom(4.3), "france")
+        self.assertEqual(niveau_pour_zoom(6), "region")
+        self.assertEqual(niveau_pour_zoom(12), "detail")
+
+
+if __name__ == '__main__':
+    unittest.main()
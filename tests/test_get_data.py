@@ -2,21 +2,86 @@
 Tests unitaires pour le module get_data.
 """
 import unittest
-from src.utils.get_data import URL_BASE, RESSOURCES
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from src.utils import get_data
+from src.utils.get_data import (
+    URL_BASE, RESSOURCES, decouper_segments, telecharger_fichier, telecharger_url,
+    chemin_partiel, chemin_manifeste, ecrire_json,
+)
+
+
+CONTENU = bytes(range(256)) * 400
+ETAG = '"v1"'
+
+
+class ServeurPlages(BaseHTTPRequestHandler):
+    """Serveur HTTP de test gérant Range, ETag et If-None-Match."""
+
+    octets_servis = 0
+    somme_controle = None  # Publiée dans les métadonnées /meta/<id>/
+
+    def log_message(self, *args):
+        pass
+
+    def _entetes_communs(self):
+        self.send_header("ETag", ETAG)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Last-Modified", "Sun, 01 Jan 2023 00:00:00 GMT")
+
+    def do_HEAD(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self._entetes_communs()
+        self.send_header("Content-Length", str(len(CONTENU)))
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.startswith("/meta/"):
+            corps = json.dumps({"resource": {"checksum": ServeurPlages.somme_controle}})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(corps.encode("utf-8"))
+            return
+        plage = self.headers.get("Range")
+        if plage:
+            debut, fin = plage.replace("bytes=", "").split("-")
+            debut, fin = int(debut), int(fin)
+            corps = CONTENU[debut:fin + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {debut}-{fin}/{len(CONTENU)}")
+        else:
+            corps = CONTENU
+            self.send_response(200)
+        self._entetes_communs()
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+        ServeurPlages.octets_servis += len(corps)
 
 
 class TestGetData(unittest.TestCase):
     """Tests du module de téléchargement."""
-    
+
     def test_ressources_non_vides(self):
         """Vérifie que les ressources sont définies."""
         self.assertGreater(len(RESSOURCES), 0)
-    
+
     def test_url_base_valide(self):
         """Vérifie que l'URL de base est correcte."""
         self.assertIn("data.gouv.fr", URL_BASE)
         self.assertTrue(URL_BASE.startswith("https://"))
-    
+
     def test_ressources_format(self):
         """Vérifie le format des identifiants de ressources."""
         for annee, id_ressource in RESSOURCES.items():
@@ -24,6 +89,126 @@ class TestGetData(unittest.TestCase):
             self.assertIsInstance(id_ressource, str)
             self.assertGreater(len(id_ressource), 10)
 
+    def test_decouper_segments(self):
+        """Vérifie que les segments couvrent toute la ressource sans chevauchement."""
+        with mock.patch.object(get_data, "TAILLE_MIN_SEGMENT", 10):
+            segments = decouper_segments(105, 4)
+
+        self.assertEqual(len(segments), 4)
+        self.assertEqual(segments[0][0], 0)
+        self.assertEqual(segments[-1][1], 104)
+        for precedent, suivant in zip(segments, segments[1:]):
+            self.assertEqual(precedent[1] + 1, suivant[0])
+
+
+class TestTelechargementPlages(unittest.TestCase):
+    """Tests du téléchargement segmenté contre un serveur HTTP local."""
+
+    def setUp(self):
+        """Démarre le serveur local."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.chemin = self.rep_temp / "vitesse.csv"
+        self.serveur = ThreadingHTTPServer(("127.0.0.1", 0), ServeurPlages)
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}/fichier"
+        ServeurPlages.octets_servis = 0
+        ServeurPlages.somme_controle = None
+        self.patch = mock.patch.object(get_data, "TAILLE_MIN_SEGMENT", 1000)
+        self.patch.start()
+
+    def tearDown(self):
+        """Arrête le serveur et supprime les fichiers."""
+        self.patch.stop()
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        shutil.rmtree(self.rep_temp)
+
+    def test_telechargement_complet(self):
+        """Vérifie que le fichier reconstitué est identique à la source."""
+        sha256 = hashlib.sha256(CONTENU).hexdigest()
+        self.assertTrue(telecharger_url(self.url, self.chemin,
+                                        somme_controle=("sha256", sha256)))
+
+        self.assertEqual(self.chemin.read_bytes(), CONTENU)
+        self.assertFalse(chemin_partiel(self.chemin).exists())
+        self.assertFalse(chemin_manifeste(self.chemin).exists())
+
+    def test_requete_conditionnelle(self):
+        """Vérifie qu'un fichier inchangé n'est pas retéléchargé."""
+        telecharger_url(self.url, self.chemin)
+        ServeurPlages.octets_servis = 0
+
+        self.assertFalse(telecharger_url(self.url, self.chemin))
+        self.assertEqual(ServeurPlages.octets_servis, 0)
+
+    def test_reprise_apres_interruption(self):
+        """Vérifie que seuls les octets manquants sont demandés à la reprise."""
+        moitie = len(CONTENU) // 2
+        with open(chemin_partiel(self.chemin), "wb") as f:
+            f.write(CONTENU[:moitie])
+            f.truncate(len(CONTENU))
+        ecrire_json(chemin_manifeste(self.chemin), {
+            "taille": len(CONTENU),
+            "etag": ETAG,
+            "last_modified": "Sun, 01 Jan 2023 00:00:00 GMT",
+            "segments": [[0, moitie - 1, moitie], [moitie, len(CONTENU) - 1, 0]],
+        })
+
+        telecharger_url(self.url, self.chemin)
+
+        self.assertEqual(self.chemin.read_bytes(), CONTENU)
+        self.assertEqual(ServeurPlages.octets_servis, len(CONTENU) - moitie)
+
+    def test_sauvegardes_manifeste_espacees(self):
+        """Vérifie que le manifeste n'est pas réécrit à chaque morceau."""
+        ecritures = []
+
+        def compter(chemin, contenu):
+            if chemin == chemin_manifeste(self.chemin):
+                ecritures.append([s[2] for s in contenu["segments"]])
+            ecrire_json(chemin, contenu)
+
+        with mock.patch.object(get_data, "TAILLE_MORCEAU", 1000), \
+                mock.patch.object(get_data, "OCTETS_ENTRE_SAUVEGARDES", 10_000), \
+                mock.patch.object(get_data, "DELAI_ENTRE_SAUVEGARDES", 3600), \
+                mock.patch.object(get_data, "ecrire_json", side_effect=compter):
+            telecharger_url(self.url, self.chemin)
+
+        self.assertEqual(self.chemin.read_bytes(), CONTENU)
+        # 4 segments de 25 600 octets en morceaux de 1 000 : création, puis
+        # par segment deux sauvegardes périodiques et une finale
+        self.assertLessEqual(len(ecritures), 1 + 4 * (25_600 // 10_000 + 1))
+        self.assertEqual(sum(ecritures[-1]), len(CONTENU))
+
+    def test_empreinte_incorrecte(self):
+        """Vérifie qu'une empreinte différente est refusée."""
+        with self.assertRaises(IOError):
+            telecharger_url(self.url, self.chemin, somme_controle=("sha256", "0" * 64))
+        self.assertFalse(self.chemin.exists())
+
+    def test_somme_controle_publiee(self):
+        """Vérifie le contrôle par la somme publiée dans les métadonnées."""
+        racine = self.url.rsplit("/", 1)[0]
+        with mock.patch.object(get_data, "URL_BASE", f"{racine}/r/"), \
+                mock.patch.object(get_data, "URL_METADONNEES", f"{racine}/meta/"):
+            ServeurPlages.somme_controle = {"type": "sha1", "value": "0" * 40}
+            with self.assertRaises(IOError):
+                telecharger_fichier("ressource", self.chemin)
+            self.assertFalse(self.chemin.exists())
+
+            ServeurPlages.somme_controle = {
+                "type": "sha1", "value": hashlib.sha1(CONTENU).hexdigest().upper(),
+            }
+            self.assertTrue(telecharger_fichier("ressource", self.chemin))
+        self.assertEqual(self.chemin.read_bytes(), CONTENU)
+
+    def test_segment_incomplet(self):
+        """Vérifie qu'un segment sans tous ses octets empêche de terminer."""
+        with mock.patch.object(get_data, "telecharger_segment"):
+            with self.assertRaises(IOError):
+                telecharger_url(self.url, self.chemin)
+        self.assertFalse(self.chemin.exists())
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
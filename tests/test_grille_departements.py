@@ -0,0 +1,88 @@
+"""
+Tests unitaires pour la grille de recherche des départements.
+"""
+import unittest
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import Polygon
+from src.utils import grille_departements
+from src.utils.grille_departements import (
+    GrilleDepartements, chemin_grille, joindre_departements,
+)
+
+
+def departements_test() -> gpd.GeoDataFrame:
+    """Deux départements voisins, dont un triangle à frontière oblique."""
+    return gpd.GeoDataFrame(
+        {"code": ["01", "02"]},
+        geometry=[
+            Polygon([(2, 45), (3, 45), (3, 46), (2, 46)]),
+            Polygon([(3, 45), (4.003, 45), (3, 46.0071)]),
+        ],
+        crs="EPSG:4326",
+    )
+
+
+class TestGrilleDepartements(unittest.TestCase):
+    """Tests de la grille et de son cache."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.geojson = self.rep_temp / "departements.geojson"
+        self.gdf = departements_test()
+        self.gdf.to_file(self.geojson, driver="GeoJSON")
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        shutil.rmtree(self.rep_temp)
+
+    def test_identique_sjoin(self):
+        """Vérifie que la grille donne les mêmes départements que sjoin."""
+        rng = np.random.default_rng(0)
+        lon = np.concatenate([rng.uniform(1.5, 4.5, 5000),
+                              [3.0, 3.0, 2.0, 3.5, 2.5, 10.0, np.nan]])
+        lat = np.concatenate([rng.uniform(44.5, 46.5, 5000),
+                              [45.5, 45.0, 45.3, 45.5, 45.5, 45.0, 45.0]])
+        grille = GrilleDepartements.charger(self.gdf.geometry.values, self.gdf["code"],
+                                            self.geojson)
+
+        points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lon, lat), crs="EPSG:4326")
+        joint = gpd.sjoin(points, self.gdf, how="left", predicate="within")
+        attendu = joint[~joint.index.duplicated()]["code"].fillna("").tolist()
+
+        self.assertEqual(grille.departements(lon, lat).tolist(), attendu)
+        # Frontière commune, sommet, bord : hors de tout département
+        self.assertEqual(grille.departements(lon[-7:], lat[-7:]).tolist(),
+                         ["", "", "", "02", "01", "", ""])
+
+    def test_cache_invalide_par_empreinte(self):
+        """Vérifie que la grille est relue du cache puis reconstruite si le GeoJSON change."""
+        GrilleDepartements.charger(self.gdf.geometry.values, self.gdf["code"], self.geojson)
+        self.assertTrue(chemin_grille(self.geojson).exists())
+
+        self.gdf.loc[0, "code"] = "03"
+        self.gdf.to_file(self.geojson, driver="GeoJSON")
+        grille = GrilleDepartements.charger(self.gdf.geometry.values, self.gdf["code"],
+                                            self.geojson)
+        self.assertEqual(grille.departements([2.5], [45.5]).tolist(), ["03"])
+
+    def test_jointure_parallele(self):
+        """Vérifie que la jointure répartie sur deux processus ne change rien."""
+        rng = np.random.default_rng(1)
+        lon = rng.uniform(1.5, 4.5, 2000)
+        lat = rng.uniform(44.5, 46.5, 2000)
+        geometries = self.gdf.geometry.values
+        sequentiel = joindre_departements(geometries, lon, lat)
+        with mock.patch.object(grille_departements, "SEUIL_PARALLELE", 0):
+            parallele = joindre_departements(geometries, lon, lat, nb_workers=2)
+        self.assertEqual(parallele.tolist(), sequentiel.tolist())
+        self.assertEqual(set(sequentiel.tolist()), {-1, 0, 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,6 +26,13 @@ class TestDashApp(unittest.TestCase):
         """Vérifie que l'attribut server existe."""
         self.assertIsNotNone(self.app.server)
 
+    def test_filtrage_client(self):
+        """Vérifie que l'histogramme est calculé par un callback clientside."""
+        app = create_app(filtrage_client=True)
+        # Callback clientside : aucune fonction Python côté serveur
+        self.assertNotIn("callback", app.callback_map["hist-taux-depassement.figure"])
+        self.assertIn("callback", app.callback_map["agregation-annee.data"])
+
 
 class TestComponents(unittest.TestCase):
     """Tests des composants de l'interface."""
@@ -7,7 +7,10 @@ import sqlite3
 from pathlib import Path
 import tempfile
 import os
-from src.utils.load_to_sqlite import verifier_colonne_existe, localiser_paris
+import shutil
+from unittest import mock
+from src.utils import cache_ephemerides, load_to_sqlite, partitions
+from src.utils.load_to_sqlite import verifier_colonne_existe, localiser_paris, calculer_periode_bloc
 
 
 class TestLoadToSQLite(unittest.TestCase):
@@ -59,6 +62,118 @@ class TestLoadToSQLite(unittest.TestCase):
         
         self.assertEqual(len(series_tz), 2)
         self.assertTrue(pd.isna(series_tz.iloc[0]))
+    
+    def test_moteurs_ephemerides_identiques(self):
+        """Vérifie que les moteurs NumPy et Astral classent les mesures à l'identique."""
+        bloc = pd.DataFrame({
+            "rid": range(6),
+            "date": ["2023-01-15 08:30:00", "2023-01-15 12:00:00",
+                     "2023-06-21 05:30:00", "2023-06-21 22:10:00",
+                     "2023-10-29 02:30:00", "2023-03-26 19:00:00"],
+            "position": ["48.85 2.35", "43.6 1.44", "47.2 -1.55",
+                         "45.76 4.83", "50.63 3.06", "43.3 5.37"],
+        })
+        
+        periodes_numpy = calculer_periode_bloc(bloc, moteur="numpy")
+        periodes_astral = calculer_periode_bloc(bloc, moteur="astral")
+        
+        pd.testing.assert_frame_equal(periodes_numpy, periodes_astral)
+        self.assertEqual(periodes_numpy["periode"].tolist(),
+                         ["nuit", "jour", "nuit", "nuit", "nuit", "jour"])
+
+
+class TestChargementIncremental(unittest.TestCase):
+    """Tests du chargement incrémental par filigrane de date."""
+    
+    ENTETE = "date;position;vitesse_mesuree;limitation\n"
+    JANVIER = ("2023-01-10 08:00:00;45.0 2.0;95;90\n"
+               "2023-01-20 22:00:00;46.0 3.0;60;50\n")
+    FEVRIER = ("2023-02-05 12:00:00;47.0 4.0;135;130\n"
+               "2023-02-06 03:00:00;45.0 2.0;88;90\n")
+    
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.chemin_csv = self.rep_temp / "vitesse_2023_cleaned.csv"
+        self.patchs = [
+            mock.patch.object(cache_ephemerides, "CHEMIN_CACHE", self.rep_temp / "eph.db"),
+            mock.patch.object(load_to_sqlite, "REPERTOIRE_NETTOYE", self.rep_temp),
+            mock.patch.object(partitions, "REPERTOIRE_DB", self.rep_temp),
+        ]
+        for patch in self.patchs:
+            patch.start()
+    
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        for patch in self.patchs:
+            patch.stop()
+        shutil.rmtree(self.rep_temp)
+    
+    def lire_table(self) -> pd.DataFrame:
+        """Lit la table vitesses dans l'ordre d'insertion."""
+        with sqlite3.connect(self.rep_temp / "vitesses_2023.db") as conn:
+            return pd.read_sql_query("SELECT * FROM vitesses ORDER BY rowid", conn)
+    
+    def test_ajout_des_seules_nouvelles_lignes(self):
+        """Vérifie qu'un ajout en fin de fichier équivaut à une reconstruction."""
+        self.chemin_csv.write_text(self.ENTETE + self.JANVIER, encoding="utf-8")
+        load_to_sqlite.main()
+        
+        self.assertEqual(load_to_sqlite.charger_incremental(), 0)
+        
+        self.chemin_csv.write_text(self.ENTETE + self.JANVIER + self.FEVRIER,
+                                   encoding="utf-8")
+        self.assertEqual(load_to_sqlite.charger_incremental(), 2)
+        incrementale = self.lire_table()
+        
+        load_to_sqlite.main()
+        pd.testing.assert_frame_equal(incrementale, self.lire_table())
+    
+    def test_positions_reprises(self):
+        """Vérifie qu'une reconstruction garde les positions et leurs départements."""
+        self.chemin_csv.write_text(self.ENTETE + self.JANVIER, encoding="utf-8")
+        load_to_sqlite.main()
+        with sqlite3.connect(self.rep_temp / "vitesses_2023.db") as conn:
+            conn.execute("UPDATE positions SET departement = '63', region = 'Auvergne' "
+                         "WHERE lat = 45.0;")
+        
+        self.chemin_csv.write_text(self.ENTETE + self.FEVRIER, encoding="utf-8")
+        load_to_sqlite.main()
+        with sqlite3.connect(self.rep_temp / "vitesses_2023.db") as conn:
+            positions = conn.execute(
+                "SELECT id, lat, departement FROM positions ORDER BY id;"
+            ).fetchall()
+        self.assertEqual(positions, [(1, 45.0, "63"), (2, 46.0, None), (3, 47.0, None)])
+    
+    def test_lignes_tardives_et_sans_date(self):
+        """Vérifie la reconstruction quand une source change avant sa date maximale."""
+        self.chemin_csv.write_text(self.ENTETE + self.JANVIER, encoding="utf-8")
+        load_to_sqlite.main()
+        
+        # Mesure tardive du 15 janvier et mesure sans date, puis une nouvelle
+        self.chemin_csv.write_text(
+            self.ENTETE + self.JANVIER + "2023-01-15 09:00:00;46.0 3.0;70;50\n"
+            ";47.0 4.0;80;90\n" + "2023-02-01 10:00:00;45.0 2.0;99;90\n",
+            encoding="utf-8",
+        )
+        with mock.patch("builtins.print") as affichage:
+            self.assertEqual(load_to_sqlite.charger_incremental(), 5)
+        messages = [appel.args[0] for appel in affichage.call_args_list if appel.args]
+        self.assertTrue(any(m.startswith("Attention: vitesse_2023_cleaned.csv modifiée")
+                            for m in messages))
+        incrementale = self.lire_table()
+        self.assertEqual(len(incrementale), 5)
+        with sqlite3.connect(self.rep_temp / "vitesses_2023.db") as conn:
+            self.assertEqual(conn.execute("SELECT nb_lignes FROM sources;").fetchone()[0], 5)
+        
+        # Ajout en fin de fichier après une mesure sans date : incrémental
+        self.chemin_csv.write_text(
+            self.chemin_csv.read_text(encoding="utf-8") + self.FEVRIER, encoding="utf-8"
+        )
+        self.assertEqual(load_to_sqlite.charger_incremental(), 2)
+        incrementale = self.lire_table()
+        load_to_sqlite.main()
+        pd.testing.assert_frame_equal(incrementale, self.lire_table())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,94 @@
+"""
+Tests unitaires pour le stockage partitionné par année.
+"""
+import unittest
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+from src.utils import partitions
+from src.utils.positions import IndexPositions
+from src.utils.schema import creer_table_vitesses
+
+
+def remplir(conn: sqlite3.Connection, lignes: list) -> None:
+    """Insère des lignes (date, lat, lon, vitesse, limitation, annee, est_nuit)."""
+    dates, lat, lon, *autres = zip(*lignes)
+    identifiants = [int(i) for i in IndexPositions(conn).identifiants(lat, lon)]
+    conn.executemany(
+        "INSERT INTO vitesses (date, position_id, vitesse_mesuree, limitation, annee, est_nuit) "
+        "VALUES (?, ?, ?, ?, ?, ?);",
+        zip(dates, identifiants, *autres),
+    )
+    conn.commit()
+
+
+class TestPartitions(unittest.TestCase):
+    """Tests des bases annuelles et de leur réunion."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.patch = mock.patch.object(partitions, "REPERTOIRE_DB", self.rep_temp)
+        self.patch.start()
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.patch.stop()
+        shutil.rmtree(self.rep_temp)
+
+    def creer_annee(self, annee: int, lignes: list) -> None:
+        """Crée la base d'une année avec quelques lignes."""
+        conn = sqlite3.connect(partitions.chemin_base(annee))
+        creer_table_vitesses(conn)
+        remplir(conn, lignes)
+        conn.close()
+
+    def test_connexion_plusieurs_annees(self):
+        """Vérifie la vue vitesses qui réunit les bases annuelles."""
+        self.creer_annee(2022, [(1640995200, 45.0, 2.0, 95, 90, 2022, 1)])
+        self.creer_annee(2023, [(1672531200, 46.0, 3.0, 60, 50, 2023, 0),
+                                (1672617600, 47.0, 4.0, 45, 50, 2023, 0)])
+        self.assertEqual(partitions.annees_chargees(), [2022, 2023])
+
+        conn = partitions.connecter()
+        comptes = conn.execute(
+            "SELECT annee, COUNT(*), SUM(depassement > 0) FROM vitesses GROUP BY annee"
+        ).fetchall()
+        coordonnees = conn.execute("SELECT lat, lon FROM mesures ORDER BY date").fetchall()
+        conn.close()
+        self.assertEqual(comptes, [(2022, 1, 1), (2023, 2, 1)])
+        self.assertEqual(coordonnees, [(45.0, 2.0), (46.0, 3.0), (47.0, 4.0)])
+
+        conn = partitions.connecter([2023])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM vitesses").fetchone(), (2,))
+        conn.close()
+
+    def test_separer_base_unique(self):
+        """Vérifie la répartition de l'ancienne base par année."""
+        conn = sqlite3.connect(self.rep_temp / "vitesses.db")
+        pd.DataFrame({
+            "date": ["2022-12-31 23:00:00", "2023-01-01 12:00:00"],
+            "position": ["45.0 2.0", "46.0 3.0"],
+            "vitesse_mesuree": [95, 60],
+            "limitation": [90, 50],
+            "annee": [2022, 2023],
+            "periode": ["nuit", "jour"],
+        }).to_sql("vitesses", conn, index=False)
+        conn.close()
+
+        self.assertEqual(partitions.separer_base_unique(), [2022, 2023])
+        self.assertFalse((self.rep_temp / "vitesses.db").exists())
+
+        conn = partitions.connecter([2022])
+        self.assertEqual(
+            conn.execute("SELECT datetime(date, 'unixepoch'), est_nuit FROM vitesses").fetchall(),
+            [("2022-12-31 23:00:00", 1)],
+        )
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
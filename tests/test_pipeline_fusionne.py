@@ -0,0 +1,156 @@
+"""
+Tests unitaires pour le pipeline fusionné.
+"""
+import unittest
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+from src.utils import cache_ephemerides, load_to_sqlite, partitions
+from src.utils.clean_data import nettoyer_fichier, nettoyer_flux, nouvelles_stats
+from src.utils.load_to_sqlite import charger_flux
+
+
+CSV_BRUT = (
+    "date;position;mesure;limite\n"
+    "2023-01-01 03:00:00;45.0 2.0;95;90\n"
+    "2023-01-01 13:00:00;45.0 2.0;85;90\n"
+    "2023-03-26 02:30:00;48.8 2.3;;90\n"
+    "2023-06-15 12:00:00;43.6 1.4;140;130\n"
+    "2023-06-15 23:30:00;;60;50\n"
+    "date invalide;47.2 -1.5;72;70\n"
+    "2023-10-29 02:30:00;47.2 -1.5;72;70\n"
+    "2023-12-31 18:00:00;50.6 3.0;55;50\n"
+)
+
+
+def lire_table(chemin_db: Path) -> pd.DataFrame:
+    """Lit la table vitesses dans l'ordre d'insertion."""
+    with sqlite3.connect(chemin_db) as conn:
+        return pd.read_sql_query("SELECT * FROM vitesses ORDER BY rowid", conn)
+
+
+class TestPipelineFusionne(unittest.TestCase):
+    """Tests d'équivalence entre pipeline par étapes et pipeline fusionné."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.rep_temp = Path(tempfile.mkdtemp())
+        self.patch_cache = mock.patch.object(
+            cache_ephemerides, "CHEMIN_CACHE", self.rep_temp / "ephemerides.db"
+        )
+        self.patch_cache.start()
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.patch_cache.stop()
+        shutil.rmtree(self.rep_temp)
+
+    def construire_par_etapes(self) -> Path:
+        """Construit la base avec les étapes CSV brut → CSV nettoyé → SQLite."""
+        chemin_brut = self.rep_temp / "vitesse_2023.csv"
+        chemin_brut.write_text(CSV_BRUT, encoding="utf-8")
+        self.stats_etapes = nettoyer_fichier(chemin_brut,
+                                             self.rep_temp / "vitesse_2023_cleaned.csv")
+
+        with mock.patch.object(load_to_sqlite, "REPERTOIRE_NETTOYE", self.rep_temp), \
+                mock.patch.object(partitions, "REPERTOIRE_DB", self.rep_temp):
+            load_to_sqlite.main()
+        return self.rep_temp / "vitesses_2023.db"
+
+    def test_meme_table_que_par_etapes(self):
+        """Vérifie que le flux produit exactement la même table vitesses."""
+        chemin_etapes = self.construire_par_etapes()
+
+        # Corps HTTP simulé, découpé en morceaux qui coupent les lignes
+        octets = CSV_BRUT.encode("utf-8")
+        morceaux = (octets[i:i + 7] for i in range(0, len(octets), 7))
+        chemin_flux = self.rep_temp / "flux.db"
+        stats = nouvelles_stats()
+        charger_flux(nettoyer_flux(morceaux, taille_bloc=3, stats=stats), 2023, chemin_flux)
+
+        pd.testing.assert_frame_equal(lire_table(chemin_flux), lire_table(chemin_etapes))
+        self.assertEqual(stats, self.stats_etapes)
+
+    def test_index_crees(self):
+        """Vérifie les index et les statistiques de la base."""
+        chemin_flux = self.rep_temp / "flux.db"
+        charger_flux(nettoyer_flux([CSV_BRUT.encode("utf-8")]), 2023, chemin_flux)
+
+        with sqlite3.connect(chemin_flux) as conn:
+            index = {ligne[1] for ligne in conn.execute("PRAGMA index_list(vitesses)")}
+            statistiques = conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+        self.assertEqual(index, {"idx_date", "idx_position", "idx_nuit"})
+        self.assertGreater(statistiques, 0)
+
+    def test_profil_limite_au_chargement(self):
+        """Vérifie que seuls les réglages persistants du profil restent dans la base."""
+        chemin_flux = self.rep_temp / "flux.db"
+        charger_flux(nettoyer_flux([CSV_BRUT.encode("utf-8")]), 2023, chemin_flux)
+
+        # Octets 18-19 de l'en-tête : 1 = journal classique, 2 = WAL
+        entete = chemin_flux.read_bytes()[:100]
+        self.assertEqual((entete[18], entete[19]), (1, 1))
+        with sqlite3.connect(chemin_flux) as conn:
+            page = conn.execute("PRAGMA page_size").fetchone()[0]
+            journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            synchrone = conn.execute("PRAGMA synchronous").fetchone()[0]
+            mmap = conn.execute("PRAGMA mmap_size").fetchone()[0]
+        self.assertEqual(page, 32768)
+        self.assertEqual((journal, synchrone, mmap), ("delete", 2, 0))
+        self.assertFalse(chemin_flux.with_name("flux.db.tmp").exists())
+
+    def test_interruption_garde_base(self):
+        """Vérifie qu'un chargement interrompu laisse l'ancienne base intacte."""
+        chemin_flux = self.rep_temp / "flux.db"
+        charger_flux(nettoyer_flux([CSV_BRUT.encode("utf-8")]), 2023, chemin_flux)
+        with sqlite3.connect(chemin_flux) as conn:
+            conn.execute("CREATE TABLE cube (nb INTEGER);")
+            conn.execute("INSERT INTO cube VALUES (42);")
+        avant = lire_table(chemin_flux)
+
+        def blocs_interrompus():
+            yield from nettoyer_flux([CSV_BRUT.encode("utf-8")], taille_bloc=2)
+            raise ConnectionError("flux coupé")
+
+        with self.assertRaises(ConnectionError):
+            charger_flux(blocs_interrompus(), 2023, chemin_flux)
+
+        pd.testing.assert_frame_equal(lire_table(chemin_flux), avant)
+        with sqlite3.connect(chemin_flux) as conn:
+            self.assertEqual(conn.execute("SELECT nb FROM cube").fetchall(), [(42,)])
+        self.assertFalse(chemin_flux.with_name("flux.db.tmp").exists())
+
+    def test_profil_chargement_refuse_en_ajout(self):
+        """Vérifie que le profil sans journal n'est jamais appliqué à une base existante."""
+        with self.assertRaises(ValueError):
+            charger_flux(nettoyer_flux([CSV_BRUT.encode("utf-8")]), 2023,
+                         self.rep_temp / "flux.db", remplacer=False, profil="chargement")
+
+    def test_profils_equivalents(self):
+        """Vérifie que le profil de chargement ne change pas le contenu."""
+        chemin_defaut = self.rep_temp / "defaut.db"
+        chemin_rapide = self.rep_temp / "rapide.db"
+        charger_flux(nettoyer_flux([CSV_BRUT.encode("utf-8")]), 2023,
+                     chemin_defaut, profil="defaut")
+        charger_flux(nettoyer_flux([CSV_BRUT.encode("utf-8")]), 2023,
+                     chemin_rapide, profil="chargement")
+
+        pd.testing.assert_frame_equal(lire_table(chemin_rapide), lire_table(chemin_defaut))
+
+    def test_parallele_meme_table(self):
+        """Vérifie que le calcul en plusieurs processus garde contenu et ordre."""
+        chemin_seq = self.rep_temp / "sequentiel.db"
+        chemin_par = self.rep_temp / "parallele.db"
+        octets = CSV_BRUT.encode("utf-8")
+        charger_flux(nettoyer_flux([octets], taille_bloc=2), 2023, chemin_seq)
+        charger_flux(nettoyer_flux([octets], taille_bloc=2), 2023, chemin_par,
+                     nb_workers=2)
+
+        pd.testing.assert_frame_equal(lire_table(chemin_par), lire_table(chemin_seq))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Tests unitaires pour la table de dimension des positions.
+"""
+import unittest
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+from src.utils.build_radars_departements import CHEMIN_GEOJSON
+from src.utils.positions import REGION_PAR_DEPARTEMENT, IndexPositions
+from src.utils.schema import creer_table_vitesses
+
+
+class TestPositions(unittest.TestCase):
+    """Tests des identifiants de position et des régions."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.conn = sqlite3.connect(":memory:")
+        creer_table_vitesses(self.conn)
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.conn.close()
+
+    def test_identifiants_stables(self):
+        """Vérifie qu'une position garde son identifiant d'un bloc à l'autre."""
+        index = IndexPositions(self.conn)
+        premier = index.identifiants([45.0, 46.0, 45.0, np.nan], [2.0, 3.0, 2.0, 1.0])
+        self.assertEqual(list(premier[:3]), [1, 2, 1])
+        self.assertTrue(pd.isna(premier[3]))
+
+        # Nouvelle instance : les positions sont relues dans la base
+        second = IndexPositions(self.conn).identifiants([46.0, 47.0], [3.0, 4.0])
+        self.assertEqual(list(second), [2, 3])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM positions").fetchone(), (3,))
+
+    def test_regions_couvrent_departements(self):
+        """Vérifie que chaque département du GeoJSON a une région."""
+        with open(CHEMIN_GEOJSON, encoding="utf-8") as f:
+            codes = {feature["properties"]["code"] for feature in json.load(f)["features"]}
+        self.assertEqual(codes, set(REGION_PAR_DEPARTEMENT))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Tests unitaires pour le schéma de la table vitesses.
+"""
+import unittest
+import sqlite3
+import pandas as pd
+from src.utils.schema import (
+    VERSION_SCHEMA, appliquer_profil, creer_table_vitesses, migrer_schema,
+    version_schema,
+)
+
+
+class TestSchema(unittest.TestCase):
+    """Tests du schéma typé et de la migration depuis l'ancien format."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.conn = sqlite3.connect(":memory:")
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.conn.close()
+
+    def test_table_stricte(self):
+        """Vérifie que la table refuse une valeur du mauvais type."""
+        creer_table_vitesses(self.conn)
+        self.assertEqual(version_schema(self.conn), VERSION_SCHEMA)
+
+        with self.assertRaises(sqlite3.Error):
+            self.conn.execute(
+                "INSERT INTO vitesses (date, position_id, vitesse_mesuree, limitation, annee) "
+                "VALUES ('2023-01-01', 1, 95, 90, 2023);"
+            )
+
+    def test_migration_ancien_format(self):
+        """Vérifie la conversion d'une table créée par to_sql (tout en TEXT)."""
+        pd.DataFrame({
+            "date": ["2023-01-01 03:00:00", "2023-06-15 12:00:00", None, "2023-06-16 08:00:00"],
+            "position": ["45.0 2.0", "43.6 1.4", "47.2 -1.5", "45.0 2.0"],
+            "vitesse_mesuree": [95, 140, 72, 50],
+            "limitation": [90, 130, 70, 50],
+            "annee": [2023, 2023, 2023, 2023],
+            "periode": ["nuit", "jour", None, "jour"],
+        }).to_sql("vitesses", self.conn, index=False)
+        self.assertEqual(version_schema(self.conn), 1)
+
+        self.assertTrue(migrer_schema(self.conn))
+        self.assertFalse(migrer_schema(self.conn))
+        self.assertEqual(version_schema(self.conn), VERSION_SCHEMA)
+
+        lignes = self.conn.execute(
+            "SELECT datetime(date, 'unixepoch'), lat, lon, depassement, est_nuit "
+            "FROM mesures"
+        ).fetchall()
+        self.assertEqual(lignes, [
+            ("2023-01-01 03:00:00", 45.0, 2.0, 5, 1),
+            ("2023-06-15 12:00:00", 43.6, 1.4, 10, 0),
+            (None, 47.2, -1.5, 2, None),
+            ("2023-06-16 08:00:00", 45.0, 2.0, 0, 0),
+        ])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM positions").fetchone(), (3,))
+
+        types = self.conn.execute(
+            "SELECT DISTINCT typeof(date), typeof(position_id), typeof(vitesse_mesuree) "
+            "FROM vitesses WHERE date IS NOT NULL"
+        ).fetchall()
+        self.assertEqual(types, [("integer", "integer", "integer")])
+
+    def test_profil_inconnu(self):
+        """Vérifie l'erreur pour un profil PRAGMA inconnu."""
+        with self.assertRaises(ValueError):
+            appliquer_profil(self.conn, "turbo")
+
+
+if __name__ == '__main__':
+    unittest.main()
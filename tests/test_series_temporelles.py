@@ -0,0 +1,141 @@
+"""
+Tests unitaires pour les séries temporelles agrégées.
+"""
+import unittest
+import sqlite3
+from unittest import mock
+import numpy as np
+from src.utils import schema
+from src.utils.series_temporelles import (
+    actualiser_series, choisir_granularite, lttb, table_serie,
+)
+from src.utils.schema import creer_table_vitesses, enregistrer_source
+
+
+JOUR = 86400
+
+MESURES = [
+    # date (secondes locales), vitesse, limitation
+    (10 * JOUR + 60, 95, 90),          # 00:01, infraction
+    (10 * JOUR + 240, 80, 90),         # 00:04, même intervalle de 5 minutes
+    (10 * JOUR + 3700, 135, 130),      # 01:01:40, infraction
+    (11 * JOUR + 100, 50, 50),         # lendemain
+    (None, 60, 50),                    # sans date : ignorée
+]
+
+
+class TestSeriesTemporelles(unittest.TestCase):
+    """Tests de construction des séries."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.conn = sqlite3.connect(":memory:")
+        creer_table_vitesses(self.conn)
+
+    def tearDown(self):
+        """Nettoyage après chaque test."""
+        self.conn.close()
+
+    def inserer(self, mesures: list) -> None:
+        """Ajoute des mesures à la table vitesses."""
+        self.conn.executemany(
+            "INSERT INTO vitesses (date, vitesse_mesuree, limitation, annee) "
+            "VALUES (?, ?, ?, 2023);",
+            mesures,
+        )
+        self.conn.commit()
+
+    def serie(self, granularite: str) -> list:
+        """Renvoie les lignes d'une granularité, triées."""
+        return self.conn.execute(
+            f"SELECT * FROM {table_serie(granularite)} ORDER BY debut"
+        ).fetchall()
+
+    def test_granularites(self):
+        """Vérifie le regroupement par intervalle à chaque granularité."""
+        self.assertEqual(actualiser_series(self.conn), 0)
+        self.inserer(MESURES)
+        self.assertEqual(actualiser_series(self.conn), 4)
+        self.assertEqual(self.serie("5min"), [
+            (10 * JOUR, 2, 1, -5),
+            (10 * JOUR + 3600, 1, 1, 5),
+            (11 * JOUR, 1, 0, 0),
+        ])
+        self.assertEqual(self.serie("heure"), [
+            (10 * JOUR, 2, 1, -5),
+            (10 * JOUR + 3600, 1, 1, 5),
+            (11 * JOUR, 1, 0, 0),
+        ])
+        self.assertEqual(self.serie("jour"), [
+            (10 * JOUR, 3, 2, 0),
+            (11 * JOUR, 1, 0, 0),
+        ])
+
+    def test_incremental(self):
+        """Vérifie que l'ajout incrémental donne la même série qu'une reconstruction."""
+        self.inserer(MESURES[:2])
+        actualiser_series(self.conn)
+        self.inserer(MESURES[2:])
+        self.assertEqual(actualiser_series(self.conn), 2)
+        self.assertEqual(actualiser_series(self.conn), 0)
+        incrementale = {g: self.serie(g) for g in ("5min", "heure", "jour")}
+
+        self.assertEqual(actualiser_series(self.conn, incremental=False), 4)
+        for granularite, lignes in incrementale.items():
+            self.assertEqual(self.serie(granularite), lignes)
+
+    def test_lignes_sous_filigrane(self):
+        """Vérifie la reconstruction quand des lignes arrivent sous le filigrane."""
+        self.inserer(MESURES)
+        actualiser_series(self.conn)
+        completes = self.serie("jour")
+        self.conn.execute("CREATE TEMP TABLE retirees AS SELECT rowid AS r, date, "
+                          "vitesse_mesuree, limitation, annee FROM vitesses WHERE rowid <= 2;")
+        self.conn.execute("DELETE FROM vitesses WHERE rowid <= 2;")
+        actualiser_series(self.conn, incremental=False)
+
+        # Aucune source rechargée : le comptage de vitesses est évité
+        with mock.patch.object(schema, "compter_sous_filigrane") as compter:
+            self.assertEqual(actualiser_series(self.conn), 0)
+        compter.assert_not_called()
+
+        # Rechargées avec leurs anciens rowid : le rowid maximal ne change pas
+        enregistrer_source(self.conn, "vitesse_2023_cleaned.csv", 2023, "modifiee", None, 0)
+        self.conn.execute("INSERT INTO vitesses (rowid, date, vitesse_mesuree, limitation, annee) "
+                          "SELECT * FROM retirees;")
+        self.conn.commit()
+        with mock.patch("builtins.print") as affichage:
+            self.assertEqual(actualiser_series(self.conn), 4)
+        self.assertIn("+2 mesures", affichage.call_args[0][0])
+        self.assertEqual(self.serie("jour"), completes)
+
+    def test_choisir_granularite(self):
+        """Vérifie le choix de la granularité la plus fine possible."""
+        self.assertEqual(choisir_granularite(7 * JOUR, 10_000), "5min")
+        self.assertEqual(choisir_granularite(365 * JOUR, 10_000), "heure")
+        self.assertEqual(choisir_granularite(365 * JOUR, 100), "jour")
+        self.assertEqual(choisir_granularite(10_000 * JOUR, 100), "jour")
+
+
+class TestLttb(unittest.TestCase):
+    """Tests de la réduction LTTB."""
+
+    def test_reduction(self):
+        """Vérifie le nombre de points, les extrémités et la conservation d'un pic."""
+        x = np.arange(1000)
+        y = np.sin(x / 50)
+        y[437] = 25
+        indices = lttb(x, y, 100)
+        self.assertEqual(len(indices), 100)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 999)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(437, indices)
+
+    def test_serie_courte(self):
+        """Vérifie qu'une série déjà courte est gardée entière."""
+        np.testing.assert_array_equal(lttb([1, 2, 3], [4, 5, 6], 10), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests unitaires pour le service du dashboard en production.
+"""
+import unittest
+import importlib.util
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from src.pages.home import create_app
+from src.pages.serveur import (
+    DUREE_CACHE_STATIQUE, activer_cache_statique, creer_application_gunicorn,
+    lire_adresse, options_gunicorn,
+)
+
+
+GUNICORN = importlib.util.find_spec("gunicorn") is not None
+RACINE = Path(__file__).resolve().parents[1]
+
+
+class TestServeur(unittest.TestCase):
+    """Tests de l'adresse d'écoute et des en-têtes de cache."""
+
+    def test_lire_adresse(self):
+        """Vérifie le découpage hote:port."""
+        self.assertEqual(lire_adresse("0.0.0.0:9000"), ("0.0.0.0", 9000))
+        self.assertEqual(lire_adresse(":8050"), ("127.0.0.1", 8050))
+
+    def test_cache_statique(self):
+        """Vérifie le cache long des seuls composants à empreinte."""
+        app = create_app()
+        activer_cache_statique(app)
+        client = app.server.test_client()
+
+        page = client.get("/").get_data(as_text=True)
+        url = re.search(r'src="(/_dash-component-suites/[^"]+\.v\d[^"]*)"', page).group(1)
+        cache = client.get(url).cache_control
+        self.assertEqual(cache.max_age, DUREE_CACHE_STATIQUE)
+        self.assertTrue(cache.immutable)
+
+        # Même fichier sans empreinte : revalidé par ETag
+        sans_empreinte = re.sub(r"\.v[\w]+m\d+", "", url)
+        self.assertIsNone(client.get(sans_empreinte).cache_control.max_age)
+
+
+@unittest.skipUnless(GUNICORN, "gunicorn non installé")
+class TestGunicorn(unittest.TestCase):
+    """Tests du service par gunicorn."""
+
+    def test_configuration(self):
+        """Vérifie les réglages transmis à gunicorn et l'application servie."""
+        app = create_app()
+        application = creer_application_gunicorn(
+            app, options_gunicorn("127.0.0.1:9000", workers=2, threads=3)
+        )
+        self.assertEqual(application.cfg.bind, ["127.0.0.1:9000"])
+        self.assertEqual(application.cfg.workers, 2)
+        self.assertEqual(application.cfg.threads, 3)
+        self.assertEqual(application.cfg.worker_class_str, "gthread")
+        self.assertTrue(application.cfg.preload_app)
+        self.assertIs(application.load(), app.server)
+
+    def test_demarrage(self):
+        """Lance le mode production et vérifie qu'un worker répond, compressé."""
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        script = (
+            "from src.pages.serveur import creer_application, servir\n"
+            f"servir(creer_application(), bind='127.0.0.1:{port}', workers=1, threads=2)\n"
+        )
+        with tempfile.TemporaryDirectory() as rep:
+            # Répertoire vide : aucune donnée, le dashboard démarre quand même
+            processus = subprocess.Popen(
+                [sys.executable, "-c", script], cwd=rep,
+                env=dict(os.environ, PYTHONPATH=str(RACINE)),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                requete = urllib.request.Request(
+                    f"http://127.0.0.1:{port}/", headers={"Accept-Encoding": "gzip"}
+                )
+                echeance = time.monotonic() + 60
+                while True:
+                    try:
+                        reponse = urllib.request.urlopen(requete, timeout=5)
+                        break
+                    except OSError:
+                        if time.monotonic() > echeance or processus.poll() is not None:
+                            raise
+                        time.sleep(0.2)
+                with reponse:
+                    self.assertEqual(reponse.status, 200)
+                    if importlib.util.find_spec("flask_compress"):
+                        self.assertEqual(reponse.headers["Content-Encoding"], "gzip")
+            finally:
+                processus.terminate()
+                processus.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests unitaires pour la page d'analyse statistique.
+"""
+import unittest
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.pages import donnees, simple_page
+from src.pages.simple_page import ORDRE_CLASSES, calculer_distributions
+
+
+class TestSimplePage(unittest.TestCase):
+    """Tests des distributions précalculées et du cache des figures."""
+
+    def setUp(self):
+        """Préparation avant chaque test."""
+        self.df = pd.DataFrame({
+            "periode": ["jour", "jour", "nuit", "nuit"],
+            "limitation": [50, 90, 50, np.nan],
+            "classe_depassement": [ORDRE_CLASSES[0], ORDRE_CLASSES[1],
+                                   ORDRE_CLASSES[1], ORDRE_CLASSES[4]],
+            "count": [10, 5, 3, 2],
+        })
+
+    def test_distributions(self):
+        """Vérifie les comptages de chaque combinaison de filtres."""
+        distributions = calculer_distributions(self.df)
+
+        self.assertEqual(set(distributions), {
+            (periode, limitation)
+            for periode in ["toutes", "jour", "nuit"]
+            for limitation in [None, 50, 90]
+        })
+        # Les mesures sans limitation comptent dans « toutes »
+        self.assertEqual(distributions[("toutes", None)].tolist(), [10, 8, 0, 0, 2])
+        self.assertEqual(distributions[("nuit", 50)].tolist(), [0, 3, 0, 0, 0])
+        self.assertEqual(distributions[("jour", 90)].index.tolist(), ORDRE_CLASSES)
+
+    def test_cache_figures(self):
+        """Vérifie que la figure est reconstruite quand les données changent."""
+        rep_temp = Path(tempfile.mkdtemp())
+        try:
+            with mock.patch.object(simple_page, "REPERTOIRE_AGG", rep_temp), \
+                 mock.patch.object(simple_page, "cache_figures", donnees.CacheLRU(8)), \
+                 mock.patch.object(donnees, "DELAI_VERIFICATION", 0):
+                self.df.to_csv(rep_temp / "vitesses_agg_2023.csv", index=False)
+                premiere = simple_page.figure_histogramme(2023, "toutes", None)
+                self.assertIs(simple_page.figure_histogramme(2023, "toutes", None), premiere)
+                self.assertIn("20 mesures", premiere["layout"]["title"]["text"])
+
+                self.df.assign(count=1).to_csv(rep_temp / "vitesses_agg_2023.csv", index=False)
+                seconde = simple_page.figure_histogramme(2023, "toutes", None)
+                self.assertIn("4 mesures", seconde["layout"]["title"]["text"])
+
+                # Limitation absente de l'année : distribution vide
+                vide = simple_page.figure_histogramme(2023, "jour", 130)
+                self.assertIn("(0 mesures)", vide["layout"]["title"]["text"])
+        finally:
+            shutil.rmtree(rep_temp)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Tests unitaires pour le module soleil (éphémérides vectorisées).
+"""
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+import pytz
+from astral import LocationInfo
+from astral.sun import sun
+from src.utils.soleil import lever_coucher, TOLERANCE_SECONDES
+
+
+FUSEAU = pytz.timezone("Europe/Paris")
+
+
+class TestSoleil(unittest.TestCase):
+    """Validation du moteur NumPy contre Astral."""
+    
+    def test_ecart_avec_astral(self):
+        """Vérifie l'écart avec Astral sur des dates/positions aléatoires en France."""
+        rng = np.random.default_rng(0)
+        n = 300
+        dates = [datetime.date(2023, 1, 1) + datetime.timedelta(days=int(j))
+                 for j in rng.integers(0, 365, n)]
+        lat = rng.uniform(41.0, 51.5, n).round(1)
+        lon = rng.uniform(-5.5, 10.0, n).round(1)
+        
+        lever, coucher = lever_coucher(dates, lat, lon, FUSEAU)
+        
+        references = [
+            sun(LocationInfo(latitude=a, longitude=b, timezone=FUSEAU.zone).observer,
+                date=d, tzinfo=FUSEAU)
+            for d, a, b in zip(dates, lat, lon)
+        ]
+        lever_ref = pd.DatetimeIndex([r["sunrise"] for r in references])
+        coucher_ref = pd.DatetimeIndex([r["sunset"] for r in references])
+        
+        self.assertLess(np.abs((lever - lever_ref).total_seconds()).max(), TOLERANCE_SECONDES)
+        self.assertLess(np.abs((coucher - coucher_ref).total_seconds()).max(), TOLERANCE_SECONDES)
+    
+    def test_nuit_polaire(self):
+        """Vérifie qu'une journée sans lever de soleil donne NaT."""
+        lever, coucher = lever_coucher([datetime.date(2023, 12, 21)], [80.0], [15.0], FUSEAU)
+        
+        self.assertTrue(pd.isna(lever[0]))
+        self.assertTrue(pd.isna(coucher[0]))
+    
+    def test_fuseau_resultat(self):
+        """Vérifie que les heures sont exprimées en Europe/Paris."""
+        lever, _ = lever_coucher(["2023-06-21"], [48.8], [2.3], FUSEAU)
+        
+        self.assertEqual(str(lever.tz), "Europe/Paris")
+        self.assertEqual(lever[0].hour, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,12 @@
+"""
+Point d'entrée WSGI du dashboard, pour un serveur externe :
+
+    gunicorn --preload --workers 4 --threads 4 --bind 0.0.0.0:8050 wsgi:server
+
+Les données doivent déjà être préparées (python main.py).
+"""
+from src.pages.serveur import creer_application
+
+
+app = creer_application()
+server = app.server